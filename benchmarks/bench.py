@@ -0,0 +1,147 @@
+# benchmarks/bench.py
+# Mide cada etapa del conversor (lectura, conversión, exportación) sobre entradas sintéticas
+# de distintos tamaños y guarda los resultados en JSON para comparar versiones.
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench.py                         # 1k, 100k y 1M filas
+#   python benchmarks/bench.py --tamanios 1000,100000  # sólo algunos tamaños
+#   python benchmarks/bench.py --comparar benchmarks/resultados/anterior.json
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+AQUI = Path(__file__).resolve().parent
+sys.path.insert(0, str(AQUI.parent))
+sys.path.insert(0, str(AQUI))
+
+import generadores  # noqa: E402
+from emitidos_core import (  # noqa: E402
+    VERSION_PROCESO, NamedBytesIO, export_xlsx, process_arca, process_pastor, read_arca,
+)
+
+TAMANIOS = [1_000, 100_000, 1_000_000]
+
+
+def medir(funcion, memoria: bool) -> tuple[float, float | None, object]:
+    """
+    (segundos, pico de memoria en MB o None, resultado). El tiempo se toma en una corrida
+    sin tracemalloc; si `memoria`, se repite con tracemalloc para el pico.
+    """
+    gc.collect()
+    t0 = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - t0
+
+    pico = None
+    if memoria:
+        del resultado
+        gc.collect()
+        tracemalloc.start()
+        resultado = funcion()
+        pico = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return segundos, pico, resultado
+
+
+def etapas(n: int):
+    """
+    (nombre, bytes de entrada, nombre de archivo, función(archivo) -> (resultado, filas procesadas)).
+    """
+    csv_bytes = generadores.arca_csv(n)
+    yield "read_arca csv", csv_bytes, "arca.csv", lambda f: (read_arca(f)[0], n)
+    yield "process_arca csv", csv_bytes, "arca.csv", lambda f: (process_arca(f)[0], n)
+    del csv_bytes
+
+    xlsx_bytes = generadores.arca_xlsx(n)
+    yield "read_arca xlsx", xlsx_bytes, "arca.xlsx", lambda f: (read_arca(f)[0], n)
+    yield "process_arca xlsx", xlsx_bytes, "arca.xlsx", lambda f: (process_arca(f)[0], n)
+    del xlsx_bytes
+
+    pastor_bytes = generadores.pastor_xlsx(n)
+    yield "process_pastor", pastor_bytes, "pastor.xlsx", lambda f: (process_pastor(f)[0], n)
+
+
+def correr(tamanios: list[int], memoria: bool) -> list[dict]:
+    resultados = []
+    for n in tamanios:
+        salida = None
+        for nombre, data, archivo, funcion in etapas(n):
+            segundos, pico, (res, filas) = medir(lambda: funcion(NamedBytesIO(data, archivo)), memoria)
+            if nombre == "process_arca csv":
+                salida = res
+            resultados.append(_registro(nombre, n, filas, segundos, pico))
+            print(_linea(resultados[-1]), flush=True)
+            del res
+
+        segundos, pico, _ = medir(lambda: export_xlsx(salida), memoria)
+        resultados.append(_registro("export_xlsx", n, len(salida), segundos, pico))
+        print(_linea(resultados[-1]), flush=True)
+    return resultados
+
+
+def _registro(etapa: str, n: int, filas: int, segundos: float, pico: float | None) -> dict:
+    return {
+        "etapa": etapa,
+        "tamanio": n,
+        "filas": filas,
+        "segundos": round(segundos, 4),
+        "filas_por_seg": round(filas / segundos, 1) if segundos else None,
+        "pico_mb": round(pico, 2) if pico is not None else None,
+    }
+
+
+def _linea(r: dict) -> str:
+    pico = f"{r['pico_mb']:>9.1f} MB" if r["pico_mb"] is not None else " " * 12
+    return f"{r['etapa']:<20} {r['tamanio']:>9,} {r['segundos']:>9.3f} s {r['filas_por_seg']:>13,.0f} filas/s {pico}"
+
+
+def comparar(actual: list[dict], previo_path: Path) -> None:
+    previo = {(r["etapa"], r["tamanio"]): r for r in json.loads(previo_path.read_text(encoding="utf-8"))["resultados"]}
+    print(f"\nComparación contra {previo_path.name} (>1 = más lento que antes):")
+    for r in actual:
+        p = previo.get((r["etapa"], r["tamanio"]))
+        if not p or not p["segundos"]:
+            continue
+        print(f"{r['etapa']:<20} {r['tamanio']:>9,}  tiempo x{r['segundos'] / p['segundos']:.2f}", end="")
+        if r["pico_mb"] and p.get("pico_mb"):
+            print(f"  memoria x{r['pico_mb'] / p['pico_mb']:.2f}", end="")
+        print()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del conversor Emitidos -> Holistor.")
+    parser.add_argument("--tamanios", default=",".join(str(t) for t in TAMANIOS), help="Filas por entrada, separadas por coma.")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria (la corrida tarda la mitad).")
+    parser.add_argument("--salida", type=Path, default=None, help="Archivo JSON de resultados.")
+    parser.add_argument("--comparar", type=Path, default=None, help="JSON de una corrida anterior para comparar.")
+    args = parser.parse_args(argv)
+
+    tamanios = [int(t) for t in args.tamanios.split(",") if t.strip()]
+    resultados = correr(tamanios, memoria=not args.sin_memoria)
+
+    ahora = datetime.now()
+    salida = args.salida or AQUI / "resultados" / f"bench_{VERSION_PROCESO}_{ahora:%Y%m%d_%H%M%S}.json"
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps({
+        "version": VERSION_PROCESO,
+        "fecha": ahora.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nResultados en {salida}")
+
+    if args.comparar:
+        comparar(resultados, args.comparar)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,227 @@
+# benchmarks/generadores.py
+# Entradas sintéticas realistas para medir el conversor:
+#   - ARCA Emitidos CSV  (códigos numéricos, separador ";", decimales con coma)
+#   - ARCA Emitidos XLSX (tipos como texto, título en la fila 1 y encabezado en la fila 2)
+#   - Ventas Pastor Chess XLSX (columnas de percepciones y descripciones a omitir)
+# Todo se genera con numpy (vectorizado) y una semilla fija, para que las corridas sean comparables.
+
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+ARCA_COLUMNAS = [
+    "Fecha de Emisión", "Tipo de Comprobante", "Punto de Venta", "Número Desde", "Número Hasta",
+    "Cód. Autorización", "Tipo Doc. Receptor", "Nro. Doc. Receptor", "Denominación Receptor",
+    "Tipo Cambio", "Moneda",
+    "IVA 10,5%", "Imp. Neto Gravado IVA 10,5%", "IVA 21%", "Imp. Neto Gravado IVA 21%",
+    "IVA 27%", "Imp. Neto Gravado IVA 27%",
+    "Imp. Neto No Gravado", "Imp. Op. Exentas", "Otros Tributos", "Imp. Total",
+]
+
+# (código, texto del XLSX, peso relativo)
+ARCA_TIPOS = [
+    ("1", "1 - Factura A", 30),
+    ("6", "6 - Factura B", 30),
+    ("11", "11 - Factura C", 8),
+    ("3", "3 - Nota de Crédito A", 5),
+    ("8", "8 - Nota de Crédito B", 5),
+    ("2", "2 - Nota de Débito A", 2),
+    ("201", "201 - Factura de Crédito Electrónica MiPyMEs (FCE) A", 3),
+    ("203", "203 - Nota de Crédito Electrónica MiPyMEs (FCE) A", 1),
+    ("81", "81 - Tique Factura A", 2),
+    ("82", "82 - Tique Factura B", 2),
+    ("112", "112 - Tique Nota de Crédito A", 1),
+]
+
+# (código CSV, texto XLSX)
+ARCA_TIPOS_DOC = [("80", "CUIT"), ("96", "DNI"), ("86", "CUIL"), ("99", "Otro")]
+
+PASTOR_COLUMNAS = [
+    "Fecha Comprobante", "Descripcion Comprobante", "Letra", "Serie \\ Punto de venta", "Numero",
+    "Razon Social", "Tipo Id", "Identificador", "Provincia", "Tipo IVA",
+    "Subtotal Neto", "I.V.A",
+    "Percepción 3337", "Percepción 5329", "Percepción 212", "I.I.B.B(SANTA FE)", "I.I.B.B(FORMOSA)",
+    "Subtotal Final",
+]
+PASTOR_DESCRIPCIONES = [
+    ("FACTURA", 70), ("NOTA DE CREDITO", 10), ("NOTA DE DEBITO", 3),
+    ("ANTICIPO", 5), ("RECIBO", 10), ("COMODATO ACTIVOS FIJOS", 1), ("SOBRANTE DE LIQUIDACION", 1),
+]
+
+
+def _elegir(rng, opciones, n):
+    valores = [o[:-1] if len(o) > 2 else o[0] for o in opciones]
+    pesos = np.array([o[-1] for o in opciones], dtype=float)
+    idx = rng.choice(len(opciones), size=n, p=pesos / pesos.sum())
+    return idx, valores
+
+
+def _importes(rng, n, prob, hasta):
+    v = np.round(rng.uniform(1, hasta, n), 2)
+    return np.where(rng.random(n) < prob, v, 0.0)
+
+
+def arca_frame(n: int, seed: int = 0, texto: bool = False) -> pd.DataFrame:
+    """
+    Filas ARCA Emitidos. texto=False: códigos numéricos y números como en el CSV;
+    texto=True: tipos/documentos como texto y fechas como fecha, como en el XLSX.
+    """
+    rng = np.random.default_rng(seed)
+
+    idx_tipo, tipos = _elegir(rng, ARCA_TIPOS, n)
+    codigos = np.array([t[0] for t in tipos], dtype=object)[idx_tipo]
+    textos = np.array([t[1] for t in tipos], dtype=object)[idx_tipo]
+
+    fechas = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, n), unit="D")
+    pv = rng.integers(1, 6, n)
+    numero = np.arange(1, n + 1)
+
+    idx_doc = rng.integers(0, len(ARCA_TIPOS_DOC), n)
+    tdoc = np.array([d[1] if texto else d[0] for d in ARCA_TIPOS_DOC], dtype=object)[idx_doc]
+    cuits = np.array(["20123456786", "30712345671", "27-11222333-4", "23111222339"], dtype=object)
+    dnis = np.array(["12345678", "30111222", "5444333"], dtype=object)
+    nro_doc = np.where(idx_doc == 0, cuits[rng.integers(0, len(cuits), n)], dnis[rng.integers(0, len(dnis), n)])
+
+    nombres = np.array(["ACME SA", "Pérez Juan", "Distribuidora Norte SRL", "Consumidor Final", ""], dtype=object)
+    usd = rng.random(n) < 0.03
+    moneda = np.where(usd, "USD", "PES")
+    tc = np.where(usd, np.where(rng.random(n) < 0.2, 0.0, np.round(rng.uniform(800, 1200, n), 2)), 1.0)
+
+    neto_21 = _importes(rng, n, 0.75, 80000)
+    neto_105 = _importes(rng, n, 0.15, 30000)
+    neto_27 = _importes(rng, n, 0.05, 20000)
+    iva_21 = np.round(neto_21 * 0.21, 2)
+    iva_105 = np.round(neto_105 * 0.105, 2)
+    iva_27 = np.round(neto_27 * 0.27, 2)
+    ng = _importes(rng, n, 0.08, 5000)
+    ex = _importes(rng, n, 0.08, 5000)
+    otros = _importes(rng, n, 0.10, 2000)
+    total = np.round(neto_21 + iva_21 + neto_105 + iva_105 + neto_27 + iva_27 + ng + ex + otros, 2)
+    # comprobantes sin IVA discriminado (sólo Imp. Total)
+    solo_total = (neto_21 + neto_105 + neto_27 + ng + ex + otros) == 0
+    total = np.where(solo_total, np.round(rng.uniform(100, 50000, n), 2), total)
+
+    return pd.DataFrame({
+        "Fecha de Emisión": fechas if texto else fechas.strftime("%Y-%m-%d"),
+        "Tipo de Comprobante": textos if texto else codigos,
+        "Punto de Venta": pv,
+        "Número Desde": numero,
+        "Número Hasta": numero,
+        "Cód. Autorización": np.full(n, "74123456789012", dtype=object),
+        "Tipo Doc. Receptor": tdoc,
+        "Nro. Doc. Receptor": nro_doc,
+        "Denominación Receptor": nombres[rng.integers(0, len(nombres), n)],
+        "Tipo Cambio": tc,
+        "Moneda": moneda,
+        "IVA 10,5%": iva_105,
+        "Imp. Neto Gravado IVA 10,5%": neto_105,
+        "IVA 21%": iva_21,
+        "Imp. Neto Gravado IVA 21%": neto_21,
+        "IVA 27%": iva_27,
+        "Imp. Neto Gravado IVA 27%": neto_27,
+        "Imp. Neto No Gravado": ng,
+        "Imp. Op. Exentas": ex,
+        "Otros Tributos": otros,
+        "Imp. Total": total,
+    })[ARCA_COLUMNAS]
+
+
+ARCA_TITULO = "Mis Comprobantes Emitidos - CUIT 20123456786"
+
+
+def arca_bytes(df: pd.DataFrame, xlsx: bool = False) -> bytes:
+    """
+    Archivo ARCA Emitidos a partir de un arca_frame (texto=True para el XLSX): CSV como lo
+    descarga ARCA, o XLSX con el título que trae el CUIT emisor.
+    """
+    if xlsx:
+        return _xlsx(df, ARCA_TITULO)
+    return df.to_csv(sep=";", decimal=",", float_format="%.2f", index=False).encode("utf-8")
+
+
+def arca_csv(n: int, seed: int = 0) -> bytes:
+    return arca_bytes(arca_frame(n, seed, texto=False))
+
+
+def _xlsx(df: pd.DataFrame, titulo: str | None = None) -> bytes:
+    buffer = BytesIO()
+    wb = xlsxwriter.Workbook(buffer, {"constant_memory": True})
+    ws = wb.add_worksheet("Hoja1")
+    fila = 0
+    if titulo:
+        ws.write_string(0, 0, titulo)
+        fila = 1
+    date_fmt = wb.add_format({"num_format": "dd/mm/yyyy"})
+    ws.write_row(fila, 0, list(df.columns))
+
+    columnas = []
+    for nombre in df.columns:
+        col = df[nombre]
+        if pd.api.types.is_datetime64_any_dtype(col):
+            columnas.append(col.dt.to_pydatetime().tolist())
+        else:
+            columnas.append(col.tolist())
+    for r, valores in enumerate(zip(*columnas), start=fila + 1):
+        for c, v in enumerate(valores):
+            if v is None or v == "" or (isinstance(v, float) and v != v):
+                continue
+            if hasattr(v, "year"):
+                ws.write_datetime(r, c, v, date_fmt)
+            else:
+                ws.write(r, c, v)
+    wb.close()
+    return buffer.getvalue()
+
+
+def arca_xlsx(n: int, seed: int = 0) -> bytes:
+    return arca_bytes(arca_frame(n, seed, texto=True), xlsx=True)
+
+
+def pastor_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    idx_desc, descs = _elegir(rng, PASTOR_DESCRIPCIONES, n)
+    desc = np.array(descs, dtype=object)[idx_desc]
+
+    neto = _importes(rng, n, 0.95, 50000)
+    iva = np.round(neto * 0.21, 2)
+    # algunos IVA fuera de tolerancia para ejercitar las advertencias
+    iva = np.where(rng.random(n) < 0.02, iva + 0.05, iva)
+    percs = {
+        "Percepción 3337": _importes(rng, n, 0.20, 1500),
+        "Percepción 5329": _importes(rng, n, 0.05, 800),
+        "Percepción 212": _importes(rng, n, 0.15, 1000),
+        "I.I.B.B(SANTA FE)": _importes(rng, n, 0.25, 1200),
+        "I.I.B.B(FORMOSA)": _importes(rng, n, 0.02, 600),
+    }
+    total = np.round(neto + iva + sum(percs.values()), 2)
+
+    # el identificador sale junto con su tipo (80 = CUIT, 96 = DNI), como en arca_frame
+    es_cuit = rng.random(n) < 2 / 3
+    cuits = np.array(["20-12345678-6", "30712345671"], dtype=object)
+    dnis = np.array(["12345678", "30111222"], dtype=object)
+    id_receptor = np.where(es_cuit, cuits[rng.integers(0, len(cuits), n)], dnis[rng.integers(0, len(dnis), n)])
+
+    df = pd.DataFrame({
+        "Fecha Comprobante": pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 31, n), unit="D"),
+        "Descripcion Comprobante": desc,
+        "Letra": np.array(["A", "B"], dtype=object)[rng.integers(0, 2, n)],
+        "Serie \\ Punto de venta": rng.integers(1, 4, n),
+        "Numero": np.arange(1, n + 1),
+        "Razon Social": np.char.add("Cliente ", rng.integers(1, 500, n).astype(str)).astype(object),
+        "Tipo Id": np.where(es_cuit, 80, 96).astype(object),
+        "Identificador": id_receptor,
+        "Provincia": np.array(["Santa Fe", "Córdoba", "Formosa"], dtype=object)[rng.integers(0, 3, n)],
+        "Tipo IVA": np.array(["RI", "MT", "CF", "EX"], dtype=object)[rng.integers(0, 4, n)],
+        "Subtotal Neto": neto,
+        "I.V.A": iva,
+        **percs,
+        "Subtotal Final": total,
+    })
+    return df[PASTOR_COLUMNAS]
+
+
+def pastor_xlsx(n: int, seed: int = 0) -> bytes:
+    return _xlsx(pastor_frame(n, seed))
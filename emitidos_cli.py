@@ -0,0 +1,164 @@
+# emitidos_cli.py
+# Conversión por lotes sin navegador: todos los ARCA Emitidos / Ventas Pastor Chess
+# de un directorio -> Formato Holistor, en paralelo (un archivo por proceso).
+# AIE San Justo
+#
+# Uso:
+#   python emitidos_cli.py ENTRADA [-o SALIDA] [--fuente auto|arca|pastor] [--workers N]
+#                          [--rendimiento ARCHIVO.json [--medir-memoria]]
+#                          [--registro REGISTRO.sqlite [--cuit-emisor CUIT]]
+#                          [--snapshots DIR | --sin-snapshots] [--cotizaciones TABLA.csv]
+#                          [--padron PADRON.csv] [--formato xlsx|csv|txt] [--separar periodo,suc]
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from emitidos_core import (
+    COTIZACIONES_PATH, PADRON_PATH, PARTICIONES, SNAPSHOTS_DIR, RegistroComprobantes, Rendimiento, SinComprobantesNuevos, SinCuitEmisor, Snapshots, convert, detectar_cuit_emisor,
+    detectar_fuente, digits_only, export_advertencias, export_txt, export_xlsx, export_zip,
+)
+
+EXTENSIONES = {
+    "auto": (".xlsx", ".csv"),  # se reconoce cada archivo por sus encabezados
+    "arca": (".xlsx", ".csv"),
+    "pastor": (".xlsx",),
+}
+
+
+def find_inputs(entrada: Path, fuente: str) -> list[Path]:
+    if entrada.is_file():
+        return [entrada]
+    return sorted(
+        p for p in entrada.iterdir()
+        if p.is_file() and p.suffix.lower() in EXTENSIONES[fuente] and not p.name.startswith("~$")
+    )
+
+
+def convert_one(path: str, fuente: str, out_dir: str, memoria: bool = False, registro: str | None = None,
+                cuit_emisor: str | None = None, snapshots: str | None = None,
+                cotizaciones: str | None = None, padron: str | None = None,
+                formato: str = "xlsx", separar: tuple[str, ...] = ()) -> tuple[str, int, dict[str, int], list[dict]]:
+    """
+    Convierte un archivo y escribe <nombre>_holistor.<formato> (y <nombre>_advertencias.xlsx
+    si hubo advertencias) en out_dir. Corre dentro de un proceso del pool.
+    Con `separar` escribe <nombre>_holistor.zip con un archivo por parte (ver export_zip).
+    Con `registro` sólo convierte los comprobantes nuevos y, una vez exportados, los registra.
+    Devuelve las advertencias por categoría y los registros de rendimiento por etapa.
+    """
+    src = Path(path)
+    perf = Rendimiento(memoria)
+    reg = None
+    try:
+        with open(src, "rb") as f:
+            if fuente == "auto":
+                fuente = detectar_fuente(f).fuente
+            if registro and fuente == "arca":
+                reg = RegistroComprobantes(registro)
+            if reg is not None and cuit_emisor is None:
+                cuit_emisor = detectar_cuit_emisor(f)
+            if reg is not None and not digits_only(cuit_emisor):
+                raise SinCuitEmisor(f"no se encontró el CUIT emisor en {src.name}: indicalo con --cuit-emisor.")
+            salida, warnings = convert(
+                f, fuente, perf, reg, cuit_emisor, Snapshots(snapshots) if snapshots else None, cotizaciones, padron,
+            )
+
+        destino = Path(out_dir) / f"{src.stem}_holistor.{formato}"
+        if separar:
+            # ya hay un proceso por archivo: las partes se escriben en este mismo
+            destino = destino.with_suffix(".zip")
+            export_zip(salida, separar, str(destino), perf, formato, f"{src.stem}_holistor", workers=1)
+        elif formato == "xlsx":
+            export_xlsx(salida, str(destino), perf)
+        else:
+            export_txt(salida, str(destino), perf, formato)
+        if warnings:
+            export_advertencias(warnings, str(Path(out_dir) / f"{src.stem}_advertencias.xlsx"))
+        if reg is not None:
+            reg.registrar_salida(salida, cuit_emisor, src.name)
+    finally:
+        if reg is not None:
+            reg.close()
+    return str(destino), len(salida), warnings.resumen(), perf.registros()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Convierte ARCA Emitidos / Ventas Pastor Chess a formato Holistor.")
+    parser.add_argument("entrada", type=Path, help="Archivo o directorio con los archivos a convertir.")
+    parser.add_argument("-o", "--salida", type=Path, default=None, help="Directorio de salida (por defecto: ENTRADA/holistor).")
+    parser.add_argument("--fuente", choices=sorted(EXTENSIONES), default="auto",
+                        help="Tipo de archivo de entrada (auto: se reconoce por los encabezados).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo.")
+    parser.add_argument("--rendimiento", type=Path, default=None, help="Escribe en este JSON tiempos/filas por etapa de cada archivo.")
+    parser.add_argument("--medir-memoria", action="store_true", help="Incluye el pico de memoria por etapa (más lento).")
+    parser.add_argument("--registro", type=Path, default=None,
+                        help="Registro SQLite de comprobantes ya convertidos (sólo ARCA): omite los repetidos y registra los nuevos.")
+    parser.add_argument("--cuit-emisor", default=None, help="CUIT emisor para el registro (por defecto: el del nombre/título del archivo).")
+    parser.add_argument("--snapshots", type=Path, default=SNAPSHOTS_DIR,
+                        help="Directorio de snapshots de lectura: un XLSX ya leído no se vuelve a leer.")
+    parser.add_argument("--sin-snapshots", action="store_true", help="No usar ni guardar snapshots de lectura.")
+    parser.add_argument("--cotizaciones", type=Path, default=COTIZACIONES_PATH,
+                        help="Tabla fecha -> cotización BNA vendedor para las filas en USD sin Tipo de cambio (si existe).")
+    parser.add_argument("--padron", type=Path, default=PADRON_PATH,
+                        help="Padrón CSV (CUIT, Domicilio, C.P., Pcia, condición IVA) para completar los receptores (si existe).")
+    parser.add_argument("--formato", choices=["xlsx", "csv", "txt"], default="xlsx",
+                        help="Salida Holistor: Excel, texto separado por ; (csv) o por tabulaciones (txt).")
+    parser.add_argument("--separar", type=lambda v: tuple(p for p in v.split(",") if p), default=(),
+                        help=f"Un archivo por parte dentro de un ZIP: {','.join(PARTICIONES)} (separados por coma).")
+    args = parser.parse_args(argv)
+    if set(args.separar) - set(PARTICIONES):
+        parser.error(f"--separar: opciones válidas {', '.join(PARTICIONES)}")
+
+    archivos = find_inputs(args.entrada, args.fuente)
+    if not archivos:
+        print(f"No hay archivos {', '.join(EXTENSIONES[args.fuente])} en {args.entrada}", file=sys.stderr)
+        return 1
+
+    base = args.entrada if args.entrada.is_dir() else args.entrada.parent
+    out_dir = args.salida or (base / "holistor")
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    errores = 0
+    rendimiento: dict[str, list[dict]] = {}
+    # el registro sólo se aplica a los archivos ARCA (ver convert)
+    registro = str(args.registro) if args.registro and args.fuente != "pastor" else None
+    snapshots = None if args.sin_snapshots else str(args.snapshots)
+    # con registro, de a un archivo y en orden: cada uno ve lo que registraron los anteriores
+    workers = 1 if registro else max(1, min(args.workers, len(archivos)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {
+            pool.submit(
+                convert_one, str(p), args.fuente, str(out_dir), args.medir_memoria, registro, args.cuit_emisor,
+                snapshots, str(args.cotizaciones), str(args.padron), args.formato, args.separar,
+            ): p
+            for p in archivos
+        }
+        for fut in as_completed(futuros):
+            p = futuros[fut]
+            try:
+                destino, lineas, resumen, etapas = fut.result()
+            except SinComprobantesNuevos:
+                print(f"--    {p.name}: sin comprobantes nuevos")
+                continue
+            except Exception as e:
+                errores += 1
+                print(f"ERROR {p.name}: {e}", file=sys.stderr)
+                continue
+            print(f"OK    {p.name}: {lineas} líneas, {sum(resumen.values())} advertencias -> {destino}")
+            for categoria, cantidad in resumen.items():
+                print(f"        {categoria}: {cantidad}")
+            rendimiento[p.name] = etapas
+
+    print(f"{len(archivos) - errores}/{len(archivos)} archivos convertidos en {out_dir}")
+    if args.rendimiento:
+        args.rendimiento.write_text(json.dumps(
+            {nombre: rendimiento[nombre] for nombre in sorted(rendimiento)}, indent=2, ensure_ascii=False,
+        ), encoding="utf-8")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
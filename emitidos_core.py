@@ -0,0 +1,3493 @@
+# emitidos_core.py
+# Conversión ARCA Emitidos (XLSX o CSV) + Ventas Pastor Chess (XLSX) -> Formato Holistor (HWVta1modelo)
+# Sin dependencias de Streamlit: lo usan la app (ia_arca_emitidos.py) y la línea de comandos (emitidos_cli.py).
+# AIE San Justo
+
+import pandas as pd
+import numpy as np
+import openpyxl
+import xlsxwriter
+from io import BytesIO
+import codecs
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import queue
+import re
+import signal
+import sqlite3
+import sys
+import threading
+import time
+import tracemalloc
+import types
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from functools import lru_cache, partial
+from itertools import islice, repeat
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # opcional: sin pyarrow no hay snapshots de lectura
+    pa = None
+
+try:
+    import resource
+except ImportError:  # opcional: fuera de Unix no hay límite de memoria por proceso
+    resource = None
+
+# Versión de la lógica de conversión/exportación (invalida resultados cacheados al cambiar)
+VERSION_PROCESO = "2026.10-4"
+
+# ---------------- Matriz interna (ARCA CSV) ----------------
+# Respaldo de TABLAARCA.xlsx (ver load_tabla_arca): los tiques sólo están acá.
+TIPOS_COMP = {
+    "1": ("F", "A"),
+    "2": ("ND", "A"),
+    "3": ("NC", "A"),
+    "4": ("R", "A"),
+    "6": ("F", "B"),
+    "7": ("ND", "B"),
+    "8": ("NC", "B"),
+    "9": ("R", "B"),
+    "11": ("F", "C"),
+    "12": ("ND", "C"),
+    "13": ("NC", "C"),
+    "15": ("R", "C"),
+    "51": ("F", "M"),
+    "52": ("ND", "M"),
+    "53": ("NC", "M"),
+    "54": ("R", "M"),
+
+    # Tickets
+    "81": ("T", "A"),   # TIQUE FACTURA A
+    "82": ("T", "B"),   # TIQUE FACTURA B
+    "83": ("T", "C"),   # TIQUE
+    "112": ("TC", "A"), # TIQUE NOTA DE CREDITO A
+    "113": ("TC", "B"), # TIQUE NOTA DE CREDITO B
+    "114": ("TC", "C"), # TIQUE NOTA DE CREDITO C
+    "115": ("T", "A"),  # TIQUE NOTA DE DEBITO A
+    "116": ("T", "B"),  # TIQUE NOTA DE DEBITO B
+    "117": ("T", "C"),  # TIQUE NOTA DE DEBITO C
+
+    # FCE / MiPyME
+    "201": ("FP", "A"),
+    "202": ("NP", "A"),
+    "203": ("PC", "A"),
+    "206": ("FP", "B"),
+    "207": ("NP", "B"),
+    "208": ("PC", "B"),
+    "211": ("FP", "C"),
+    "212": ("NP", "C"),
+    "213": ("PC", "C"),
+}
+CREDITOS_ARCA = {"NC", "PC", "TC"}  # crédito => negativo
+ARCA_TOTAL_CENTAVOS = 1  # diferencia admitida entre Imp. Total y la suma de importes
+
+# Tabla de códigos ARCA (se carga una vez, ver load_tabla_arca)
+HERE = Path(__file__).parent
+TABLA_ARCA_PATH = HERE / "assets" / "TABLAARCA.xlsx"
+# Lo que la tabla trae distinto de lo que usa Holistor: los recibos son "R" (no "RC")
+# y el 208 es la nota de crédito FCE B (la tabla dice "FP").
+TABLA_ARCA_CPBTE = {"RC": "R"}
+TABLA_ARCA_CODIGOS = {"208": ("PC", "B")}
+# Cotizaciones BNA (opcional, ver load_cotizaciones)
+COTIZACIONES_PATH = HERE / "assets" / "cotizaciones_usd.csv"
+# Padrón de receptores (opcional, ver Padron) y su índice SQLite
+PADRON_PATH = HERE / "assets" / "padron.csv"
+PADRON_DB = HERE / ".cache" / "padron.sqlite"
+
+# ---------------- Salida Holistor ----------------
+COLS_SALIDA = [
+    "Fecha dd/mm/aaaa", "Cpbte", "Tipo", "Suc.", "Número",
+    "Razón Social o Denominación Cliente", "Tipo Doc.", "CUIT",
+    "Domicilio", "C.P.", "Pcia", "Cond Fisc",
+    # >>> antes de la columna M (Cód. Neto)
+    "Moneda", "Tipo de cambio",
+    # <<<
+    "Cód. Neto", "Neto Gravado", "Alíc.",
+    "IVA Liquidado", "IVA Débito",
+    "Cód. NG/EX", "Conceptos NG/EX",
+    "Cód. P/R", "Perc./Ret.", "Pcia P/R",
+    "Total",
+]
+
+# ---------------- Rendimiento ----------------
+@dataclass
+class Etapa:
+    nombre: str
+    segundos: float = 0.0
+    filas_in: int = 0
+    filas_out: int = 0
+    pico_mb: float | None = None
+    veces: int = 0
+
+
+class Rendimiento:
+    """
+    Tiempos, filas y (opcional) pico de memoria por etapa de la conversión.
+    Las etapas con el mismo nombre se acumulan (p. ej. los bloques de un CSV).
+    memoria=True usa tracemalloc: más preciso para buscar culpables, pero más lento.
+    `aviso(nombre, filas, terminada)` (opcional) se llama al empezar y al terminar cada
+    etapa; si levanta Cancelado, la conversión se corta ahí.
+    """
+    def __init__(self, memoria: bool = False, aviso=None):
+        self.memoria = memoria
+        self.aviso = aviso
+        self.etapas: dict[str, Etapa] = {}
+
+    @contextmanager
+    def etapa(self, nombre: str, filas_in: int = 0):
+        if self.aviso is not None:
+            self.aviso(nombre, filas_in, False)
+        actual = Etapa(nombre, filas_in=filas_in, filas_out=filas_in)
+        propio = False
+        if self.memoria:
+            propio = not tracemalloc.is_tracing()
+            if propio:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        try:
+            yield actual
+        finally:
+            actual.segundos = time.perf_counter() - t0
+            if self.memoria:
+                actual.pico_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                if propio:
+                    tracemalloc.stop()
+            self._sumar(actual)
+        if self.aviso is not None:
+            self.aviso(nombre, actual.filas_out, True)
+
+    def avanzar(self, nombre: str, filas: int):
+        """
+        Avance dentro de una etapa larga (p. ej. filas leídas de un XLSX).
+        """
+        if self.aviso is not None:
+            self.aviso(nombre, filas, False)
+
+    def _sumar(self, e: Etapa, veces: int = 1):
+        acum = self.etapas.setdefault(e.nombre, Etapa(e.nombre))
+        acum.segundos += e.segundos
+        acum.filas_in += e.filas_in
+        acum.filas_out += e.filas_out
+        if e.pico_mb is not None:
+            acum.pico_mb = max(acum.pico_mb or 0.0, e.pico_mb)
+        acum.veces += veces
+
+    def agregar(self, registros: list[dict]):
+        """
+        Suma los registros() de otra medición (p. ej. la de un proceso del pool).
+        """
+        for r in registros:
+            self._sumar(Etapa(**r), veces=r["veces"])
+
+    def registros(self) -> list[dict]:
+        return [asdict(e) for e in self.etapas.values()]
+
+
+# ---------------- Avance / cancelación ----------------
+# Orden habitual de las etapas de un archivo (para estimar el avance dentro de él).
+ETAPAS_ORDEN = (
+    "detección", "lectura (snapshot)", "lectura", "snapshot guardado", "registro",
+    "tipos de comprobante", "importes", "controles", "alícuotas", "percepciones / líneas",
+    "receptor", "fechas", "armado salida", "conversión (filas)", "unión bloques", "padrón",
+)
+
+
+class Cancelado(Exception):
+    """
+    La conversión se canceló a pedido del usuario.
+    """
+
+
+# Los procesos no se crean con fork: el servidor de la app tiene hilos y un fork puede
+# dejar locks tomados en el hijo. forkserver (spawn donde no existe) arranca cada proceso
+# desde un servidor limpio que ya importó este módulo.
+_CONTEXTO = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+if _CONTEXTO.get_start_method() == "forkserver":
+    _CONTEXTO.set_forkserver_preload(["emitidos_core"])
+
+
+_MAIN_LOCK = threading.RLock()
+
+
+@contextmanager
+def _sin_script_main():
+    # Streamlit instala el script de la app como __main__ (con __file__) y un proceso nuevo
+    # lo volvería a ejecutar entero. Mientras se arrancan procesos se muestra un __main__
+    # vacío: lo que se les manda es siempre de este módulo. Lo usan los hilos de varias
+    # sesiones: con el lock, ninguno guarda el __main__ vacío de otro como el original.
+    with _MAIN_LOCK:
+        main = sys.modules.get("__main__")
+        sys.modules["__main__"] = types.ModuleType("__main__")
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main
+
+
+class _Ejecutor(ProcessPoolExecutor):
+    """
+    ProcessPoolExecutor con procesos de _CONTEXTO (se arrancan en el primer submit).
+    """
+    def __init__(self, max_workers: int | None = None, **kwargs):
+        super().__init__(max_workers, mp_context=_CONTEXTO, **kwargs)
+
+    def submit(self, fn, /, *args, **kwargs):
+        with _sin_script_main():
+            return super().submit(fn, *args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _manager():
+    # un solo proceso servidor por intérprete para las colas/eventos de avance
+    with _sin_script_main():
+        return _CONTEXTO.Manager()
+
+
+class _AvisoEtapa:
+    """
+    Rendimiento.aviso de un archivo: manda cada etapa a la cola y corta si se canceló.
+    Se pasa a los procesos del pool (la cola, el evento y el dict de procesos son proxies
+    del Manager).
+    """
+    def __init__(self, i: int, cola, cancelar, procesos):
+        self.i = i
+        self.cola = cola
+        self.cancelar = cancelar
+        self.procesos = procesos
+
+    def empezar(self):
+        # qué proceso del pool convierte el archivo (para poder cortarlo, ver PoolConversiones.cortar)
+        self.procesos[self.i] = os.getpid()
+
+    def soltar(self):
+        self.procesos.pop(self.i, None)
+
+    def __call__(self, nombre: str, filas: int, terminada: bool):
+        if self.cancelar.is_set():
+            raise Cancelado("Conversión cancelada.")
+        self.cola.put((self.i, nombre, filas, terminada))
+
+
+class Avance:
+    """
+    Avance de convert_batch por archivo y etapa, para mirarlo desde otro hilo.
+    cancelar() hace que cada archivo se corte en su próxima etapa.
+    """
+    def __init__(self, archivos: list[str]):
+        self.archivos = archivos
+        self._cola = _manager().Queue()
+        self._cancelar = _manager().Event()
+        self._procesos = _manager().dict()
+        self._fraccion = [0.0] * len(archivos)
+        self._detalle = [""] * len(archivos)
+        self.en_fila = 0  # conversiones que esperan turno antes que esta (ver PoolConversiones)
+
+    def aviso(self, i: int) -> _AvisoEtapa:
+        return _AvisoEtapa(i, self._cola, self._cancelar, self._procesos)
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelar.is_set()
+
+    def procesos(self, indices) -> list[int]:
+        """
+        Procesos del pool que están convirtiendo los archivos `indices`.
+        """
+        procesos = self._procesos.copy()
+        return [procesos[i] for i in indices if i in procesos]
+
+    def terminar(self, i: int):
+        self._fraccion[i] = 1.0
+        self._detalle[i] = "listo"
+
+    def progreso(self) -> tuple[float, str]:
+        """
+        (fracción 0..1 del total, texto de los archivos en curso).
+        """
+        if self.en_fila:
+            return 0.0, f"En espera: {self.en_fila} conversión(es) antes que esta."
+        while True:
+            try:
+                i, nombre, filas, terminada = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if self._fraccion[i] >= 1.0:
+                continue
+            pos = ETAPAS_ORDEN.index(nombre) + terminada if nombre in ETAPAS_ORDEN else 0
+            self._fraccion[i] = max(self._fraccion[i], min(pos / len(ETAPAS_ORDEN), 0.99))
+            self._detalle[i] = f"{nombre} ({filas:,} filas)" if filas else nombre
+        fraccion = sum(self._fraccion) / max(len(self.archivos), 1)
+        en_curso = [f"{a}: {d}" for a, f, d in zip(self.archivos, self._fraccion, self._detalle) if d and f < 1.0]
+        return fraccion, " · ".join(en_curso)
+
+
+# ---------------- Advertencias ----------------
+# código -> (categoría, plantilla del mensaje). La plantilla recibe {fila} (fila del
+# archivo de origen) y los valores guardados con la advertencia.
+ADVERTENCIAS = {
+    "usd_sin_tc": (
+        "Moneda=USD sin Tipo de cambio",
+        "Fila {fila}: Moneda=USD sin Tipo de cambio (Cpbte={cpbte}). Se deja sin conversión.",
+    ),
+    "usd_tc_tabla": (
+        "Moneda=USD con Tipo de cambio de la tabla",
+        "Fila {fila}: Moneda=USD sin Tipo de cambio (Cpbte={cpbte}). Se usó {tc:,.4f} del {fecha_tc} (tabla de cotizaciones).",
+    ),
+    "iva_21": (
+        "IVA no cuadra con 21%",
+        "Fila {fila}: IVA no cuadra con 21% (Neto={neto:,.2f} / IVA={iva:,.2f} / Esperado≈{esperado:,.2f}).",
+    ),
+    "total": (
+        "Total origen distinto del calculado",
+        "Fila {fila}: Total origen ({total_origen:,.2f}) != Total calculado ({total_calc:,.2f}).",
+    ),
+    "duplicado_registro": (
+        "Comprobante ya registrado",
+        "Fila {fila}: {cpbte} {letra} {suc}-{numero} ya fue convertido antes (registro). Se omite.",
+    ),
+    "duplicado_archivo": (
+        "Comprobante repetido en el archivo",
+        "Fila {fila}: {cpbte} {letra} {suc}-{numero} repetido en el mismo archivo. Se omite.",
+    ),
+    "duplicado_lote": (
+        "Comprobante repetido en otro archivo",
+        "{cpbte} {letra} {suc}-{numero} ya viene en otro archivo de la carga. Se omite.",
+    ),
+    "documento": (
+        "CUIT/DNI inválido",
+        "Fila {fila}: documento {documento} (Tipo Doc. {tipo_doc}) inválido: {detalle}.",
+    ),
+    "sin_nuevos": ("Archivo sin comprobantes nuevos", "{detalle}"),
+    "error": ("Archivo con error", "ERROR: {detalle}"),
+}
+ADVERTENCIAS_MUESTRA = 50
+XLSX_MAX_FILAS = 1_048_575  # filas de datos que entran en una hoja (más el encabezado)
+
+
+class Advertencias:
+    """
+    Advertencias en bloques compactos: por cada control, el código, las filas afectadas
+    y los valores de esas filas como arrays. Los mensajes se arman recién al leerlos,
+    así un problema sistemático en un archivo grande no genera miles de strings.
+    """
+    def __init__(self):
+        self._bloques: list[tuple[str, str, np.ndarray, dict[str, np.ndarray]]] = []  # (archivo, código, filas, valores)
+        self.conteo: dict[str, int] = {}
+
+    def agregar(self, codigo: str, filas, archivo: str = "", **valores):
+        filas = np.asarray(filas, dtype=np.int64).reshape(-1)
+        if not len(filas):
+            return
+        valores = {k: np.asarray(v).reshape(-1) for k, v in valores.items()}
+        self._bloques.append((archivo, codigo, filas, valores))
+        self.conteo[codigo] = self.conteo.get(codigo, 0) + len(filas)
+
+    def agregar_mascara(self, codigo: str, mascara: np.ndarray, filas: np.ndarray, **valores):
+        """
+        Control vectorizado: registra las posiciones donde `mascara` es True.
+        `filas` y cada valor son columnas completas alineadas con la máscara.
+        """
+        idx = np.flatnonzero(mascara)
+        if len(idx):
+            self.agregar(codigo, filas[idx], **{k: np.asarray(v)[idx] for k, v in valores.items()})
+
+    def extender(self, otras: "Advertencias", archivo: str = ""):
+        """
+        Suma las advertencias de otra conversión; `archivo` identifica su origen.
+        """
+        for arch, codigo, filas, valores in otras._bloques:
+            self._bloques.append((arch or archivo, codigo, filas, valores))
+            self.conteo[codigo] = self.conteo.get(codigo, 0) + len(filas)
+
+    def __len__(self) -> int:
+        return sum(self.conteo.values())
+
+    def __iter__(self):
+        """
+        Mensajes de texto, armados a demanda (errores de archivo primero).
+        """
+        bloques = sorted(self._bloques, key=lambda b: b[1] != "error")
+        for archivo, codigo, filas, valores in bloques:
+            plantilla = ADVERTENCIAS[codigo][1]
+            prefijo = f"[{archivo}] " if archivo else ""
+            for i in range(len(filas)):
+                yield prefijo + plantilla.format(fila=filas[i], **{k: v[i] for k, v in valores.items()})
+
+    def muestra(self, limite: int = ADVERTENCIAS_MUESTRA) -> list[str]:
+        return list(islice(self, limite))
+
+    def resumen(self) -> dict[str, int]:
+        """
+        Cantidad de filas afectadas por categoría.
+        """
+        return {ADVERTENCIAS[c][0]: n for c, n in self.conteo.items()}
+
+    def tabla(self) -> pd.DataFrame:
+        """
+        Una fila por advertencia: archivo, fila de origen, categoría y los valores del control.
+        """
+        partes = []
+        for archivo, codigo, filas, valores in self._bloques:
+            partes.append(pd.DataFrame({
+                "Archivo": archivo,
+                "Fila": pd.array(filas, dtype="Int64"),
+                "Advertencia": ADVERTENCIAS[codigo][0],
+                **valores,
+            }))
+        if not partes:
+            return pd.DataFrame(columns=["Archivo", "Fila", "Advertencia"])
+        tabla = pd.concat(partes, ignore_index=True)
+        tabla["Fila"] = tabla["Fila"].where(tabla["Fila"] > 0)  # errores de archivo: sin fila
+        if not tabla["Archivo"].astype(bool).any():
+            tabla = tabla.drop(columns="Archivo")
+        return tabla.rename(columns={
+            "cpbte": "Cpbte", "letra": "Tipo", "suc": "Suc.", "numero": "Número", "neto": "Neto", "iva": "IVA", "esperado": "IVA esperado",
+            "total_origen": "Total origen", "total_calc": "Total calculado", "tc": "Tipo de cambio",
+            "fecha_tc": "Fecha cotización", "tipo_doc": "Tipo Doc.", "documento": "Documento", "detalle": "Detalle",
+        })
+
+
+def filas_origen(df: pd.DataFrame) -> np.ndarray:
+    """
+    Número de fila en el archivo de origen de cada fila de `df` (para las advertencias).
+    Los lectores dejan como índice la posición de la fila entre los datos (RangeIndex que
+    sigue de un bloque CSV al otro); se usa el índice y no la posición en `df` porque el
+    filtro del registro saca filas antes de las advertencias.
+    """
+    return df.index.to_numpy() + df.attrs.get("fila_datos", 2)
+
+
+# ---------------- Registro de comprobantes ----------------
+# Registro local (SQLite) de comprobantes ya convertidos, para no volver a pasar a
+# Holistor los que vienen repetidos en descargas superpuestas de ARCA.
+CLAVE_COMPROBANTE = ["cuit_emisor", "cpbte", "letra", "suc", "numero"]
+
+
+class SinComprobantesNuevos(ValueError):
+    """
+    Todos los comprobantes del archivo ya estaban registrados (no es un error de formato).
+    """
+
+
+class SinCuitEmisor(ValueError):
+    """
+    Se pidió usar el registro sin CUIT emisor: los comprobantes de clientes distintos
+    quedarían bajo la misma clave.
+    """
+
+
+def exigir_cuit_emisor(cuit_emisor: str | None) -> str:
+    cuit = digits_only(cuit_emisor)
+    if not cuit:
+        raise SinCuitEmisor(
+            "No se encontró el CUIT emisor (ni en el nombre ni en el título del archivo): "
+            "indicalo para usar el registro de comprobantes."
+        )
+    return cuit
+
+
+class RegistroComprobantes:
+    """
+    Comprobantes ya convertidos, por CUIT emisor + Cpbte + Tipo (letra) + Suc. + Número.
+    Consultar no modifica el registro: se registra explícitamente lo que se exportó
+    (registrar_salida), así una conversión de prueba no "consume" comprobantes.
+    Las líneas sin Cpbte (tipo de comprobante desconocido) no se registran.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self._con = sqlite3.connect(self.path, timeout=30)
+        with self._con:
+            self._con.execute(
+                "CREATE TABLE IF NOT EXISTS comprobantes ("
+                " cuit_emisor TEXT NOT NULL, cpbte TEXT NOT NULL, letra TEXT NOT NULL,"
+                " suc INTEGER NOT NULL, numero INTEGER NOT NULL,"
+                " fecha TEXT, archivo TEXT, registrado TEXT NOT NULL,"
+                " PRIMARY KEY (cuit_emisor, cpbte, letra, suc, numero)) WITHOUT ROWID"
+            )
+        self._con.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS consulta ("
+            " pos INTEGER, cuit_emisor TEXT, cpbte TEXT, letra TEXT, suc INTEGER, numero INTEGER)"
+        )
+
+    def close(self):
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._con.execute("SELECT COUNT(*) FROM comprobantes").fetchone()[0]
+
+    def firma(self) -> str:
+        """
+        Cambia cada vez que se registra algo (para invalidar resultados cacheados).
+        """
+        cantidad, ultimo = self._con.execute("SELECT COUNT(*), MAX(registrado) FROM comprobantes").fetchone()
+        return f"{cantidad}:{ultimo}"
+
+    def contiene(self, claves: pd.DataFrame) -> np.ndarray:
+        """
+        Máscara de las filas de `claves` (columnas CLAVE_COMPROBANTE, sin vacíos) ya
+        registradas, resuelta con un solo join contra la clave primaria.
+        """
+        vistas = np.zeros(len(claves), dtype=bool)
+        if not len(claves):
+            return vistas
+        filas = zip(range(len(claves)), *(claves[c].tolist() for c in CLAVE_COMPROBANTE))
+        with self._con:
+            self._con.execute("DELETE FROM consulta")
+            self._con.executemany("INSERT INTO consulta VALUES (?, ?, ?, ?, ?, ?)", filas)
+        pos = self._con.execute(
+            "SELECT q.pos FROM consulta q JOIN comprobantes c"
+            " ON c.cuit_emisor = q.cuit_emisor AND c.cpbte = q.cpbte AND c.letra = q.letra"
+            " AND c.suc = q.suc AND c.numero = q.numero"
+        ).fetchall()
+        vistas[[p for (p,) in pos]] = True
+        return vistas
+
+    def registrar_salida(self, salida: pd.DataFrame, cuit_emisor: str, archivo: str = "") -> int:
+        """
+        Registra los comprobantes de una salida Holistor ya exportada.
+        Devuelve cuántos eran nuevos. Sin CUIT emisor levanta SinCuitEmisor.
+        """
+        claves = claves_salida(salida, exigir_cuit_emisor(cuit_emisor))
+        claves["fecha"] = salida.loc[claves.index, "Fecha dd/mm/aaaa"].astype(str)
+        antes = len(self)
+        ahora = datetime.now().isoformat(timespec="seconds")
+        with self._con:
+            self._con.executemany(
+                "INSERT OR IGNORE INTO comprobantes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                zip(*(claves[c].tolist() for c in CLAVE_COMPROBANTE + ["fecha"]), repeat(archivo), repeat(ahora)),
+            )
+        return len(self) - antes
+
+
+def _entero_col(v, index) -> pd.Series:
+    # Suc. / Número como Int64; lo que no es un entero (texto, 2.5) queda vacío: clave incompleta
+    s = pd.to_numeric(pd.Series(v, index=index), errors="coerce")
+    return s.where(s % 1 == 0).astype("Int64")
+
+
+def _claves(cuit_emisor: str, cpbte, letra, suc, numero, index) -> pd.DataFrame:
+    claves = pd.DataFrame({
+        "cuit_emisor": digits_only(cuit_emisor),
+        "cpbte": np.asarray(cpbte, dtype=object),
+        "letra": np.asarray(letra, dtype=object),
+        "suc": _entero_col(suc, index),
+        "numero": _entero_col(numero, index),
+    }, index=index)
+    claves["completa"] = (claves["cpbte"] != "") & claves["suc"].notna() & claves["numero"].notna()
+    return claves
+
+
+def claves_salida(salida: pd.DataFrame, cuit_emisor: str) -> pd.DataFrame:
+    """
+    Una clave por comprobante de una salida Holistor (las líneas de alícuotas y
+    percepciones comparten clave). Índice: la primera línea de cada comprobante.
+    """
+    claves = _claves(cuit_emisor, salida["Cpbte"], salida["Tipo"], salida["Suc."], salida["Número"], salida.index)
+    claves = claves[claves["completa"]].drop(columns="completa")
+    return claves[~claves.duplicated(CLAVE_COMPROBANTE)]
+
+
+CUIT_RE = re.compile(r"CUIT\D{0,3}(\d{2}-?\d{8}-?\d)", re.IGNORECASE)
+
+
+def detectar_cuit_emisor(file) -> str:
+    """
+    CUIT del emisor según el nombre del archivo o el título de la hoja
+    ("Mis Comprobantes Emitidos - CUIT 20123456786"). "" si no aparece.
+    """
+    textos = [str(getattr(file, "name", ""))]
+    if not is_csv(file):
+        try:
+            textos.extend(v for fila in primeras_filas(file) for v in fila)
+        except Exception:
+            pass
+        file.seek(0)
+    for texto in textos:
+        m = CUIT_RE.search(texto)
+        if m:
+            return digits_only(m.group(1))
+    return ""
+
+
+# ---------------- Helpers comunes ----------------
+def sniff_delimiter(text: str) -> str:
+    try:
+        d = csv.Sniffer().sniff(text[:5000], delimiters=";,|\t")
+        return d.delimiter
+    except Exception:
+        return ";"
+
+
+def pick_col(df: pd.DataFrame, *cands: str) -> str:
+    cols = list(df.columns)
+    colset = set(cols)
+    for c in cands:
+        if c in colset:
+            return c
+    raise KeyError(f"No se encontró ninguna de estas columnas: {cands}")
+
+
+def parse_amount(v) -> float:
+    if v is None:
+        return 0.0
+    if isinstance(v, float) and pd.isna(v):
+        return 0.0
+    if isinstance(v, (int, float)) and not pd.isna(v):
+        return float(v)
+    s = str(v).strip()
+    if not s:
+        return 0.0
+    s = s.replace(" ", "")
+    if "," in s and s.rfind(".") > s.rfind(","):
+        s = s.replace(",", "")  # 1,234.56
+    elif "," in s:
+        s = s.replace(".", "").replace(",", ".")
+    try:
+        return float(s)
+    except Exception:
+        return 0.0
+
+
+def parse_amount_col(s: pd.Series) -> np.ndarray:
+    """
+    parse_amount sobre la columna completa: números tal cual, texto
+    "1.234,56" / "1,234.56" / "1234.56" vía operaciones de string. Vacíos/inválidos => 0.0.
+    """
+    out = pd.to_numeric(s, errors="coerce")
+    pend = out.isna() & s.notna()
+    if pend.any():
+        t = s[pend].astype(str).str.strip().str.replace(" ", "", regex=False)
+        coma = t.str.contains(",", regex=False)
+        miles_coma = coma & (t.str.rfind(".") > t.str.rfind(","))  # 1,234.56
+        t = t.where(~coma | miles_coma, t.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+        t = t.where(~miles_coma, t.str.replace(",", "", regex=False))
+        out = out.astype("float64")
+        out[pend] = pd.to_numeric(t, errors="coerce")
+    return out.fillna(0.0).to_numpy(dtype="float64")
+
+
+# Los importes se convierten en centavos (int64) y los tipos de cambio en enteros con
+# TC_DECIMALES decimales: signos, conversión USD, sumas y controles son exactos. Se
+# redondea a la mitad, lejos del cero (0,005 -> 0,01); recién la salida vuelve a pesos.
+CENTAVOS = 2
+TC_DECIMALES = 6
+TC_ESCALA = 10 ** TC_DECIMALES
+FIJO_MAX = 2 ** 62  # tope de un entero escalado (deja margen en int64 para sumar)
+IMPORTES_SALIDA = ["Neto Gravado", "IVA Liquidado", "IVA Débito", "Conceptos NG/EX", "Perc./Ret.", "Total"]
+
+
+def parse_fijo(v, decimales: int = CENTAVOS) -> int:
+    """
+    parse_amount exacto a entero escalado: "1.234,56" -> 123456 (decimales=2).
+    Los números se toman como se muestran (1.005 -> "1.005"). Vacíos/inválidos => 0.
+    """
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return 0
+    if isinstance(v, (float, np.floating)):
+        s = repr(float(v))
+    elif isinstance(v, (int, np.integer)):
+        s = str(int(v))
+    else:
+        s = str(v).strip().replace(" ", "")
+        if "," in s and s.rfind(".") > s.rfind(","):
+            s = s.replace(",", "")  # 1,234.56
+        elif "," in s:
+            s = s.replace(".", "").replace(",", ".")
+    try:
+        d = Decimal(s)
+    except InvalidOperation:
+        return 0
+    if not d.is_finite():
+        return 0
+    try:
+        n = int(d.scaleb(decimales).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        return 0
+    return n if abs(n) < FIJO_MAX else 0  # fuera de int64: inválido, como en parse_fijo_col
+
+
+def a_fijo(x: np.ndarray, decimales: int = CENTAVOS) -> np.ndarray:
+    """
+    float -> entero escalado, redondeando a la mitad lejos del cero.
+    """
+    y = np.asarray(x, dtype=np.float64) * 10 ** decimales
+    return np.trunc(y + np.copysign(0.5, y)).astype(np.int64)
+
+
+def parse_fijo_col(s: pd.Series, decimales: int = CENTAVOS) -> np.ndarray:
+    """
+    parse_fijo sobre la columna completa: se parsea como float (parse_amount_col), que con
+    pocos decimales ya da el entero exacto, y sólo los valores que caen en una mitad
+    (p. ej. "0,005") se resuelven con parse_fijo.
+    """
+    y = parse_amount_col(s) * 10 ** decimales
+    y[~(np.abs(y) < FIJO_MAX)] = 0.0  # "inf", NaN o fuera de int64 valen 0, como en parse_fijo
+    out = np.trunc(y + np.copysign(0.5, y))
+    mitad = np.abs(np.abs(y - np.trunc(y)) - 0.5) < 1e-6
+    if mitad.any():
+        out[mitad] = [parse_fijo(v, decimales) for v in s.to_numpy(dtype=object)[mitad]]
+    return out.astype(np.int64)
+
+
+def div_redondeo(a, d: int):
+    """
+    a / d entre enteros, redondeado a la mitad lejos del cero.
+    """
+    q = (np.abs(a) + d // 2) // d
+    return np.where(np.asarray(a) < 0, -q, q)
+
+
+def mul_tc(centavos, tc):
+    """
+    Centavos x tipo de cambio (entero con TC_DECIMALES), redondeado a centavos. La parte
+    entera y la fraccionaria del tipo de cambio se multiplican por separado, y para la
+    fraccionaria también se parten los centavos: ningún producto intermedio desborda int64.
+    """
+    ent, frac = np.divmod(tc, TC_ESCALA)
+    alto, bajo = np.divmod(np.abs(centavos), TC_ESCALA)
+    return centavos * ent + np.sign(centavos) * (alto * frac + div_redondeo(bajo * frac, TC_ESCALA))
+
+
+def pesos(centavos) -> np.ndarray:
+    return np.asarray(centavos, dtype=np.int64) / 10 ** CENTAVOS
+
+
+def sign_col(x: np.ndarray, es_credito: np.ndarray) -> np.ndarray:
+    """
+    Signo columnar de importes en centavos: crédito => negativo, resto positivo.
+    """
+    a = np.abs(x)
+    return np.where(es_credito, -a, a)
+
+
+def map_distinct(s: pd.Series, func) -> np.ndarray:
+    """
+    Aplica func una vez por valor distinto de la columna y reparte el resultado
+    a todas las filas: O(valores distintos) en Python en lugar de O(filas).
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    res = np.empty(len(uniques), dtype=object)
+    for i, u in enumerate(uniques):
+        res[i] = func(u)
+
+    out = np.empty(len(codes), dtype=object)
+    hay = codes >= 0
+    out[hay] = res[codes[hay]]
+    if not hay.all():
+        vals = s.to_numpy(dtype=object)[~hay]
+        if np.equal(vals, None).any():
+            out[~hay] = [func(v) for v in vals]
+        else:
+            out[~hay] = func(vals[0])
+    return out
+
+
+def text_upper(v) -> str:
+    return str(v or "").strip().upper()
+
+
+def digits_only(v) -> str:
+    if v is None:
+        return ""
+    return re.sub(r"\D+", "", str(v))
+
+
+def tipo_doc(v) -> int:
+    if v is None:
+        return 0
+    if isinstance(v, float) and pd.isna(v):
+        return 0
+    s = str(v).strip().upper()
+    if not s:
+        return 0
+    try:
+        return int(float(s))
+    except Exception:
+        pass
+    if "CUIT" in s:
+        return 80
+    if "DNI" in s:
+        return 96
+    return 0
+
+
+# Validación de documentos del receptor (sólo los que vienen con número)
+TIPOS_DOC_CUIT = (80, 86, 87)  # CUIT, CUIL, CDI: dígito verificador módulo 11
+# textos del XLSX que tipo_doc deja en 0 (así salen, como siempre) pero se validan igual que en el CSV
+TIPOS_DOC_TEXTO = {"CUIL": 86, "CDI": 87}
+TIPO_DOC_DNI = 96
+DNI_DIGITOS = (7, 8)
+CUIT_PESOS = np.array([5, 4, 3, 2, 7, 6, 5, 4, 3, 2], dtype=np.int64)
+# digits_only deja dígitos Unicode (p. ej. "２" de ancho completo): no son un documento válido
+DOC_NO_ASCII = "tiene dígitos que no son 0-9"
+
+
+def tipo_doc_control(v) -> int:
+    """
+    Tipo de documento con el que se valida: tipo_doc, más los textos de TIPOS_DOC_TEXTO.
+    """
+    tdoc = tipo_doc(v)
+    if tdoc or not isinstance(v, str):
+        return tdoc
+    s = v.strip().upper()
+    return next((cod for texto, cod in TIPOS_DOC_TEXTO.items() if texto in s), 0)
+
+
+def documento_invalido(tdoc: int, nro_doc: str, como_dni: bool = False) -> str:
+    """
+    Motivo por el que el documento no es válido ("" si está bien o viene vacío).
+    `como_dni`: se controla como DNI aunque el tipo sea otro (CUIL de hasta 8 dígitos en factura B).
+    """
+    if not nro_doc:
+        return ""
+    if not nro_doc.isascii() and (como_dni or tdoc == TIPO_DOC_DNI or tdoc in TIPOS_DOC_CUIT):
+        return DOC_NO_ASCII
+    if como_dni or tdoc == TIPO_DOC_DNI:
+        if not DNI_DIGITOS[0] <= len(nro_doc) <= DNI_DIGITOS[1]:
+            return "no tiene 7 u 8 dígitos"
+    elif tdoc in TIPOS_DOC_CUIT:
+        if len(nro_doc) != 11:
+            return "no tiene 11 dígitos"
+        dv = 11 - sum(int(d) * p for d, p in zip(nro_doc[:10], CUIT_PESOS.tolist())) % 11
+        dv = 0 if dv == 11 else dv
+        if dv == 10 or dv != int(nro_doc[10]):
+            return "dígito verificador incorrecto"
+    return ""
+
+
+def documentos_invalidos(tdoc: np.ndarray, nro_doc: np.ndarray, como_dni: np.ndarray | None = None) -> np.ndarray:
+    """
+    documento_invalido sobre la columna completa (nro_doc ya pasado por digits_only):
+    los CUIT de 11 dígitos se validan juntos como una matriz de dígitos.
+    """
+    nro = pd.Series(nro_doc, dtype=object).fillna("").astype(str)
+    largo = nro.str.len().to_numpy()
+    no_ascii = ~map_distinct(nro, str.isascii).astype(bool)
+    nro = nro.to_numpy()
+    motivo = np.full(len(nro), "", dtype=object)
+    es_dni = (tdoc == TIPO_DOC_DNI) if como_dni is None else (como_dni | (tdoc == TIPO_DOC_DNI))
+
+    es_cuit = np.isin(tdoc, TIPOS_DOC_CUIT) & ~es_dni & (largo > 0) & ~no_ascii
+    motivo[es_cuit & (largo != 11)] = "no tiene 11 dígitos"
+    pos = np.flatnonzero(es_cuit & (largo == 11))
+    if len(pos):
+        digitos = np.frombuffer("".join(nro[pos]).encode("ascii"), dtype=np.uint8).reshape(-1, 11) - ord("0")
+        dv = 11 - (digitos[:, :10].astype(np.int64) @ CUIT_PESOS) % 11
+        dv = np.where(dv == 11, 0, dv)
+        motivo[pos[(dv == 10) | (dv != digitos[:, 10])]] = "dígito verificador incorrecto"
+
+    es_dni &= largo > 0
+    motivo[es_dni & ((largo < DNI_DIGITOS[0]) | (largo > DNI_DIGITOS[1]))] = "no tiene 7 u 8 dígitos"
+    motivo[(es_dni | np.isin(tdoc, TIPOS_DOC_CUIT)) & (largo > 0) & no_ascii] = DOC_NO_ASCII
+    return motivo
+
+
+def fecha_out(v) -> str:
+    """
+    Devuelve SIEMPRE texto DD/MM/AAAA.
+    """
+    if v is None or v is pd.NaT or (isinstance(v, float) and pd.isna(v)):
+        return ""
+
+    if isinstance(v, (datetime, date)):
+        return v.strftime("%d/%m/%Y")
+
+    s = str(v).strip()
+    if not s:
+        return ""
+
+    if re.fullmatch(r"\d{2}[/-]\d{2}[/-]\d{4}", s):
+        return s.replace("-", "/")
+
+    if re.match(r"^\d{4}-\d{2}-\d{2}(\s+\d{2}:\d{2}:\d{2})?$", s):
+        dt = pd.to_datetime(s, errors="coerce")
+        if not pd.isna(dt):
+            return dt.strftime("%d/%m/%Y")
+
+    dt = pd.to_datetime(s, errors="coerce", dayfirst=True)
+    if not pd.isna(dt):
+        return dt.strftime("%d/%m/%Y")
+
+    return s
+
+
+# Formatos de texto reconocidos por fecha_out_col: (regex, formato explícito).
+# Formato None = ya viene como DD/MM/AAAA (o DD-MM-AAAA) y sólo se normaliza el separador.
+FECHA_FORMATOS = [
+    (r"\d{2}[/-]\d{2}[/-]\d{4}", None),
+    (r"\d{4}-\d{2}-\d{2}", "%Y-%m-%d"),
+    (r"\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}", "%Y-%m-%d %H:%M:%S"),
+]
+FECHA_MUESTRA = 200
+
+
+def fecha_out_col(s: pd.Series) -> np.ndarray:
+    """
+    fecha_out sobre la columna completa. Columnas de fechas se formatean de una vez;
+    columnas de texto se parsean con el formato dominante de una muestra (formato
+    explícito, sin inferencia por celda). Lo que no encaja pasa por fecha_out.
+    """
+    vals = s.to_numpy(dtype=object)
+    out = np.full(len(vals), "", dtype=object)
+    pend = s.notna().to_numpy(dtype=bool, copy=True)
+    if not pend.any():
+        return out
+
+    inferido = pd.api.types.infer_dtype(s, skipna=True)
+    if pd.api.types.is_datetime64_any_dtype(s) or inferido in ("datetime", "datetime64", "date"):
+        dt = pd.to_datetime(pd.Series(vals[pend]), errors="coerce")
+        ok = dt.notna().to_numpy(dtype=bool)
+        pos = np.flatnonzero(pend)[ok]
+        out[pos] = dt[ok].dt.strftime("%d/%m/%Y").to_numpy(dtype=object)
+        pend[pos] = False
+
+    elif inferido == "string":
+        pos = np.flatnonzero(pend)
+        t = pd.Series(vals[pos]).str.strip()
+        vacio = (t == "").to_numpy(dtype=bool)
+        pend[pos[vacio]] = False
+
+        muestra = t[~vacio].head(FECHA_MUESTRA)
+        regex, fmt = max(FECHA_FORMATOS, key=lambda f: int(muestra.str.fullmatch(f[0]).sum()))
+        m = t.str.fullmatch(regex).to_numpy(dtype=bool) & ~vacio
+        if m.any():
+            if fmt is None:
+                out[pos[m]] = t[m].str.replace("-", "/", regex=False).to_numpy(dtype=object)
+                pend[pos[m]] = False
+            else:
+                dt = pd.to_datetime(t[m].str.replace(r"\s+", " ", regex=True), format=fmt, errors="coerce")
+                ok = dt.notna().to_numpy(dtype=bool)
+                out[pos[m][ok]] = dt[ok].dt.strftime("%d/%m/%Y").to_numpy(dtype=object)
+                pend[pos[m][ok]] = False
+
+    # resto (formatos minoritarios, valores mixtos o inválidos): celda por celda
+    idx = np.flatnonzero(pend)
+    if len(idx):
+        out[idx] = [fecha_out(v) for v in vals[idx]]
+    return out
+
+
+# ---------------- ARCA: helpers ----------------
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_CHUNK_ROWS = 50_000
+
+
+def is_csv(file) -> bool:
+    return (getattr(file, "name", "") or "").lower().endswith(".csv")
+
+
+def sniff_csv(file) -> tuple[str, str]:
+    """
+    Delimitador y encoding a partir de los primeros CSV_SNIFF_BYTES del archivo
+    (sin decodificar el archivo completo). Deja el archivo al inicio.
+    """
+    file.seek(0)
+    head = file.read(CSV_SNIFF_BYTES)
+    file.seek(0)
+
+    if head.startswith(codecs.BOM_UTF8):
+        encoding = "utf-8-sig"
+    else:
+        try:
+            head.decode("utf-8")
+            encoding = "utf-8"
+        except UnicodeDecodeError as e:
+            # un caracter multibyte cortado al final del prefijo no invalida UTF-8
+            encoding = "utf-8" if e.start >= len(head) - 3 else "latin-1"
+
+    return sniff_delimiter(head.decode(encoding, errors="replace")), encoding
+
+
+def read_arca_chunks(file, chunksize: int = CSV_CHUNK_ROWS):
+    """
+    Lector CSV por bloques de `chunksize` filas: la memoria depende del bloque, no del archivo.
+    """
+    sep, encoding = sniff_csv(file)
+    # index_col=False: con un separador de más al final de las filas pandas tomaría la
+    # primera columna como índice (ver filas_origen)
+    return pd.read_csv(file, sep=sep, dtype=str, encoding=encoding, chunksize=chunksize, index_col=False)
+
+
+# Textos que pd.read_excel trata como vacío por defecto
+XLSX_NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+XLSX_HEADER_SCAN_ROWS = 10
+XLSX_AVANCE_FILAS = 5_000  # cada cuántas filas leídas se informa el avance
+ARCA_HEADER_HINTS = (
+    "Fecha de Emisión", "Fecha de Emision", "Tipo de Comprobante", "Punto de Venta",
+    "Número Desde", "Numero Desde", "Imp. Total",
+)
+
+
+def _xlsx_cell(v):
+    if v is None:
+        return np.nan
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    if isinstance(v, str) and v in XLSX_NA_VALUES:
+        return np.nan
+    return v
+
+
+def read_xlsx_table(file, hints: tuple[str, ...], scan_rows: int = XLSX_HEADER_SCAN_ROWS, avance=None,
+                    fila_header: int | None = None) -> pd.DataFrame:
+    """
+    Lee la primera hoja en modo read-only en una sola pasada: busca la fila de
+    encabezados entre las primeras `scan_rows` filas (la primera que tenga al menos
+    dos nombres de `hints`; con `fila_header`, ya hallada por detectar_fuente, no se
+    busca: se usa esa fila) y carga el resto como datos sin tipar (dtype=object, celdas
+    tal como las da openpyxl): importes y fechas se convierten después, por columna,
+    en parse_fijo_col / fecha_out_col.
+    `avance(filas)` (opcional) se llama cada XLSX_AVANCE_FILAS filas leídas.
+    """
+    file.seek(0)
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        if fila_header is not None:
+            header = next(islice(rows, fila_header - 1, None), None)
+            if header is None:
+                raise KeyError(f"El archivo no tiene la fila de encabezados {fila_header}.")
+        else:
+            header = None
+            for fila_header in range(1, scan_rows + 1):
+                row = next(rows, None)
+                if row is None:
+                    break
+                nombres = {str(v).strip() for v in row if v is not None}
+                if len(nombres.intersection(hints)) >= 2:
+                    header = row
+                    break
+            if header is None:
+                raise KeyError(
+                    f"No se encontró la fila de encabezados en las primeras {scan_rows} filas "
+                    f"(se buscaba: {', '.join(hints)})."
+                )
+
+        while header and header[-1] is None:
+            header = header[:-1]
+        width = len(header)
+        data = []
+        for row in rows:
+            if avance is not None and len(data) % XLSX_AVANCE_FILAS == 0:
+                avance(len(data))
+            row = row[:width]
+            if all(v is None for v in row):
+                data.append(None)
+                continue
+            data.append([_xlsx_cell(v) for v in row] + [np.nan] * (width - len(row)))
+    finally:
+        wb.close()
+
+    # filas vacías al final no cuentan (como pd.read_excel)
+    while data and data[-1] is None:
+        data.pop()
+    data = [r if r is not None else [np.nan] * width for r in data]
+
+    columns = []
+    vistos: dict = {}
+    for i, v in enumerate(header):
+        nombre = v if v is not None else f"Unnamed: {i}"
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f"{nombre}.{vistos[nombre]}"
+        else:
+            vistos[nombre] = 0
+        columns.append(nombre)
+
+    df = pd.DataFrame(data, columns=columns, dtype=object)
+    df.attrs["fila_datos"] = fila_header + 1  # fila de Excel de la primera fila de datos
+    return df
+
+
+def read_arca(file, avance=None, fila_header: int | None = None) -> tuple[pd.DataFrame, str]:
+    if is_csv(file):
+        sep, encoding = sniff_csv(file)
+        return pd.read_csv(file, sep=sep, dtype=str, encoding=encoding, index_col=False), "csv"
+    return read_xlsx_table(file, ARCA_HEADER_HINTS, avance=avance, fila_header=fila_header), "xlsx"
+
+
+def _xml_local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _xlsx_col_idx(ref: str) -> int:
+    n = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        n = n * 26 + ord(ch.upper()) - 64
+    return n - 1
+
+
+def _xlsx_primera_hoja(z: zipfile.ZipFile) -> str:
+    """
+    Ruta dentro del .xlsx del XML de la primera hoja.
+    """
+    wb = ET.fromstring(z.read("xl/workbook.xml"))
+    sheet = next(e for e in wb.iter() if _xml_local(e.tag) == "sheet")
+    rid = next(v for k, v in sheet.attrib.items() if _xml_local(k) == "id")
+    rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+    target = next(e.get("Target") for e in rels if e.get("Id") == rid)
+    return target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+
+def _xlsx_primeras_filas(file, n: int) -> list[list[str]]:
+    """
+    Primeras `n` filas (como texto, sin recortar) de la primera hoja, leyendo el XML
+    en streaming: no se carga el libro ni la hoja completa, y de los textos
+    compartidos sólo se lee hasta el último que usan esas filas.
+    """
+    file.seek(0)
+    filas: list[list] = [[] for _ in range(n)]
+    compartidos: set[int] = set()
+    with zipfile.ZipFile(file) as z:
+        with z.open(_xlsx_primera_hoja(z)) as f:
+            r = -1
+            for _, el in ET.iterparse(f):
+                if _xml_local(el.tag) != "row":
+                    continue
+                # "r" (número de fila) es opcional: sin él, la fila sigue a la anterior
+                r = int(el.get("r")) - 1 if el.get("r") else r + 1
+                if r >= n:
+                    break
+                fila = filas[r]
+                for c in el:
+                    if _xml_local(c.tag) != "c":
+                        continue
+                    v = next((e.text for e in c.iter() if _xml_local(e.tag) in ("v", "t")), None) or ""
+                    if c.get("t") == "s" and v:
+                        v = int(v)
+                        compartidos.add(v)
+                    i = _xlsx_col_idx(c.get("r")) if c.get("r") else len(fila)
+                    fila.extend([""] * (i + 1 - len(fila)))
+                    fila[i] = v
+                el.clear()
+
+        textos: dict[int, str] = {}
+        if compartidos:
+            ultimo = max(compartidos)
+            with z.open("xl/sharedStrings.xml") as f:
+                i = 0
+                for _, el in ET.iterparse(f):
+                    if _xml_local(el.tag) != "si":
+                        continue
+                    if i in compartidos:
+                        textos[i] = "".join(t.text or "" for t in el.iter() if _xml_local(t.tag) == "t")
+                    if i == ultimo:
+                        break
+                    i += 1
+                    el.clear()
+    file.seek(0)
+    return [[textos.get(v, "") if isinstance(v, int) else v for v in fila] for fila in filas]
+
+
+def primeras_filas(file, n: int = XLSX_HEADER_SCAN_ROWS) -> list[list[str]]:
+    """
+    Primeras `n` filas del archivo como texto (CSV o XLSX), sin leerlo completo.
+    """
+    if not is_csv(file):
+        return _xlsx_primeras_filas(file, n)
+    sep, encoding = sniff_csv(file)
+    head = file.read(CSV_SNIFF_BYTES).decode(encoding, errors="replace")
+    file.seek(0)
+    return list(islice(csv.reader(head.splitlines(), delimiter=sep), n))
+
+
+# ---------------- Fuentes ----------------
+# Cada fuente declara sus columnas (con los nombres alternativos que se vieron en los
+# archivos, en orden de preferencia). Con eso se reconoce el archivo por sus encabezados
+# (leyendo sólo las primeras filas) y se resuelven las columnas antes de leerlo entero.
+@dataclass(frozen=True)
+class Fuente:
+    id: str
+    nombre: str
+    formatos: tuple[str, ...]
+    columnas: dict[str, tuple[str, ...]]  # obligatorias
+    opcionales: dict[str, tuple[str, ...]]  # None si no vienen
+    listas: dict[str, tuple[str, ...]]  # todas las que vengan (puede quedar vacía)
+
+    def faltantes(self, columnas) -> list[tuple[str, ...]]:
+        colset = set(columnas)
+        return [alias for alias in self.columnas.values() if colset.isdisjoint(alias)]
+
+    def resolver(self, columnas) -> dict:
+        """
+        Nombre real de cada columna; KeyError si falta una obligatoria.
+        """
+        colset = set(columnas)
+        cols = {}
+        for clave, alias in self.columnas.items():
+            cols[clave] = next((c for c in alias if c in colset), None)
+            if cols[clave] is None:
+                raise KeyError(f"No se encontró ninguna de estas columnas: {alias}")
+        for clave, alias in self.opcionales.items():
+            cols[clave] = next((c for c in alias if c in colset), None)
+        for clave, alias in self.listas.items():
+            cols[clave] = [c for c in alias if c in colset]
+        return cols
+
+
+@dataclass
+class Deteccion:
+    fuente: str
+    formato: str
+    fila_header: int  # fila (1 = primera) de los encabezados
+    cols: dict
+
+
+class FuenteIncorrecta(ValueError):
+    """
+    El archivo no es de la fuente elegida (o no se reconoce).
+    """
+
+
+FUENTES: dict[str, Fuente] = {}
+
+
+def registrar_fuente(fuente: Fuente) -> Fuente:
+    FUENTES[fuente.id] = fuente
+    return fuente
+
+
+def detectar_fuente(file, esperada: str | None = None, scan_rows: int = XLSX_HEADER_SCAN_ROWS) -> Deteccion:
+    """
+    Reconoce la fuente por los encabezados de las primeras `scan_rows` filas (en CSV,
+    la primera) y resuelve sus columnas. Con `esperada`, un archivo de otra fuente o
+    sin los encabezados esperados falla acá, sin leer el resto del archivo.
+    """
+    if esperada is not None and esperada not in FUENTES:
+        raise ValueError(f"Fuente desconocida: {esperada}")
+    formato = "csv" if is_csv(file) else "xlsx"
+    filas = primeras_filas(file, 1 if formato == "csv" else scan_rows)
+    candidatas = [FUENTES[esperada]] if esperada else []
+    candidatas += [f for f in FUENTES.values() if f.id != esperada]
+
+    for fila_header, fila in enumerate(filas, start=1):
+        for fuente in candidatas:
+            if fuente.faltantes(fila):
+                continue
+            if esperada is not None and fuente.id != esperada:
+                raise FuenteIncorrecta(
+                    f"El archivo parece de {fuente.nombre}, no de {FUENTES[esperada].nombre}."
+                )
+            if formato not in fuente.formatos:
+                raise FuenteIncorrecta(f"{fuente.nombre} sólo se acepta en {', '.join(fuente.formatos).upper()}.")
+            return Deteccion(fuente.id, formato, fila_header, fuente.resolver(fila))
+
+    if esperada is not None:
+        # se informa contra la fila que más se parece a los encabezados esperados
+        fuente = FUENTES[esperada]
+        fila = min(filas, key=lambda f: len(fuente.faltantes(f)), default=[])
+        fuente.resolver(fila)  # KeyError con las columnas que faltan
+    raise FuenteIncorrecta(
+        f"No se reconoce el archivo: no tiene los encabezados de "
+        f"{' ni de '.join(f.nombre for f in FUENTES.values())}."
+    )
+
+
+# ---------------- Cachés en disco ----------------
+# Snapshots y exportaciones guardadas: cada lectura toca el mtime del archivo y la poda
+# borra primero los de mtime más viejo (los menos usados).
+def marcar_uso(path: Path):
+    os.utime(path)
+
+
+def podar_por_uso(directorio: Path, patron: str, max_bytes: int | None = None, max_archivos: int | None = None):
+    """
+    Borra los archivos de `directorio` que coinciden con `patron`, del menos usado al
+    más reciente, hasta quedar dentro de `max_bytes` y `max_archivos` (None = sin tope).
+    Los que otro proceso ya borró o que no se pueden borrar se saltean.
+    """
+    archivos = []
+    for p in Path(directorio).glob(patron):
+        try:
+            info = p.stat()
+        except FileNotFoundError:
+            continue
+        archivos.append((info.st_mtime, info.st_size, p))
+    total, quedan = sum(size for _, size, _ in archivos), len(archivos)
+    for _, size, p in sorted(archivos):
+        if (max_bytes is None or total <= max_bytes) and (max_archivos is None or quedan <= max_archivos):
+            break
+        try:
+            p.unlink(missing_ok=True)
+        except OSError:  # sin permiso: queda, pero no frena a quien guarda
+            continue
+        total -= size
+        quedan -= 1
+
+
+# ---------------- Snapshots de lectura (XLSX) ----------------
+# Leer un XLSX es lo más lento de todo el proceso. La tabla leída se guarda en disco como
+# Arrow (IPC, sin comprimir, para abrirla con memory-map) bajo el hash del contenido:
+# volver a procesar el mismo archivo (otra configuración, otra sesión) no relee el Excel.
+SNAPSHOTS_DIR = HERE / ".cache" / "snapshots"
+SNAPSHOTS_MAX_BYTES = 1 << 30  # 1 GB; se descartan los menos usados al superarlo
+SNAPSHOT_FORMATO = 1
+
+# Tipos de celda que se guardan (las tablas leídas son dtype=object con valores de Python).
+# Una columna puede mezclarlos (p. ej. int y float, o str y NaN): cada tipo presente va en
+# su propia columna Arrow y una columna de etiquetas dice cuál usar en cada fila.
+_SNAP_NAN, _SNAP_NONE = "nan", "none"
+_SNAP_TIPOS = {str: "str", int: "int", float: "float", bool: "bool", datetime: "datetime"}
+_SNAP_ARROW = {"str": "string", "int": "int64", "float": "float64", "bool": "bool_", "datetime": "timestamp_us"}
+_INT64_MAX = np.iinfo(np.int64).max
+
+
+def _snap_tipo(v) -> str | None:
+    if v is None:
+        return _SNAP_NONE
+    t = _SNAP_TIPOS.get(type(v))
+    if t == "float" and v != v:
+        return _SNAP_NAN
+    if t == "int" and abs(v) > _INT64_MAX:
+        return None
+    if t == "datetime" and v.tzinfo is not None:
+        return None
+    return t
+
+
+def _snap_arrow_type(t: str):
+    return pa.timestamp("us") if t == "datetime" else getattr(pa, _SNAP_ARROW[t])()
+
+
+class Snapshots:
+    """
+    Caché en disco de tablas leídas de XLSX, por hash del contenido. Con pyarrow no
+    instalado (o una tabla con celdas de tipos no soportados) simplemente no guarda nada.
+    """
+    def __init__(self, directorio=SNAPSHOTS_DIR, max_bytes: int = SNAPSHOTS_MAX_BYTES):
+        self.directorio = Path(directorio)
+        self.max_bytes = max_bytes
+
+    @property
+    def disponible(self) -> bool:
+        return pa is not None
+
+    def clave(self, file, lector: str) -> str:
+        file.seek(0)
+        h = hashlib.sha256(file.read())
+        file.seek(0)
+        h.update(f"|{lector}|{VERSION_PROCESO}|{SNAPSHOT_FORMATO}".encode())
+        return h.hexdigest()
+
+    def _path(self, clave: str) -> Path:
+        return self.directorio / f"{clave}.arrow"
+
+    def leer(self, clave: str) -> pd.DataFrame | None:
+        path = self._path(clave)
+        if not self.disponible or not path.exists():
+            return None
+        try:
+            with pa.memory_map(str(path)) as fuente:
+                tabla = pa.ipc.open_file(fuente).read_all()
+            df = _snapshot_a_frame(tabla)
+            marcar_uso(path)
+        except (OSError, pa.ArrowException, KeyError, ValueError):
+            return None
+        return df
+
+    def guardar(self, clave: str, df: pd.DataFrame) -> bool:
+        if not self.disponible:
+            return False
+        tabla = _frame_a_snapshot(df)
+        if tabla is None:
+            return False
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        path = self._path(clave)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+        os.replace(tmp, path)
+        self.podar()
+        return True
+
+    def podar(self):
+        """
+        Borra los snapshots menos usados hasta quedar debajo de max_bytes.
+        """
+        podar_por_uso(self.directorio, "*.arrow", max_bytes=self.max_bytes)
+
+
+def _frame_a_snapshot(df: pd.DataFrame):
+    """
+    Tabla Arrow con cada columna object separada por tipo de celda; None si algún
+    valor o nombre de columna no se puede guardar tal cual.
+    """
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        return None
+    nombres = list(df.columns)
+    if not all(type(c) in (str, int) for c in nombres):
+        return None
+
+    columnas, arrays, tipos = [], [], []
+    for i, nombre in enumerate(nombres):
+        valores = df[nombre].to_numpy(dtype=object)
+        etiquetas = np.array([_snap_tipo(v) for v in valores], dtype=object)
+        presentes = sorted(set(etiquetas), key=str)
+        if None in presentes:
+            return None
+        tipos.append(presentes)
+        if len(presentes) > 1:
+            codigos = np.zeros(len(valores), dtype=np.int8)
+            for k, t in enumerate(presentes):
+                codigos[etiquetas == t] = k
+            columnas.append(f"{i}:tipo")
+            arrays.append(pa.array(codigos, type=pa.int8()))
+        for t in presentes:
+            if t in (_SNAP_NAN, _SNAP_NONE):
+                continue
+            datos = np.where(etiquetas == t, valores, None)
+            columnas.append(f"{i}:{t}")
+            arrays.append(pa.array(datos, type=_snap_arrow_type(t)))
+
+    meta = {"columnas": nombres, "tipos": tipos, "filas": len(df), "attrs": df.attrs}
+    return pa.Table.from_arrays(arrays, names=columnas, metadata={"emitidos": json.dumps(meta)})
+
+
+def _snapshot_a_frame(tabla) -> pd.DataFrame:
+    meta = json.loads(tabla.schema.metadata[b"emitidos"])
+    n = meta["filas"]
+    datos = {}
+    for i, (nombre, presentes) in enumerate(zip(meta["columnas"], meta["tipos"])):
+        if len(presentes) > 1:
+            codigos = tabla.column(f"{i}:tipo").to_numpy()
+        else:
+            codigos = np.zeros(n, dtype=np.int8)
+        out = np.empty(n, dtype=object)
+        for k, t in enumerate(presentes):
+            mascara = codigos == k
+            if t == _SNAP_NAN:
+                out[mascara] = np.nan
+                continue
+            if t == _SNAP_NONE:
+                out[mascara] = None
+                continue
+            col = tabla.column(f"{i}:{t}")
+            if t == "str":
+                vals = col.to_numpy(zero_copy_only=False)
+            elif t == "datetime":
+                vals = pd.DatetimeIndex(col.fill_null(0).to_numpy(zero_copy_only=False)).to_pydatetime()
+            else:
+                vals = col.fill_null(False if t == "bool" else 0).to_numpy(zero_copy_only=False).astype(object)
+            out[mascara] = vals[mascara]
+        datos[i] = out
+    df = pd.DataFrame(datos, dtype=object)
+    df.columns = meta["columnas"]
+    df.attrs.update(meta["attrs"])
+    return df
+
+
+def read_xlsx_snapshot(file, lector: str, leer, snapshots: Snapshots | None, perf) -> pd.DataFrame:
+    """
+    leer(file) con caché en `snapshots` (si no es None). Las etapas de `perf` muestran
+    si la tabla salió del snapshot o del Excel.
+    """
+    if snapshots is None or not snapshots.disponible:
+        with perf.etapa("lectura") as e:
+            df = leer(file)
+            e.filas_out = len(df)
+        return df
+
+    clave = snapshots.clave(file, lector)
+    with perf.etapa("lectura (snapshot)") as e:
+        df = snapshots.leer(clave)
+        e.filas_out = 0 if df is None else len(df)
+    if df is None:
+        with perf.etapa("lectura") as e:
+            df = leer(file)
+            e.filas_out = len(df)
+        with perf.etapa("snapshot guardado", len(df)):
+            snapshots.guardar(clave, df)
+    return df
+
+
+def map_tipo_from_text(desc: str) -> tuple[str, str]:
+    s = str(desc or "").strip()
+    su = s.upper()
+
+    # --- MiPyME / FCE: evaluar ANTES que la lógica genérica ---
+    if (
+        "MIPYME" in su
+        or "FCE" in su
+        or "FACTURA DE CRÉDITO ELECTRÓNICA" in su
+        or "FACTURA DE CREDITO ELECTRONICA" in su
+    ):
+        if "NOTA DE CRÉDITO" in su or "NOTA DE CREDITO" in su:
+            t = "PC"
+        elif "NOTA DE DÉBITO" in su or "NOTA DE DEBITO" in su:
+            t = "NP"
+        elif "FACTURA DE CRÉDITO" in su or "FACTURA DE CREDITO" in su:
+            t = "FP"
+        else:
+            t = ""
+
+    # --- Tickets / Tiques ---
+    elif "TIQUE" in su or "TICKET" in su:
+        if "NOTA DE CRÉDITO" in su or "NOTA DE CREDITO" in su:
+            t = "TC"
+        else:
+            t = "T"
+
+    else:
+        if "NOTA DE CRÉDITO" in su or "NOTA DE CREDITO" in su:
+            t = "NC"
+        elif "NOTA DE DÉBITO" in su or "NOTA DE DEBITO" in su:
+            t = "ND"
+        elif "RECIBO" in su:
+            t = "R"
+        elif "FACTURA" in su:
+            t = "F"
+        else:
+            t = ""
+
+    letra = s[-1].upper() if s else ""
+    if letra not in ("A", "B", "C", "M"):
+        letra = ""
+
+    if s.startswith("8 ") and s.strip().upper().endswith("C"):
+        letra = "B"
+
+    # Caso específico: 083 TIQUE (*) => T / C
+    if ("TIQUE" in su or "TICKET" in su) and not letra:
+        letra = "C"
+
+    return t, letra
+
+
+def _xlsx_xml_rows(path) -> list[list[str]]:
+    """
+    Filas (como texto) de la primera hoja de un .xlsx leyendo el XML directamente.
+    Sirve también para libros "Strict Open XML", que openpyxl no abre.
+    """
+    local = _xml_local
+    with zipfile.ZipFile(path) as z:
+        shared = []
+        if "xl/sharedStrings.xml" in z.namelist():
+            for si in ET.fromstring(z.read("xl/sharedStrings.xml")):
+                shared.append("".join(t.text or "" for t in si.iter() if local(t.tag) == "t"))
+
+        filas = []
+        for row in ET.fromstring(z.read(_xlsx_primera_hoja(z))).iter():
+            if local(row.tag) != "row":
+                continue
+            fila: list[str] = []
+            for c in row:
+                if local(c.tag) != "c":
+                    continue
+                v = next((e.text for e in c.iter() if local(e.tag) in ("v", "t")), None) or ""
+                if c.get("t") == "s" and v:
+                    v = shared[int(v)]
+                i = _xlsx_col_idx(c.get("r", ""))
+                fila.extend([""] * (i + 1 - len(fila)))
+                fila[i] = v.strip()
+            filas.append(fila)
+    return filas
+
+
+@lru_cache(maxsize=None)
+def load_tabla_arca(path: str = str(TABLA_ARCA_PATH)) -> dict[str, tuple[str, str]]:
+    """
+    Código ARCA -> (Cpbte, Letra), cargado una sola vez desde TABLAARCA.xlsx
+    (columnas Código / Descripción / Tipo / Letra). La tabla manda, con las
+    correcciones de TABLA_ARCA_CPBTE / TABLA_ARCA_CODIGOS; TIPOS_COMP completa los
+    códigos que no trae (tiques) y es todo lo que hay si la tabla no se puede leer.
+    """
+    leida: dict[str, tuple[str, str]] = {}
+    try:
+        filas = _xlsx_xml_rows(path)
+        header = next(i for i, f in enumerate(filas) if f and f[0] == "Código")
+        pos = {nombre: j for j, nombre in enumerate(filas[header])}
+        for f in filas[header + 1:]:
+            f = f + [""] * (len(filas[header]) - len(f))
+            codigo, cpbte, letra = f[pos["Código"]], f[pos["Tipo"]], f[pos["Letra"]]
+            if codigo and cpbte and letra:
+                leida[str(int(float(codigo)))] = (TABLA_ARCA_CPBTE.get(cpbte, cpbte), letra)
+    except Exception:
+        return dict(TIPOS_COMP)
+    leida.update((c, v) for c, v in TABLA_ARCA_CODIGOS.items() if c in leida)
+    return {**TIPOS_COMP, **leida}
+
+
+def decode_csv_tipo(tipo_comp_raw: str) -> tuple[str, str]:
+    k = str(tipo_comp_raw).strip()
+    try:
+        k = str(int(float(k)))
+    except Exception:
+        pass
+    return load_tabla_arca().get(k, ("", ""))
+
+
+# ---------------- Cotizaciones USD ----------------
+# Tabla local fecha -> cotización BNA tipo vendedor (CSV o XLSX, columnas "Fecha" y
+# "Vendedor"). Completa el Tipo de cambio de las filas en USD que no lo traen con la
+# última cotización a la fecha de emisión (no más vieja que COTIZACION_MAX_DIAS).
+COTIZACION_MAX_DIAS = 7
+
+
+def _fechas_dt(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(pd.Series(fecha_out_col(s)), format="%d/%m/%Y", errors="coerce").astype("datetime64[ns]")
+
+
+@lru_cache(maxsize=4)
+def _load_cotizaciones(path: str, mtime: float) -> pd.DataFrame:
+    if path.lower().endswith(".csv"):
+        with open(path, encoding="utf-8-sig", errors="replace") as f:
+            sep = sniff_delimiter(f.read(CSV_SNIFF_BYTES))
+        df = pd.read_csv(path, sep=sep, dtype=str, encoding="utf-8-sig")
+    else:
+        df = pd.read_excel(path, sheet_name=0, dtype=object)
+    df.columns = [str(c).strip() for c in df.columns]
+    tabla = pd.DataFrame({
+        "fecha_tc": _fechas_dt(df[pick_col(df, "Fecha")]),
+        "tc": parse_amount_col(df[pick_col(df, "Vendedor", "Venta", "Cotización", "Cotizacion", "Tipo de cambio")]),
+    })
+    tabla = tabla[tabla["fecha_tc"].notna() & (tabla["tc"] > 0)]
+    # ordenada y una cotización por fecha (la última de la tabla): lista para merge_asof
+    return tabla.drop_duplicates("fecha_tc", keep="last").sort_values("fecha_tc", ignore_index=True)
+
+
+def load_cotizaciones(path: str | None = str(COTIZACIONES_PATH)) -> pd.DataFrame | None:
+    """
+    Tabla de cotizaciones (fecha_tc, tc) ordenada por fecha, o None si no hay archivo.
+    Se carga una sola vez por proceso y se vuelve a leer si el archivo cambia.
+    """
+    if not path:
+        return None
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    return _load_cotizaciones(str(path), mtime)
+
+
+def cotizacion_asof(fechas: pd.Series, tabla: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Para cada fecha de emisión, la última cotización de `tabla` a esa fecha: un solo
+    merge_asof sobre las fechas ordenadas. Devuelve (tc, fecha de la cotización);
+    NaN / "" donde no hay cotización.
+    """
+    n = len(fechas)
+    tc = np.full(n, np.nan)
+    fecha_tc = np.full(n, "", dtype=object)
+    izq = pd.DataFrame({"fecha": _fechas_dt(fechas).to_numpy(), "pos": np.arange(n)})
+    izq = izq[izq["fecha"].notna()].sort_values("fecha", kind="stable")
+    if izq.empty or tabla.empty:
+        return tc, fecha_tc
+    m = pd.merge_asof(
+        izq, tabla, left_on="fecha", right_on="fecha_tc", direction="backward",
+        tolerance=pd.Timedelta(days=COTIZACION_MAX_DIAS),
+    )
+    m = m[m["tc"].notna()]
+    pos = m["pos"].to_numpy()
+    tc[pos] = m["tc"].to_numpy()
+    fecha_tc[pos] = m["fecha_tc"].dt.strftime("%d/%m/%Y").to_numpy(dtype=object)
+    return tc, fecha_tc
+
+
+# ---------------- Padrón de receptores ----------------
+# Archivo local (CSV) con CUIT, Domicilio, C.P., Pcia y condición frente al IVA. Se
+# indexa una sola vez en SQLite (clave primaria = CUIT) y se vuelve a indexar sólo si
+# el archivo cambia; cada conversión lo consulta con un join sobre los CUIT distintos.
+PADRON_COLUMNAS = {
+    "cuit": ("CUIT", "Cuit", "CUIT Receptor"),
+    "domicilio": ("Domicilio", "Domicilio Fiscal", "Dirección", "Direccion"),
+    "cp": ("C.P.", "CP", "Código Postal", "Codigo Postal"),
+    "pcia": ("Pcia", "Provincia"),
+    "cond": ("Cond Fisc", "Condición IVA", "Condicion IVA", "Condición fiscal", "Condicion fiscal"),
+}
+# Condición frente al IVA -> código de Cond Fisc (lo que no figura pasa tal cual)
+PADRON_COND_FISC = {
+    "RESPONSABLE INSCRIPTO": "RI",
+    "IVA RESPONSABLE INSCRIPTO": "RI",
+    "MONOTRIBUTO": "MTD",  # código Holistor, igual que en Pastor
+    "MONOTRIBUTISTA": "MTD",
+    "RESPONSABLE MONOTRIBUTO": "MTD",
+    "MONOTRIBUTISTA SOCIAL": "MTD",
+    "MT": "MTD",
+    "EXENTO": "EX",
+    "IVA EXENTO": "EX",
+    "CONSUMIDOR FINAL": "CF",
+    "NO ALCANZADO": "NA",
+    "IVA NO ALCANZADO": "NA",
+}
+PADRON_BLOQUE_FILAS = 200_000
+PADRON_FORMATO = 2  # cambia la firma: los índices armados con otra versión se rehacen
+
+
+class Padron:
+    """
+    Padrón de receptores indexado por CUIT. `origen` es el CSV del padrón y `base` el
+    SQLite donde queda indexado (se reconstruye si cambia el tamaño o la fecha del CSV).
+    """
+    def __init__(self, origen, base=PADRON_DB):
+        self.origen = str(origen)
+        self.base = Path(base)
+        self.base.parent.mkdir(parents=True, exist_ok=True)
+        firma = self._firma_origen()
+        if self._firma_base() != firma:
+            self._indexar(firma)
+        self._con = sqlite3.connect(self.base, timeout=30)
+        self._con.execute("CREATE TEMP TABLE IF NOT EXISTS consulta (cuit INTEGER PRIMARY KEY)")
+
+    def _firma_origen(self) -> str:
+        st = os.stat(self.origen)
+        return f"{st.st_size}:{st.st_mtime_ns}:{PADRON_FORMATO}"
+
+    def _firma_base(self) -> str | None:
+        if not self.base.exists():
+            return None
+        try:
+            con = sqlite3.connect(self.base, timeout=30)
+            try:
+                return con.execute("SELECT valor FROM meta WHERE clave = 'firma'").fetchone()[0]
+            finally:
+                con.close()
+        except (sqlite3.Error, TypeError):
+            return None
+
+    def _indexar(self, firma: str):
+        """
+        Carga el CSV por bloques en un SQLite nuevo y lo reemplaza de una vez (otros
+        procesos siguen usando el anterior hasta entonces).
+        """
+        tmp = self.base.with_name(f"{self.base.name}.{os.getpid()}.tmp")
+        tmp.unlink(missing_ok=True)
+        con = sqlite3.connect(tmp)
+        try:
+            con.execute("PRAGMA journal_mode = OFF")
+            con.execute("PRAGMA synchronous = OFF")
+            con.execute(
+                "CREATE TABLE padron (cuit INTEGER PRIMARY KEY, domicilio TEXT, cp TEXT, pcia TEXT, cond TEXT)"
+            )
+            with open(self.origen, encoding="utf-8-sig", errors="replace") as f:
+                sep = sniff_delimiter(f.read(CSV_SNIFF_BYTES))
+            bloques = pd.read_csv(
+                self.origen, sep=sep, dtype=str, encoding="utf-8-sig", encoding_errors="replace",
+                keep_default_na=False, chunksize=PADRON_BLOQUE_FILAS,
+            )
+            cols = None
+            for bloque in bloques:
+                if cols is None:
+                    cols = {k: next((c for c in alias if c in bloque.columns), None) for k, alias in PADRON_COLUMNAS.items()}
+                    if cols["cuit"] is None:
+                        raise KeyError(f"No se encontró ninguna de estas columnas: {PADRON_COLUMNAS['cuit']}")
+                cuit = pd.to_numeric(bloque[cols["cuit"]].str.replace(r"\D", "", regex=True), errors="coerce")
+                ok = cuit.between(10**10, 10**11 - 1).to_numpy(dtype=bool)
+                valores = [cuit[ok].astype(np.int64).tolist()]
+                for k in ("domicilio", "cp", "pcia", "cond"):
+                    v = bloque[cols[k]].str.strip() if cols[k] else pd.Series("", index=bloque.index)
+                    if k == "cond":
+                        v = v.str.upper()
+                        v = v.map(PADRON_COND_FISC).fillna(v)
+                    valores.append(v[ok].tolist())
+                con.executemany("INSERT OR REPLACE INTO padron VALUES (?, ?, ?, ?, ?)", zip(*valores))
+            con.execute("CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT)")
+            con.execute("INSERT INTO meta VALUES ('firma', ?)", (firma,))
+            con.commit()
+        finally:
+            con.close()
+        os.replace(tmp, self.base)
+
+    def close(self):
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._con.execute("SELECT COUNT(*) FROM padron").fetchone()[0]
+
+    def buscar(self, cuits) -> pd.DataFrame:
+        """
+        Datos del padrón de los `cuits` (texto de 11 dígitos, sin repetir), con un solo
+        join contra la clave primaria. Índice = CUIT; sólo los que están en el padrón.
+        """
+        with self._con:
+            self._con.execute("DELETE FROM consulta")
+            self._con.executemany("INSERT OR IGNORE INTO consulta VALUES (?)", ((int(c),) for c in cuits))
+        filas = self._con.execute(
+            "SELECT p.cuit, p.domicilio, p.cp, p.pcia, p.cond FROM consulta q JOIN padron p ON p.cuit = q.cuit"
+        ).fetchall()
+        datos = pd.DataFrame(filas, columns=["cuit", "Domicilio", "C.P.", "Pcia", "Cond Fisc"], dtype=object)
+        return datos.set_index(datos["cuit"].astype(str)).drop(columns="cuit")
+
+
+def completar_padron(salida: pd.DataFrame, padron: Padron) -> int:
+    """
+    Completa Domicilio, C.P., Pcia y Cond Fisc de los receptores con CUIT que figuran en
+    el padrón. Domicilio / C.P. / Pcia sólo si están vacíos; la Cond Fisc del padrón
+    reemplaza la deducida de letra + tipo de documento. Devuelve las líneas completadas.
+    """
+    cuit = salida["CUIT"].astype(str).to_numpy(dtype=object)
+    es_cuit = pd.Series(cuit).str.fullmatch(r"\d{11}").to_numpy(dtype=bool)
+    datos = padron.buscar(pd.unique(cuit[es_cuit]))
+    if datos.empty:
+        return 0
+    pos = datos.index.get_indexer(cuit)
+    encontrado = np.flatnonzero(es_cuit & (pos >= 0))
+    pos = pos[encontrado]
+    for col in ("Domicilio", "C.P.", "Pcia", "Cond Fisc"):
+        nuevo = datos[col].to_numpy(dtype=object)[pos]
+        actual = salida[col].to_numpy(dtype=object, copy=True)
+        usar = nuevo != ""
+        if col != "Cond Fisc":
+            usar &= actual[encontrado] == ""
+        actual[encontrado[usar]] = nuevo[usar]
+        salida[col] = actual
+    return len(encontrado)
+
+
+ARCA = registrar_fuente(Fuente(
+    id="arca",
+    nombre="ARCA Emitidos",
+    formatos=("csv", "xlsx"),
+    columnas={
+        "fecha": ("Fecha de Emisión", "Fecha", "Fecha de Emision"),
+        "tipo": ("Tipo de Comprobante", "Tipo"),
+        "pv": ("Punto de Venta", "Pto. Vta.", "Pto Vta", "Punto Venta"),
+        "nro_desde": ("Número Desde", "Numero Desde"),
+        "tipo_doc": ("Tipo Doc. Receptor", "Tipo Doc Receptor"),
+        "nro_doc": ("Nro. Doc. Receptor", "Nro Doc Receptor", "Nro Doc.", "Nro. Doc."),
+        "nombre": ("Denominación Receptor", "Denominacion Receptor"),
+        "iva_105": ("IVA 10,5%",),
+        "neto_105": ("Imp. Neto Gravado IVA 10,5%", "Neto Grav. IVA 10,5%"),
+        "iva_21": ("IVA 21%",),
+        "neto_21": ("Imp. Neto Gravado IVA 21%", "Neto Grav. IVA 21%"),
+        "iva_27": ("IVA 27%",),
+        "neto_27": ("Imp. Neto Gravado IVA 27%", "Neto Grav. IVA 27%"),
+        "neto_ng": ("Imp. Neto No Gravado", "Neto No Gravado"),
+        "exentas": ("Imp. Op. Exentas", "Op. Exentas"),
+        "otros": ("Otros Tributos",),
+        "total": ("Imp. Total",),
+    },
+    # USD: Tipo de cambio (J) y Moneda (K)
+    opcionales={
+        "tc": ("Tipo de cambio", "Tipo Cambio", "Tipo de Cambio"),
+        "moneda": ("Moneda", "Currency"),
+    },
+    listas={},
+))
+
+
+ARCA_IMPORTES = (
+    "neto_105", "iva_105", "neto_21", "iva_21", "neto_27", "iva_27", "neto_ng", "exentas", "otros", "total",
+)
+
+
+def arca_columns(df: pd.DataFrame) -> dict:
+    """
+    Resuelve una sola vez los nombres de columna del archivo ARCA.
+    "tc" y "moneda" son opcionales (None si no vienen).
+    """
+    return ARCA.resolver(df.columns)
+
+
+def _process_arca_rows(df: pd.DataFrame, kind: str, cols: dict,
+                       cotizaciones: pd.DataFrame | None = None) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    Motor original fila a fila (df.iterrows). Queda como respaldo del motor columnar.
+    """
+    warnings = Advertencias()
+    filas = filas_origen(df)
+    if cotizaciones is not None:
+        tc_tabla, fecha_tc_tabla = cotizacion_asof(df[cols["fecha"]], cotizaciones)
+        tc_tabla_fijo = a_fijo(np.nan_to_num(tc_tabla), TC_DECIMALES)
+
+    COL_FECHA = cols["fecha"]
+    COL_TIPO_COMP = cols["tipo"]
+    COL_PV = cols["pv"]
+    COL_NRO_DESDE = cols["nro_desde"]
+
+    COL_TIPO_DOC_REC = cols["tipo_doc"]
+    COL_NRO_DOC_REC = cols["nro_doc"]
+    COL_NOM_REC = cols["nombre"]
+
+    COL_TC = cols["tc"]
+    COL_MON = cols["moneda"]
+
+    COL_IVA_105 = cols["iva_105"]
+    COL_NETO_105 = cols["neto_105"]
+    COL_IVA_21 = cols["iva_21"]
+    COL_NETO_21 = cols["neto_21"]
+    COL_IVA_27 = cols["iva_27"]
+    COL_NETO_27 = cols["neto_27"]
+
+    COL_NETO_NG = cols["neto_ng"]
+    COL_EXENTAS = cols["exentas"]
+    COL_OTROS = cols["otros"]
+    COL_TOTAL = cols["total"]
+
+    registros = []
+
+    for pos, (_, row) in enumerate(df.iterrows()):
+        tipo_comp_raw = row.get(COL_TIPO_COMP, "")
+        if tipo_comp_raw is None or (isinstance(tipo_comp_raw, str) and not tipo_comp_raw.strip()):
+            continue
+
+        if kind == "csv":
+            cpbte, letra = decode_csv_tipo(tipo_comp_raw)
+        else:
+            cpbte, letra = map_tipo_from_text(tipo_comp_raw)
+
+        es_credito = (cpbte in CREDITOS_ARCA)
+
+        def sg(x: int) -> int:
+            return -abs(x) if es_credito else abs(x)
+
+        # --- conversión USD antes de seguir (centavos; tipo de cambio con TC_DECIMALES) ---
+        moneda = str(row.get(COL_MON, "") or "").strip().upper() if COL_MON else ""
+        tc = parse_fijo(row.get(COL_TC), TC_DECIMALES) if COL_TC else 0
+
+        if moneda == "USD" and tc == 0 and cotizaciones is not None and tc_tabla[pos] > 0:
+            tc = int(tc_tabla_fijo[pos])
+            warnings.agregar("usd_tc_tabla", filas[pos], cpbte=tipo_comp_raw, tc=tc_tabla[pos], fecha_tc=fecha_tc_tabla[pos])
+        if moneda == "USD" and tc == 0:
+            warnings.agregar("usd_sin_tc", filas[pos], cpbte=tipo_comp_raw)
+
+        def amt(colname: str) -> int:
+            v = parse_fijo(row.get(colname))
+            if moneda == "USD" and tc != 0:
+                return int(mul_tc(v, tc))
+            return v
+        # -----------------------------------
+
+        tdoc = tipo_doc(row.get(COL_TIPO_DOC_REC))
+        nro_doc = digits_only(row.get(COL_NRO_DOC_REC))
+
+        cuit_out = nro_doc
+        cond_fisc = ""
+
+        if letra == "A" and tdoc == 80:
+            cond_fisc = "RI"
+        elif letra == "B" and tdoc == 80:
+            cond_fisc = "EX"
+        elif letra == "B" and tdoc == 96 and nro_doc:
+            dni8 = nro_doc.zfill(8)
+            cuit_out = f"00-{dni8}-0"
+            cond_fisc = "CF"
+        elif letra == "B" and tdoc == 86 and nro_doc:
+            dni8 = nro_doc.zfill(8)
+            cuit_out = f"00-{dni8}-0"
+            cond_fisc = "CF"
+
+        exng_val = sg(amt(COL_NETO_NG) + amt(COL_EXENTAS))
+        otros_val = sg(amt(COL_OTROS))
+        total_val = sg(amt(COL_TOTAL))
+
+        netos_ivas = [
+            sg(amt(COL_NETO_105)), sg(amt(COL_IVA_105)),
+            sg(amt(COL_NETO_21)),  sg(amt(COL_IVA_21)),
+            sg(amt(COL_NETO_27)),  sg(amt(COL_IVA_27)),
+        ]
+
+        if exng_val == 0 and otros_val == 0 and total_val == 0 and all(v == 0 for v in netos_ivas):
+            continue
+
+        # --- Imp. Total contra la suma de lo que pasa a Holistor (sin importes se usa el total) ---
+        # se compara en la moneda del archivo: en USD cada importe convertido se redondea aparte
+        def origen(*colnames: str) -> int:
+            return sg(sum(parse_fijo(row.get(c)) for c in colnames))
+
+        total_calc = sum(netos_ivas) + exng_val + otros_val
+        total_calc_origen = (
+            sum(origen(c) for c in (COL_NETO_105, COL_IVA_105, COL_NETO_21, COL_IVA_21, COL_NETO_27, COL_IVA_27))
+            + origen(COL_NETO_NG, COL_EXENTAS) + origen(COL_OTROS)
+        )
+        con_importes = exng_val != 0 or otros_val != 0 or any(v != 0 for v in netos_ivas)
+        if con_importes and total_val != 0 and abs(total_calc_origen - origen(COL_TOTAL)) > ARCA_TOTAL_CENTAVOS:
+            warnings.agregar("total", filas[pos], total_origen=pesos(total_val), total_calc=pesos(total_calc))
+
+        # un CUIL de hasta 8 dígitos en factura B es un DNI; con 11 se controla como CUIL
+        tdoc_control = tipo_doc_control(row.get(COL_TIPO_DOC_REC))
+        como_dni = letra == "B" and tdoc_control in (96, 86) and len(nro_doc) <= DNI_DIGITOS[1]
+        motivo = documento_invalido(tdoc_control, nro_doc, como_dni=como_dni)
+        if motivo:
+            warnings.agregar("documento", filas[pos], tipo_doc=tdoc_control, documento=nro_doc, detalle=motivo)
+
+        base = {
+            "Fecha dd/mm/aaaa": fecha_out(row.get(COL_FECHA)),
+            "Cpbte": cpbte,
+            "Tipo": letra,
+            "Suc.": row.get(COL_PV),
+            "Número": row.get(COL_NRO_DESDE),
+            "Razón Social o Denominación Cliente": row.get(COL_NOM_REC),
+            "Tipo Doc.": tdoc,
+            "CUIT": cuit_out,
+            "Domicilio": "",
+            "C.P.": "",
+            "Pcia": "",
+            "Cond Fisc": cond_fisc,
+            # >>> antes de la columna M (Cód. Neto)
+            "Moneda": moneda,
+            "Tipo de cambio": tc / TC_ESCALA,
+            # <<<
+            "Cód. Neto": "",
+            "Cód. NG/EX": "",
+            "Cód. P/R": "",
+            "Pcia P/R": "",
+        }
+
+        filas_comp = []
+        aliquotas = [
+            (10.5, COL_NETO_105, COL_IVA_105),
+            (21.0, COL_NETO_21, COL_IVA_21),
+            (27.0, COL_NETO_27, COL_IVA_27),
+        ]
+
+        for aliq_val, col_neto, col_iva in aliquotas:
+            neto = sg(amt(col_neto))
+            iva = sg(amt(col_iva))
+            if neto == 0 and iva == 0:
+                continue
+
+            rec = base.copy()
+            rec["Neto Gravado"] = neto
+            rec["Alíc."] = aliq_val
+            rec["IVA Liquidado"] = iva
+            rec["IVA Débito"] = iva
+            rec["Conceptos NG/EX"] = 0
+            rec["Perc./Ret."] = 0
+            filas_comp.append(rec)
+
+        if filas_comp:
+            if exng_val != 0 or otros_val != 0:
+                filas_comp[0]["Conceptos NG/EX"] = exng_val
+                filas_comp[0]["Perc./Ret."] = otros_val
+        else:
+            rec = base.copy()
+            rec["Neto Gravado"] = 0
+            rec["Alíc."] = 0.0
+            rec["IVA Liquidado"] = 0
+            rec["IVA Débito"] = 0
+            if exng_val != 0 or otros_val != 0:
+                rec["Conceptos NG/EX"] = exng_val
+                rec["Perc./Ret."] = otros_val
+            else:
+                rec["Conceptos NG/EX"] = total_val
+                rec["Perc./Ret."] = 0
+            filas_comp.append(rec)
+
+        for rec in filas_comp:
+            rec["Total"] = rec["Neto Gravado"] + rec["IVA Liquidado"] + rec["Conceptos NG/EX"] + rec["Perc./Ret."]
+            registros.append(rec)
+
+    return _a_pesos(pd.DataFrame(registros, columns=COLS_SALIDA)), warnings
+
+
+def _a_pesos(salida: pd.DataFrame) -> pd.DataFrame:
+    # motores fila a fila: los importes se arman en centavos y se pasan a pesos al final
+    if len(salida):
+        salida[IMPORTES_SALIDA] = salida[IMPORTES_SALIDA].astype(np.int64) / 10 ** CENTAVOS
+    return salida
+
+
+def _process_arca_columnar(df: pd.DataFrame, kind: str, cols: dict, perf: Rendimiento,
+                           cotizaciones: pd.DataFrame | None = None) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    Motor columnar: mismas reglas que _process_arca_rows, pero cada paso
+    se resuelve sobre la columna completa y las alícuotas se apilan al final.
+    """
+    warnings = Advertencias()
+    n = len(df)
+
+    with perf.etapa("tipos de comprobante", n) as e:
+        tipo_raw = df[cols["tipo"]]
+        tipo_obj = tipo_raw.to_numpy(dtype=object)
+        vacio = np.equal(tipo_obj, None) | tipo_raw.astype("string").str.strip().eq("").fillna(False).to_numpy(dtype=bool)
+        valido = ~vacio
+
+        # un export trae pocos tipos distintos: se decodifica cada uno una sola vez
+        decode = decode_csv_tipo if kind == "csv" else map_tipo_from_text
+        cpbte = map_distinct(tipo_raw, lambda v: decode(v)[0])
+        letra = map_distinct(tipo_raw, lambda v: decode(v)[1])
+        es_credito = np.isin(cpbte, list(CREDITOS_ARCA))
+        e.filas_out = int(valido.sum())
+
+    with perf.etapa("importes", n) as e:
+        # --- conversión USD antes de seguir ---
+        if cols["moneda"]:
+            moneda = map_distinct(df[cols["moneda"]], text_upper)
+        else:
+            moneda = np.full(n, "", dtype=object)
+        tc = parse_fijo_col(df[cols["tc"]], TC_DECIMALES) if cols["tc"] else np.zeros(n, dtype=np.int64)
+
+        es_usd = moneda == "USD"
+        sin_tc = valido & es_usd & (tc == 0)
+        if cotizaciones is not None and sin_tc.any():
+            # sólo las filas USD sin TC, en un solo as-of join por fecha de emisión
+            idx = np.flatnonzero(sin_tc)
+            tc_tabla, fecha_tc = cotizacion_asof(df[cols["fecha"]].iloc[idx], cotizaciones)
+            ok = tc_tabla > 0
+            idx, tc_tabla, fecha_tc = idx[ok], tc_tabla[ok], fecha_tc[ok]
+            tc = tc.copy()
+            tc[idx] = a_fijo(tc_tabla, TC_DECIMALES)
+            sin_tc[idx] = False
+            warnings.agregar("usd_tc_tabla", filas_origen(df)[idx], cpbte=tipo_obj[idx], tc=tc_tabla, fecha_tc=fecha_tc)
+        warnings.agregar_mascara("usd_sin_tc", sin_tc, filas_origen(df), cpbte=tipo_obj)
+        convertir = es_usd & (tc != 0)
+
+        centavos = {key: parse_fijo_col(df[cols[key]]) for key in ARCA_IMPORTES}  # moneda del archivo
+
+        def amt(key: str) -> np.ndarray:
+            return np.where(convertir, mul_tc(centavos[key], tc), centavos[key])
+
+        exng = sign_col(amt("neto_ng") + amt("exentas"), es_credito)
+        otros = sign_col(amt("otros"), es_credito)
+        total = sign_col(amt("total"), es_credito)
+
+        netos = np.column_stack([sign_col(amt(k), es_credito) for k in ("neto_105", "neto_21", "neto_27")])
+        ivas = np.column_stack([sign_col(amt(k), es_credito) for k in ("iva_105", "iva_21", "iva_27")])
+
+        con_aliq = (netos != 0) | (ivas != 0)
+        vacios = (exng == 0) & (otros == 0) & (total == 0) & ~con_aliq.any(axis=1)
+        keep = valido & ~vacios
+        con_aliq &= keep[:, None]
+        e.filas_out = int(keep.sum())
+
+    with perf.etapa("controles", int(keep.sum())) as e:
+        # --- Imp. Total contra la suma de lo que pasa a Holistor (sin importes se usa el total) ---
+        # se compara en la moneda del archivo: en USD cada importe convertido se redondea aparte
+        def origen(*keys: str) -> np.ndarray:
+            return sign_col(sum(centavos[k] for k in keys), es_credito)
+
+        total_calc = netos[:, 0] + ivas[:, 0] + netos[:, 1] + ivas[:, 1] + netos[:, 2] + ivas[:, 2] + exng + otros
+        total_calc_origen = (
+            sum(origen(k) for k in ("neto_105", "iva_105", "neto_21", "iva_21", "neto_27", "iva_27"))
+            + origen("neto_ng", "exentas") + origen("otros")
+        )
+        con_importes = con_aliq.any(axis=1) | (exng != 0) | (otros != 0)
+        warn_total = (
+            keep & con_importes & (total != 0)
+            & (np.abs(total_calc_origen - origen("total")) > ARCA_TOTAL_CENTAVOS)
+        )
+        warnings.agregar_mascara(
+            "total", warn_total, filas_origen(df), total_origen=pesos(total), total_calc=pesos(total_calc),
+        )
+        e.filas_out = int(warn_total.sum())
+
+    with perf.etapa("alícuotas", int(keep.sum())) as e:
+        # --- expansión por alícuota (stack): una línea por (fila, alícuota) con importes ---
+        src_aliq, slot_aliq = np.nonzero(con_aliq)
+        src_sin = np.flatnonzero(keep & ~con_aliq.any(axis=1))
+        src = np.concatenate([src_aliq, src_sin])
+        slot = np.concatenate([slot_aliq, np.full(len(src_sin), 3)])
+        orden = np.lexsort((slot, src))
+        src = src[orden]
+        slot = slot[orden]
+
+        if not len(src):
+            return pd.DataFrame(columns=COLS_SALIDA), warnings
+
+        primera = np.ones(len(src), dtype=bool)
+        primera[1:] = src[1:] != src[:-1]
+        es_aliq = slot < 3
+        k = np.minimum(slot, 2)
+
+        neto = np.where(es_aliq, netos[src, k], 0)
+        iva = np.where(es_aliq, ivas[src, k], 0)
+        aliq = np.array([10.5, 21.0, 27.0, 0.0])[slot]
+
+        # NG/EX y otros tributos van en la primera línea; sin alícuotas ni NG/EX ni otros => Imp. Total
+        sin_ngex = (exng[src] == 0) & (otros[src] == 0)
+        ngex = np.where(primera, np.where(~es_aliq & sin_ngex, total[src], exng[src]), 0)
+        perc = np.where(primera, otros[src], 0)
+        e.filas_out = len(src)
+
+    with perf.etapa("receptor", n):
+        # --- receptor: Cond Fisc y CUIT según letra + tipo doc ---
+        tdoc = map_distinct(df[cols["tipo_doc"]], tipo_doc).astype(np.int64)
+        nro_doc = pd.Series(map_distinct(df[cols["nro_doc"]], digits_only), dtype=object)
+        dni = ("00-" + nro_doc.str.zfill(8) + "-0").to_numpy(dtype=object)
+        largo = nro_doc.str.len().to_numpy()
+        nro_doc = nro_doc.to_numpy(dtype=object)
+        con_doc = nro_doc != ""
+
+        es_a = letra == "A"
+        es_b = letra == "B"
+        cond_ri = es_a & (tdoc == 80)
+        cond_ex = es_b & (tdoc == 80)
+        cond_cf = es_b & ((tdoc == 96) | (tdoc == 86)) & con_doc
+        cond_fisc = np.select([cond_ri, cond_ex, cond_cf], ["RI", "EX", "CF"], default="").astype(object)
+        cuit_out = np.where(cond_cf, dni, nro_doc)
+
+        # un CUIL de hasta 8 dígitos en factura B es un DNI; con 11 se controla como CUIL
+        tdoc_control = map_distinct(df[cols["tipo_doc"]], tipo_doc_control).astype(np.int64)
+        como_dni = es_b & np.isin(tdoc_control, (96, 86)) & (largo <= DNI_DIGITOS[1])
+        motivo = documentos_invalidos(tdoc_control, nro_doc, como_dni=como_dni)
+        warnings.agregar_mascara(
+            "documento", keep & (motivo != ""), filas_origen(df), tipo_doc=tdoc_control, documento=nro_doc,
+            detalle=motivo,
+        )
+
+    with perf.etapa("fechas", n):
+        fechas = fecha_out_col(df[cols["fecha"]])
+
+    vacio_col = np.full(len(src), "", dtype=object)
+
+    with perf.etapa("armado salida", len(src)) as e:
+        salida = pd.DataFrame({
+            "Fecha dd/mm/aaaa": fechas[src],
+            "Cpbte": cpbte[src],
+            "Tipo": letra[src],
+            "Suc.": df[cols["pv"]].to_numpy(dtype=object)[src],
+            "Número": df[cols["nro_desde"]].to_numpy(dtype=object)[src],
+            "Razón Social o Denominación Cliente": df[cols["nombre"]].to_numpy(dtype=object)[src],
+            "Tipo Doc.": tdoc[src],
+            "CUIT": cuit_out[src],
+            "Domicilio": vacio_col,
+            "C.P.": vacio_col,
+            "Pcia": vacio_col,
+            "Cond Fisc": cond_fisc[src],
+            "Moneda": moneda[src],
+            "Tipo de cambio": tc[src] / TC_ESCALA,
+            "Cód. Neto": vacio_col,
+            "Neto Gravado": pesos(neto),
+            "Alíc.": aliq,
+            "IVA Liquidado": pesos(iva),
+            "IVA Débito": pesos(iva),
+            "Cód. NG/EX": vacio_col,
+            "Conceptos NG/EX": pesos(ngex),
+            "Cód. P/R": vacio_col,
+            "Perc./Ret.": pesos(perc),
+            "Pcia P/R": vacio_col,
+            "Total": pesos(neto + iva + ngex + perc),
+        })
+        salida = salida.infer_objects()
+        e.filas_out = len(salida)
+    return salida, warnings
+
+
+def _process_arca_frame(df: pd.DataFrame, kind: str, cols: dict, engine: str, perf: Rendimiento,
+                        cotizaciones: pd.DataFrame | None = None) -> tuple[pd.DataFrame, Advertencias]:
+    if engine == "rows":
+        with perf.etapa("conversión (filas)", len(df)) as e:
+            salida, warns = _process_arca_rows(df, kind, cols, cotizaciones)
+            e.filas_out = len(salida)
+        return salida, warns
+    return _process_arca_columnar(df, kind, cols, perf, cotizaciones)
+
+
+def _filtrar_registrados(df: pd.DataFrame, kind: str, cols: dict, registro: RegistroComprobantes,
+                         cuit_emisor: str, vistas: set, warnings: Advertencias) -> pd.DataFrame:
+    """
+    Saca de `df` los comprobantes ya registrados y los repetidos dentro del archivo
+    (`vistas`: claves de los bloques anteriores; se actualiza), con su advertencia.
+    """
+    decode = decode_csv_tipo if kind == "csv" else map_tipo_from_text
+    tipo = df[cols["tipo"]]
+    claves = _claves(
+        cuit_emisor,
+        map_distinct(tipo, lambda v: decode(v)[0]),
+        map_distinct(tipo, lambda v: decode(v)[1]),
+        df[cols["pv"]], df[cols["nro_desde"]], df.index,
+    )
+    completa = claves["completa"].to_numpy(dtype=bool)
+    mi = pd.MultiIndex.from_frame(claves[CLAVE_COMPROBANTE[1:]])
+    repetida = mi.duplicated()
+    if vistas:
+        repetida |= mi.isin(vistas)
+    repetida &= completa
+
+    a_consultar = completa & ~repetida
+    registrada = np.zeros(len(df), dtype=bool)
+    registrada[a_consultar] = registro.contiene(claves[a_consultar])
+    vistas.update(mi[a_consultar])
+
+    filas = filas_origen(df)
+    valores = {c: claves[c].to_numpy(dtype=object) for c in ("cpbte", "letra", "suc", "numero")}
+    warnings.agregar_mascara("duplicado_archivo", repetida, filas, **valores)
+    warnings.agregar_mascara("duplicado_registro", registrada, filas, **valores)
+    return df[~(repetida | registrada)]
+
+
+def process_arca(uploaded, engine: str = "columnar", chunksize: int = CSV_CHUNK_ROWS,
+                 perf: Rendimiento | None = None, registro: RegistroComprobantes | None = None,
+                 cuit_emisor: str | None = None, snapshots: Snapshots | None = None,
+                 cols: dict | None = None, fila_header: int | None = None,
+                 cotizaciones: str | None = str(COTIZACIONES_PATH),
+                 padron: str | None = str(PADRON_PATH)) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    engine="columnar" (por defecto) o "rows" (motor fila a fila, respaldo).
+    Ambos motores producen la misma salida.
+    Los CSV se leen y convierten por bloques de `chunksize` filas.
+    `perf` (opcional) acumula tiempos/filas por etapa.
+    Con `registro`, sólo se convierten los comprobantes nuevos: los ya registrados para
+    `cuit_emisor` (si no se indica, se busca en el archivo) y los repetidos dentro del
+    archivo se omiten con advertencia.
+    Con `snapshots`, la tabla leída de un XLSX se reutiliza entre corridas del mismo archivo.
+    `cols` y `fila_header` son las columnas y la fila de encabezados ya halladas por
+    detectar_fuente (si no, se buscan al leer).
+    `cotizaciones` es la tabla de cotizaciones USD (ver load_cotizaciones; None = no usarla)
+    y `padron` el padrón de receptores (ver Padron; None = no usarlo).
+    """
+    perf = perf or Rendimiento()
+    warnings = Advertencias()
+    tabla_tc = load_cotizaciones(cotizaciones)
+    if registro is not None:
+        cuit_emisor = exigir_cuit_emisor(detectar_cuit_emisor(uploaded) if cuit_emisor is None else cuit_emisor)
+    vistas: set = set()
+
+    def convertir(df: pd.DataFrame, kind: str, cols: dict) -> pd.DataFrame:
+        if registro is not None:
+            with perf.etapa("registro", len(df)) as e:
+                df = _filtrar_registrados(df, kind, cols, registro, cuit_emisor, vistas, warnings)
+                e.filas_out = len(df)
+        parte, warns = _process_arca_frame(df, kind, cols, engine, perf, tabla_tc)
+        warnings.extender(warns)
+        return parte
+
+    if is_csv(uploaded):
+        partes: list[pd.DataFrame] = []
+        chunks = read_arca_chunks(uploaded, chunksize)
+        while True:
+            with perf.etapa("lectura") as e:
+                chunk = next(chunks, None)
+                e.filas_out = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+            if cols is None:
+                cols = arca_columns(chunk)
+            parte = convertir(chunk, "csv", cols)
+            if not parte.empty:
+                partes.append(parte)
+        with perf.etapa("unión bloques", sum(len(p) for p in partes)):
+            salida = pd.concat(partes, ignore_index=True).infer_objects() if partes else pd.DataFrame(columns=COLS_SALIDA)
+    else:
+        avance = partial(perf.avanzar, "lectura")
+        df = read_xlsx_snapshot(uploaded, "arca", lambda f: read_arca(f, avance, fila_header)[0], snapshots, perf)
+        salida = convertir(df, "xlsx", cols or arca_columns(df))
+
+    if salida.empty:
+        if warnings.conteo.get("duplicado_registro") or warnings.conteo.get("duplicado_archivo"):
+            raise SinComprobantesNuevos("No hay comprobantes nuevos: todos ya estaban registrados como convertidos.")
+        raise ValueError("No se encontraron comprobantes con importes.")
+
+    if padron and os.path.exists(padron):
+        # la primera vez (o si el padrón cambió) incluye indexarlo
+        with perf.etapa("padrón", len(salida)) as e, Padron(padron) as pad:
+            e.filas_out = completar_padron(salida, pad)
+
+    return salida, warnings
+
+
+# ---------------- Pastor Chess ----------------
+PASTOR_SKIP = {"ANTICIPO", "COMODATO ACTIVOS FIJOS", "SOBRANTE DE LIQUIDACION", "RECIBO"}
+
+PASTOR_PERCEP_MAP = [
+    ("Percepción 3337", "PV07"),
+    ("Percepción 5329", "PV07"),
+    ("Percepción 212", "PV06"),
+    ("I.I.B.B(SANTA FE)", "PV06"),
+    ("I.I.B.B(FORMOSA)", "PV06"),
+]
+
+
+PASTOR_CPBTE = {"FACTURA": "F", "NOTA DE CREDITO": "NC", "NOTA DE DEBITO": "ND"}
+PASTOR_IVA_CENTAVOS = 1  # diferencia admitida entre el IVA y el 21% del neto
+
+
+PASTOR = registrar_fuente(Fuente(
+    id="pastor",
+    nombre="Ventas Pastor Chess",
+    formatos=("xlsx",),
+    columnas={
+        "fecha": ("Fecha Comprobante",),
+        "desc": ("Descripcion Comprobante", "Descripción Comprobante", "Comprobante"),
+        "letra": ("Letra",),
+        "suc": ("Serie \\ Punto de venta", "Serie / Punto de venta", "Serie / Punto de Venta", "Punto de Venta", "Punto de venta"),
+        "num": ("Numero", "Número"),
+        "rs": ("Razon Social", "Razón Social"),
+        "tdoc": ("Tipo Id", "Tipo ID", "Tipo Id."),
+        "ndoc": ("Identificador", "Código Identificación", "Codigo Identificacion"),
+        "pcia": ("Provincia", "Pcia", "BN"),
+        "cond": ("Tipo IVA", "Condición fiscal", "Condicion fiscal", "Cond Fisc"),
+        "neto": ("Subtotal Neto", "Neto", "Neto Gravado"),
+        "iva": ("I.V.A", "IVA"),
+        "total": ("Subtotal Final", "Total"),
+    },
+    opcionales={},
+    listas={"percep": tuple(c for c, _ in PASTOR_PERCEP_MAP)},
+))
+PASTOR_HEADER_HINTS = tuple(alias for aliases in PASTOR.columnas.values() for alias in aliases)
+
+
+def pastor_columns(df: pd.DataFrame) -> dict:
+    """
+    Resuelve una sola vez los nombres de columna de Ventas Pastor Chess.
+    "percep" lista las columnas de PASTOR_PERCEP_MAP presentes en el archivo.
+    """
+    return PASTOR.resolver(df.columns)
+
+
+def _process_pastor_rows(df: pd.DataFrame, cols: dict) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    Motor original fila a fila (df.iterrows). Queda como respaldo del motor columnar.
+    """
+    warnings = Advertencias()
+    filas = filas_origen(df)
+
+    COL_FECHA = cols["fecha"]
+    COL_DESC_COMP = cols["desc"]
+    COL_LETRA = cols["letra"]
+    COL_SUC = cols["suc"]
+    COL_NUM = cols["num"]
+    COL_RS = cols["rs"]
+    COL_TDOC = cols["tdoc"]
+    COL_NDOC = cols["ndoc"]
+    COL_PCIA = cols["pcia"]
+    COL_COND = cols["cond"]
+
+    COL_NETO = cols["neto"]
+    COL_IVA = cols["iva"]
+    COL_TOTAL = cols["total"]
+
+    registros = []
+
+    for pos, (_, row) in enumerate(df.iterrows()):
+        desc = str(row.get(COL_DESC_COMP, "") or "").strip().upper()
+        if not desc:
+            continue
+        if desc in PASTOR_SKIP:
+            continue
+
+        if desc == "FACTURA":
+            cpbte = "F"
+        elif desc == "NOTA DE CREDITO":
+            cpbte = "NC"
+        elif desc == "NOTA DE DEBITO":
+            cpbte = "ND"
+        else:
+            continue
+
+        es_credito = (cpbte == "NC")
+
+        def sg(x: int) -> int:
+            return -abs(x) if es_credito else abs(x)
+
+        letra = str(row.get(COL_LETRA, "") or "").strip().upper()
+        suc = row.get(COL_SUC)
+        nro = row.get(COL_NUM)
+        rs = row.get(COL_RS)
+
+        tdoc = tipo_doc(row.get(COL_TDOC))
+        nro_doc = digits_only(row.get(COL_NDOC))
+
+        cuit_out = nro_doc
+        if tdoc == 96 and nro_doc:
+            dni8 = nro_doc.zfill(8)
+            cuit_out = f"00-{dni8}-0"
+
+        cond = str(row.get(COL_COND, "") or "").strip().upper()
+        if cond == "MT":
+            cond = "MTD"
+
+        pcia = str(row.get("BN", row.get(COL_PCIA, "")) or "").strip()
+
+        neto = sg(parse_fijo(row.get(COL_NETO)))
+        iva = sg(parse_fijo(row.get(COL_IVA)))
+        total_origen = sg(parse_fijo(row.get(COL_TOTAL)))
+
+        if neto != 0:
+            esperado = int(div_redondeo(abs(neto) * 21, 100))
+            if abs(abs(iva) - esperado) > PASTOR_IVA_CENTAVOS:
+                warnings.agregar("iva_21", filas[pos], neto=pesos(neto), iva=pesos(iva), esperado=pesos(sg(esperado)))
+
+        percs = []
+        for col_name, cod_pr in PASTOR_PERCEP_MAP:
+            if col_name in cols["percep"]:
+                val = sg(parse_fijo(row.get(col_name)))
+                if val != 0:
+                    percs.append((cod_pr, val, col_name))
+
+        if neto == 0 and iva == 0 and not percs:
+            continue
+
+        tdoc_control = tipo_doc_control(row.get(COL_TDOC))
+        motivo = documento_invalido(tdoc_control, nro_doc)
+        if motivo:
+            warnings.agregar("documento", filas[pos], tipo_doc=tdoc_control, documento=nro_doc, detalle=motivo)
+
+        base = {
+            "Fecha dd/mm/aaaa": fecha_out(row.get(COL_FECHA)),
+            "Cpbte": cpbte,
+            "Tipo": letra,
+            "Suc.": suc,
+            "Número": nro,
+            "Razón Social o Denominación Cliente": rs,
+            "Tipo Doc.": tdoc,
+            "CUIT": cuit_out,
+            "Domicilio": "",
+            "C.P.": "",
+            "Pcia": pcia,
+            "Cond Fisc": cond,
+            # >>> antes de la columna M (Cód. Neto)
+            "Moneda": "",
+            "Tipo de cambio": 0.0,
+            # <<<
+            "Cód. Neto": "135",
+            "Cód. NG/EX": "",
+            "Cód. P/R": "",
+            "Pcia P/R": "",
+        }
+
+        lineas = []
+
+        main = base.copy()
+        main["Neto Gravado"] = neto
+        main["Alíc."] = 21.0
+        main["IVA Liquidado"] = iva
+        main["IVA Débito"] = iva
+        main["Conceptos NG/EX"] = 0
+        main["Perc./Ret."] = 0
+
+        if percs:
+            cod_pr0, val0, _ = percs[0]
+            main["Cód. P/R"] = cod_pr0
+            main["Perc./Ret."] = val0
+
+        main["Total"] = main["Neto Gravado"] + main["IVA Liquidado"] + main["Conceptos NG/EX"] + main["Perc./Ret."]
+        lineas.append(main)
+
+        if len(percs) > 1:
+            for cod_pr, val, _colname in percs[1:]:
+                extra = base.copy()
+                extra["Neto Gravado"] = 0
+                extra["Alíc."] = 0.0
+                extra["IVA Liquidado"] = 0
+                extra["IVA Débito"] = 0
+                extra["Conceptos NG/EX"] = 0
+                extra["Cód. P/R"] = cod_pr
+                extra["Perc./Ret."] = val
+                extra["Total"] = val
+                lineas.append(extra)
+
+        total_calc = sum(x["Total"] for x in lineas)
+        if total_origen != 0 and total_calc != total_origen:
+            warnings.agregar("total", filas[pos], total_origen=pesos(total_origen), total_calc=pesos(total_calc))
+
+        registros.extend(lineas)
+
+    return _a_pesos(pd.DataFrame(registros, columns=COLS_SALIDA)), warnings
+
+
+def _process_pastor_columnar(df: pd.DataFrame, cols: dict, perf: Rendimiento) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    Motor columnar: mismas reglas que _process_pastor_rows. La primera percepción
+    va en la línea principal y el resto se apila como líneas extra.
+    """
+    warnings = Advertencias()
+    n = len(df)
+
+    with perf.etapa("tipos de comprobante", n) as e:
+        desc = pd.Series(map_distinct(df[cols["desc"]], text_upper), dtype=object)
+        cpbte = desc.map(PASTOR_CPBTE).fillna("").to_numpy(dtype=object)
+        valido = (cpbte != "") & ~desc.isin(PASTOR_SKIP).to_numpy(dtype=bool)
+        es_credito = cpbte == "NC"
+        e.filas_out = int(valido.sum())
+
+    with perf.etapa("importes", n) as e:
+        neto = sign_col(parse_fijo_col(df[cols["neto"]]), es_credito)
+        iva = sign_col(parse_fijo_col(df[cols["iva"]]), es_credito)
+        total_origen = sign_col(parse_fijo_col(df[cols["total"]]), es_credito)
+
+        # --- percepciones: matriz (fila x columna presente) + columna centinela en 0 ---
+        cod_pr_map = dict(PASTOR_PERCEP_MAP)
+        k = len(cols["percep"])
+        percs = np.zeros((len(df), k + 1), dtype=np.int64)
+        for j, col_name in enumerate(cols["percep"]):
+            percs[:, j] = sign_col(parse_fijo_col(df[col_name]), es_credito)
+        cod_pr = np.array([cod_pr_map[c] for c in cols["percep"]] + [""], dtype=object)
+
+        con_perc = percs != 0
+        rango = np.cumsum(con_perc, axis=1) - 1
+        hay_perc = con_perc.any(axis=1)
+        j0 = np.where(hay_perc, np.argmax(con_perc, axis=1), k)
+        perc0 = percs[np.arange(len(df)), j0]
+
+        keep = valido & ~((neto == 0) & (iva == 0) & ~hay_perc)
+        e.filas_out = int(keep.sum())
+
+    with perf.etapa("controles", int(valido.sum())):
+        # --- control IVA 21% (±PASTOR_IVA_CENTAVOS, en centavos) ---
+        esperado = div_redondeo(np.abs(neto) * 21, 100)
+        warn_iva = valido & (neto != 0) & (np.abs(np.abs(iva) - esperado) > PASTOR_IVA_CENTAVOS)
+
+        # --- control de total: línea principal + percepciones extra ---
+        total_main = neto + iva + perc0
+        total_calc = total_main.copy()
+        for j in range(k):
+            total_calc += np.where(con_perc[:, j] & (rango[:, j] >= 1), percs[:, j], 0)
+        warn_total = keep & (total_origen != 0) & (total_calc != total_origen)
+
+        filas = filas_origen(df)
+        warnings.agregar_mascara(
+            "iva_21", warn_iva, filas, neto=pesos(neto), iva=pesos(iva), esperado=pesos(sign_col(esperado, es_credito)),
+        )
+        warnings.agregar_mascara("total", warn_total, filas, total_origen=pesos(total_origen), total_calc=pesos(total_calc))
+
+    with perf.etapa("percepciones / líneas", int(keep.sum())) as e:
+        # --- líneas: principal (slot 0) + una por percepción extra (slot j+1), apiladas ---
+        src_main = np.flatnonzero(keep)
+        src_extra, j_extra = np.nonzero(con_perc & (rango >= 1) & keep[:, None])
+        src = np.concatenate([src_main, src_extra])
+        slot = np.concatenate([np.zeros(len(src_main), dtype=np.int64), j_extra + 1])
+        orden = np.lexsort((slot, src))
+        src = src[orden]
+        slot = slot[orden]
+
+        if not len(src):
+            return pd.DataFrame(columns=COLS_SALIDA), warnings
+
+        es_main = slot == 0
+        val_extra = percs[src, slot - 1]
+
+        neto_l = np.where(es_main, neto[src], 0)
+        iva_l = np.where(es_main, iva[src], 0)
+        perc_l = np.where(es_main, perc0[src], val_extra)
+        total_l = np.where(es_main, total_main[src], val_extra)
+        cod_l = np.where(es_main, cod_pr[j0[src]], cod_pr[slot - 1])
+        e.filas_out = len(src)
+
+    with perf.etapa("receptor", n):
+        # --- receptor ---
+        tdoc = map_distinct(df[cols["tdoc"]], tipo_doc).astype(np.int64)
+        nro_doc = pd.Series(map_distinct(df[cols["ndoc"]], digits_only), dtype=object)
+        dni = ("00-" + nro_doc.str.zfill(8) + "-0").to_numpy(dtype=object)
+        nro_doc = nro_doc.to_numpy(dtype=object)
+        cuit_out = np.where((tdoc == 96) & (nro_doc != ""), dni, nro_doc)
+
+        tdoc_control = map_distinct(df[cols["tdoc"]], tipo_doc_control).astype(np.int64)
+        motivo = documentos_invalidos(tdoc_control, nro_doc)
+        warnings.agregar_mascara(
+            "documento", keep & (motivo != ""), filas_origen(df), tipo_doc=tdoc_control, documento=nro_doc,
+            detalle=motivo,
+        )
+
+        cond = map_distinct(df[cols["cond"]], lambda v: "MTD" if text_upper(v) == "MT" else text_upper(v))
+        col_pcia = "BN" if "BN" in df.columns else cols["pcia"]
+        pcia = map_distinct(df[col_pcia], lambda v: str(v or "").strip())
+        letra = map_distinct(df[cols["letra"]], text_upper)
+
+    with perf.etapa("fechas", n):
+        fechas = fecha_out_col(df[cols["fecha"]])
+
+    m = len(src)
+    vacio_col = np.full(m, "", dtype=object)
+    with perf.etapa("armado salida", m) as e:
+        salida = pd.DataFrame({
+            "Fecha dd/mm/aaaa": fechas[src],
+            "Cpbte": cpbte[src],
+            "Tipo": letra[src],
+            "Suc.": df[cols["suc"]].to_numpy(dtype=object)[src],
+            "Número": df[cols["num"]].to_numpy(dtype=object)[src],
+            "Razón Social o Denominación Cliente": df[cols["rs"]].to_numpy(dtype=object)[src],
+            "Tipo Doc.": tdoc[src],
+            "CUIT": cuit_out[src],
+            "Domicilio": vacio_col,
+            "C.P.": vacio_col,
+            "Pcia": pcia[src],
+            "Cond Fisc": cond[src],
+            "Moneda": vacio_col,
+            "Tipo de cambio": np.zeros(m),
+            "Cód. Neto": np.full(m, "135", dtype=object),
+            "Neto Gravado": pesos(neto_l),
+            "Alíc.": np.where(es_main, 21.0, 0.0),
+            "IVA Liquidado": pesos(iva_l),
+            "IVA Débito": pesos(iva_l),
+            "Cód. NG/EX": vacio_col,
+            "Conceptos NG/EX": np.zeros(m),
+            "Cód. P/R": cod_l,
+            "Perc./Ret.": pesos(perc_l),
+            "Pcia P/R": vacio_col,
+            "Total": pesos(total_l),
+        })
+        salida = salida.infer_objects()
+        e.filas_out = len(salida)
+    return salida, warnings
+
+
+def process_pastor(uploaded, engine: str = "columnar", perf: Rendimiento | None = None,
+                   snapshots: Snapshots | None = None, cols: dict | None = None,
+                   fila_header: int | None = None) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    engine="columnar" (por defecto) o "rows" (motor fila a fila, respaldo).
+    Ambos motores producen la misma salida.
+    `perf` (opcional) acumula tiempos/filas por etapa; `snapshots`, `cols` y `fila_header`
+    como en process_arca.
+    """
+    perf = perf or Rendimiento()
+    avance = partial(perf.avanzar, "lectura")
+    df = read_xlsx_snapshot(
+        uploaded, "pastor",
+        lambda f: read_xlsx_table(f, PASTOR_HEADER_HINTS, avance=avance, fila_header=fila_header), snapshots, perf,
+    )
+    cols = cols or pastor_columns(df)
+
+    if engine == "rows":
+        with perf.etapa("conversión (filas)", len(df)) as e:
+            salida, warnings = _process_pastor_rows(df, cols)
+            e.filas_out = len(salida)
+    else:
+        salida, warnings = _process_pastor_columnar(df, cols, perf)
+
+    if salida.empty:
+        raise ValueError("No se encontraron comprobantes con importes (Pastor Chess).")
+
+    return salida, warnings
+
+
+# ---------------- Export ----------------
+XLSX_OPTIONS = {
+    "constant_memory": True,  # cada fila se vuelca a disco al pasar a la siguiente
+    "strings_to_numbers": False,
+    "strings_to_formulas": False,
+    "strings_to_urls": False,
+}
+XLSX_HEADER_FMT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+
+def holistor_formats(wb) -> dict:
+    """
+    Ancho y formato por columna de la hoja Holistor: {columna: (ancho, formato)}.
+    """
+    money_fmt = wb.add_format({"num_format": "#,##0.00"})
+    aliq_fmt = wb.add_format({"num_format": "00.000"})
+    text_fmt = wb.add_format({"num_format": "@"})  # texto
+
+    formatos = {
+        "Fecha dd/mm/aaaa": (12, text_fmt),
+        "Cpbte": (6, None),
+        "Tipo": (6, None),
+        "Suc.": (10, None),
+        "Número": (12, None),
+        "Razón Social o Denominación Cliente": (42, None),
+        "CUIT": (16, None),
+        "Moneda": (10, None),
+        "Tipo de cambio": (12, money_fmt),
+        "Alíc.": (8, aliq_fmt),
+    }
+    for nombre in ["Neto Gravado", "IVA Liquidado", "IVA Débito", "Conceptos NG/EX", "Perc./Ret.", "Total"]:
+        formatos[nombre] = (16, money_fmt)
+    return formatos
+
+
+def write_sheet(wb, sheet_name: str, df: pd.DataFrame, formatos: dict | None = None):
+    """
+    Escribe `df` en una hoja nueva fila a fila (apto para constant_memory), sin pasar
+    por DataFrame.to_excel: cada columna usa write_number / write_string según su tipo
+    y los vacíos (NaN/None/"") quedan como celdas vacías.
+    """
+    ws = wb.add_worksheet(sheet_name)
+    for c, nombre in enumerate(df.columns):
+        if formatos and nombre in formatos:
+            ancho, fmt = formatos[nombre]
+            ws.set_column(c, c, ancho, fmt)
+
+    header_fmt = wb.add_format(XLSX_HEADER_FMT)
+    for c, nombre in enumerate(df.columns):
+        ws.write_string(0, c, str(nombre), header_fmt)
+
+    writers = []
+    columnas = []
+    for nombre in df.columns:
+        col = df[nombre]
+        if pd.api.types.is_bool_dtype(col):
+            writers.append(ws.write_boolean)
+        elif pd.api.types.is_numeric_dtype(col):
+            writers.append(ws.write_number)
+        elif pd.api.types.is_string_dtype(col) and col.dtype != object:
+            writers.append(ws.write_string)
+        else:
+            writers.append(ws.write)
+        columnas.append(col.astype(object).where(col.notna(), None).tolist())
+
+    for r, fila in enumerate(zip(*columnas), start=1):
+        for c, v in enumerate(fila):
+            if v is not None and v != "":
+                writers[c](r, c, v)
+    return ws
+
+
+RESUMEN_CLAVES = ["Cpbte", "Tipo", "Alíc.", "Cond Fisc"]
+RESUMEN_IMPORTES = ["Neto Gravado", "IVA Liquidado", "Conceptos NG/EX", "Perc./Ret.", "Total"]
+
+
+def resumen_iva(salida: pd.DataFrame) -> pd.DataFrame:
+    """
+    Resumen de IVA Ventas: importes y cantidad de líneas por Cpbte / Tipo / Alíc. / Cond Fisc,
+    en un solo groupby sobre la salida, más una fila de total general.
+    """
+    # las sumas se hacen en centavos (exactas) y se pasan a pesos al final
+    centavos = a_fijo(salida[RESUMEN_IMPORTES].fillna(0).to_numpy(dtype=np.float64))
+    montos = pd.DataFrame(centavos, columns=RESUMEN_IMPORTES, index=salida.index)
+    grupos = montos.groupby([salida[c] for c in RESUMEN_CLAVES], sort=True, dropna=False)
+    resumen = grupos.sum()
+    resumen.insert(0, "Líneas", grupos.size())
+    resumen = resumen.reset_index()
+    total = {c: "" for c in RESUMEN_CLAVES} | {"Cpbte": "Total"} | resumen[["Líneas", *RESUMEN_IMPORTES]].sum().to_dict()
+    total["Alíc."] = np.nan
+    resumen = pd.concat([resumen, pd.DataFrame([total])], ignore_index=True)
+    resumen["Líneas"] = resumen["Líneas"].astype(np.int64)
+    resumen[RESUMEN_IMPORTES] = resumen[RESUMEN_IMPORTES].astype(np.int64) / 10 ** CENTAVOS
+    return resumen
+
+
+def export_xlsx(salida: pd.DataFrame, destino=None, perf: Rendimiento | None = None) -> bytes | None:
+    """
+    Excel Holistor (hoja "Salida") con los formatos de columna habituales, más la
+    hoja "Resumen" (ver resumen_iva). Si la salida no entra en una hoja (XLSX_MAX_FILAS),
+    sigue en "Salida 2", "Salida 3", ... cada una con su encabezado.
+    Con `destino` (ruta o archivo abierto) escribe ahí; si no, devuelve los bytes.
+    """
+    perf = perf or Rendimiento()
+    buffer = BytesIO() if destino is None else destino
+    with perf.etapa("resumen", len(salida)) as e:
+        resumen = resumen_iva(salida)
+        e.filas_out = len(resumen)
+    with perf.etapa("export", len(salida)):
+        wb = xlsxwriter.Workbook(buffer, XLSX_OPTIONS)
+        formatos = holistor_formats(wb)
+        for n, inicio in enumerate(range(0, max(len(salida), 1), XLSX_MAX_FILAS), start=1):
+            # xlsxwriter no avisa al pasarse de filas (write_* devuelve -1): se corta antes
+            write_sheet(wb, "Salida" if n == 1 else f"Salida {n}", salida.iloc[inicio:inicio + XLSX_MAX_FILAS], formatos)
+        write_sheet(wb, "Resumen", resumen, formatos)
+        wb.close()
+    return buffer.getvalue() if destino is None else None
+
+
+# Texto delimitado para importar en Holistor: mismas columnas y orden que la hoja
+# "Salida", importes con coma decimal y 2 decimales, alícuota como 21,000 y tipo de
+# cambio con todos sus decimales (1052,755).
+TXT_SEPARADORES = {"csv": ";", "txt": "\t"}
+TXT_ENCODING = "cp1252"
+TXT_BLOQUE_FILAS = 50_000
+
+
+def _tc_txt(v) -> str:
+    # tipo de cambio con su precisión real (hasta TC_DECIMALES), no los 2 decimales de los importes
+    if pd.isna(v):
+        return ""
+    entero, _, dec = f"{v:.{TC_DECIMALES}f}".partition(".")
+    return f"{entero},{dec.rstrip('0').ljust(2, '0')}"
+
+
+def holistor_txt(salida: pd.DataFrame, sep: str = ";", encabezado: bool = True,
+                 bloque: int = TXT_BLOQUE_FILAS):
+    """
+    Generador de la salida Holistor como texto delimitado, de a `bloque` filas: cada
+    bloque se formatea (con el escritor CSV de pandas) y se entrega, sin armar el archivo
+    completo en memoria. Las fechas ya vienen como DD/MM/AAAA; vacíos quedan vacíos.
+    """
+    salida = salida.reindex(columns=COLS_SALIDA)
+    if encabezado:
+        yield sep.join(COLS_SALIDA) + "\r\n"
+    for inicio in range(0, len(salida), bloque):
+        parte = salida.iloc[inicio:inicio + bloque].copy()
+        parte["Alíc."] = map_distinct(parte["Alíc."], lambda v: "" if pd.isna(v) else f"{v:.3f}".replace(".", ","))
+        parte["Tipo de cambio"] = map_distinct(parte["Tipo de cambio"], _tc_txt)
+        yield parte.to_csv(
+            sep=sep, decimal=",", float_format="%.2f", header=False, index=False, lineterminator="\r\n",
+        )
+
+
+def export_txt(salida: pd.DataFrame, destino=None, perf: Rendimiento | None = None,
+               formato: str = "csv", encoding: str = TXT_ENCODING) -> bytes | None:
+    """
+    Salida Holistor como texto: formato "csv" (separado por ;) o "txt" (por tabulaciones).
+    Con `destino` (ruta o archivo binario abierto) se escribe bloque a bloque, sin
+    generar un libro de Excel; si no, devuelve los bytes.
+    """
+    perf = perf or Rendimiento()
+    sep = TXT_SEPARADORES[formato]
+    with perf.etapa(f"export {formato}", len(salida)):
+        if destino is None:
+            return "".join(holistor_txt(salida, sep)).encode(encoding, errors="replace")
+        f = open(destino, "wb") if isinstance(destino, (str, Path)) else destino
+        try:
+            for texto in holistor_txt(salida, sep):
+                f.write(texto.encode(encoding, errors="replace"))
+        finally:
+            if f is not destino:
+                f.close()
+    return None
+
+
+def export_advertencias(warnings: Advertencias, destino=None) -> bytes | None:
+    """
+    Excel con el resumen por categoría y una hoja con cada fila afectada
+    (hasta el máximo de filas de una hoja). Mismo uso de `destino` que export_xlsx.
+    """
+    buffer = BytesIO() if destino is None else destino
+    wb = xlsxwriter.Workbook(buffer, XLSX_OPTIONS)
+    resumen = pd.DataFrame(list(warnings.resumen().items()), columns=["Advertencia", "Filas"])
+    write_sheet(wb, "Resumen", resumen, {"Advertencia": (40, None)})
+    tabla = warnings.tabla()
+    write_sheet(wb, "Advertencias", tabla.head(XLSX_MAX_FILAS), {"Archivo": (30, None), "Advertencia": (40, None)})
+    wb.close()
+    return buffer.getvalue() if destino is None else None
+
+
+# ---------------- Pool de procesos compartido ----------------
+# Un solo pool para todas las sesiones del servidor: como mucho POOL_TRABAJOS conversiones
+# a la vez (las demás esperan en fila) y cada una con tope de tiempo y de memoria.
+# El tope de memoria es de espacio de direcciones (RLIMIT_AS), no de memoria residente:
+# cuenta también lo reservado sin usar (arenas de malloc, mapas de pyarrow, stacks de
+# hilos), así que va bastante por encima del pico real de una conversión. Se ajusta con
+# la variable de entorno EMITIDOS_MEMORIA_MAX (bytes; 0 = sin límite).
+POOL_TRABAJOS = 2
+TRABAJO_TIEMPO_MAX = 15 * 60  # segundos de conversión (sin contar la espera en fila)
+TRABAJO_MEMORIA_MAX = int(os.environ.get("EMITIDOS_MEMORIA_MAX", 8 << 30))  # espacio de direcciones por proceso
+
+
+class TiempoExcedido(Exception):
+    """
+    La conversión superó el tiempo máximo del pool.
+    """
+
+
+def _limitar_memoria(max_bytes: int):
+    # initializer de los procesos del pool: pedir más espacio de direcciones que el tope
+    # da MemoryError en ese archivo
+    if resource is not None and max_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (max_bytes, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+
+class PoolConversiones:
+    """
+    Pool de procesos compartido por todas las conversiones del servidor.
+    turno() da el lugar en la fila (por orden de llegada); cada conversión en curso manda
+    a lo sumo por_trabajo archivos a la vez, para que una carga grande no tape a las otras.
+    """
+    def __init__(self, procesos: int | None = None, max_trabajos: int = POOL_TRABAJOS,
+                 tiempo_max: float | None = TRABAJO_TIEMPO_MAX, memoria_max: int = TRABAJO_MEMORIA_MAX):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.max_trabajos = max_trabajos
+        self.tiempo_max = tiempo_max
+        self.memoria_max = memoria_max
+        self.por_trabajo = max(1, self.procesos // max_trabajos)
+        self._lock = threading.Condition()
+        self._fila: list[Avance] = []
+        self._ejecutor = self._nuevo_ejecutor()
+
+    def _nuevo_ejecutor(self) -> ProcessPoolExecutor:
+        return _Ejecutor(max_workers=self.procesos, initializer=_limitar_memoria, initargs=(self.memoria_max,))
+
+    def submit(self, fn, *args):
+        try:
+            return self._ejecutor.submit(fn, *args)
+        except BrokenProcessPool:
+            # un proceso murió (p. ej. el sistema lo mató por memoria): se arma otro pool
+            with self._lock:
+                self._ejecutor = self._nuevo_ejecutor()
+            return self._ejecutor.submit(fn, *args)
+
+    def cortar(self, pids: list[int]):
+        """
+        Termina los procesos `pids` (archivos que superaron tiempo_max y no llegan a una
+        etapa donde cortarse solos). Un ProcessPoolExecutor no sobrevive a que le maten un
+        proceso: lo que siga va a un ejecutor nuevo y los archivos de otras conversiones
+        que estaban en el viejo se reenvían (ver convert_batch).
+        """
+        if not pids:
+            return
+        with self._lock:
+            viejo, self._ejecutor = self._ejecutor, self._nuevo_ejecutor()
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except (ProcessLookupError, PermissionError):
+                pass  # ya terminó
+        viejo.shutdown(wait=False)
+
+    def _actualizar_fila(self):
+        for pos, avance in enumerate(self._fila):
+            avance.en_fila = max(0, pos - self.max_trabajos + 1)
+
+    @contextmanager
+    def turno(self, avance: Avance):
+        """
+        Espera hasta que la conversión de `avance` pueda correr (avance.en_fila indica
+        cuántas hay antes); una cancelación durante la espera levanta Cancelado.
+        """
+        with self._lock:
+            self._fila.append(avance)
+            self._actualizar_fila()
+            try:
+                while avance.en_fila:
+                    if avance.cancelado:
+                        raise Cancelado("Conversión cancelada.")
+                    self._lock.wait(0.2)
+            except BaseException:
+                self._fila.remove(avance)
+                self._actualizar_fila()
+                self._lock.notify_all()
+                raise
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._fila.remove(avance)
+                self._actualizar_fila()
+                self._lock.notify_all()
+
+    def en_curso(self) -> int:
+        with self._lock:
+            return min(len(self._fila), self.max_trabajos)
+
+    def en_espera(self) -> int:
+        with self._lock:
+            return max(0, len(self._fila) - self.max_trabajos)
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=False, cancel_futures=True)
+
+
+# ---------------- Export por partes ----------------
+# Salida separada por período (mes de la fecha) y/o punto de venta, un archivo por parte
+# dentro de un ZIP, para importar cada parte por separado en Holistor.
+PARTICIONES = {"periodo": "Período", "suc": "Punto de venta"}
+
+
+def particionar(salida: pd.DataFrame, por: tuple[str, ...]) -> list[tuple[str, pd.DataFrame]]:
+    """
+    Partes de la salida según `por` (claves de PARTICIONES) con un solo groupby, en orden.
+    Nombre de cada parte: "2024-05", "Suc_00003" o "2024-05_Suc_00003".
+    """
+    claves = []
+    if "periodo" in por:
+        fecha = salida["Fecha dd/mm/aaaa"].astype(str)
+        periodo = fecha.str.slice(6, 10) + "-" + fecha.str.slice(3, 5)
+        claves.append(periodo.where(fecha.str.len() == 10, "sin_fecha").rename("periodo"))
+    if "suc" in por:
+        suc = salida["Suc."].astype(str).replace({"nan": "", "None": ""})
+        claves.append(("Suc_" + suc.str.zfill(5)).rename("suc"))
+    if not claves:
+        return [("", salida)]
+    partes = []
+    for clave, parte in salida.groupby(claves, sort=True):
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        partes.append(("_".join(clave), parte.reset_index(drop=True)))
+    return partes
+
+
+def _export_parte(parte: pd.DataFrame, formato: str) -> bytes:
+    # unidad de trabajo del pool de export_zip
+    return export_xlsx(parte) if formato == "xlsx" else export_txt(parte, formato=formato)
+
+
+def _agregar_en_orden(partes: list[tuple[str, pd.DataFrame]], formato: str, enviar, en_vuelo_max: int, agregar):
+    """
+    Genera las partes con `enviar` (submit de un pool), con a lo sumo `en_vuelo_max` a la
+    vez, y las pasa a `agregar` en el orden de las partes. Una parte que se queda sin
+    proceso (p. ej. PoolConversiones.cortar de otra conversión) se reenvía una vez.
+    """
+    en_vuelo: list = []
+
+    def agregar_primera():
+        nombre, parte, fut = en_vuelo.pop(0)
+        try:
+            data = fut.result()
+        except BrokenProcessPool:
+            data = enviar(_export_parte, parte, formato).result()
+        agregar(nombre, data)
+
+    try:
+        for nombre, parte in partes:
+            en_vuelo.append((nombre, parte, enviar(_export_parte, parte, formato)))
+            if len(en_vuelo) >= en_vuelo_max:
+                agregar_primera()
+        while en_vuelo:
+            agregar_primera()
+    finally:
+        for _, _, fut in en_vuelo:
+            fut.cancel()
+
+
+def export_zip(salida: pd.DataFrame, por: tuple[str, ...] = ("periodo",), destino=None,
+               perf: Rendimiento | None = None, formato: str = "xlsx", prefijo: str = "Holistor",
+               workers: int | None = None, pool: PoolConversiones | None = None) -> bytes | None:
+    """
+    ZIP con un archivo Holistor por parte (ver particionar), en el formato de siempre
+    (export_xlsx, o export_txt para "csv"/"txt"). Las partes se generan en paralelo en un
+    pool de procesos (`pool`, o uno propio de `workers` procesos; workers=1: en este proceso)
+    y cada una se agrega al ZIP en cuanto está lista, en orden: con `destino` (ruta o archivo
+    abierto, no hace falta que sea seekable) en memoria sólo quedan las partes en curso.
+    Con `pool` el export espera su turno en la fila (PoolConversiones.turno) y manda de a
+    pool.por_trabajo partes.
+    Sin `destino` devuelve los bytes (el ZIP entero queda en memoria: para salidas grandes,
+    pasar una ruta o un archivo temporal).
+    """
+    perf = perf or Rendimiento()
+    with perf.etapa("particiones", len(salida)) as e:
+        partes = particionar(salida, por)
+        e.filas_out = len(partes)
+
+    buffer = BytesIO() if destino is None else destino
+    compresion = zipfile.ZIP_STORED if formato == "xlsx" else zipfile.ZIP_DEFLATED  # el xlsx ya es un zip
+    with perf.etapa(f"export zip {formato}", len(salida)), zipfile.ZipFile(buffer, "w", compresion) as zf:
+        def agregar(nombre: str, data: bytes):
+            zf.writestr(f"{prefijo}_{nombre or 'todo'}.{formato}", data)
+
+        if pool is None and max(1, min(workers or os.cpu_count() or 1, len(partes))) == 1:
+            for nombre, parte in partes:
+                agregar(nombre, _export_parte(parte, formato))
+        elif pool is None:
+            workers = max(1, min(workers or os.cpu_count() or 1, len(partes)))
+            with _Ejecutor(max_workers=workers) as ejecutor:
+                # a lo sumo 2 partes por proceso en vuelo
+                _agregar_en_orden(partes, formato, ejecutor.submit, 2 * workers, agregar)
+        else:
+            # en el pool compartido el export espera su turno como una conversión más
+            with pool.turno(Avance([f"{prefijo}.zip"])):
+                _agregar_en_orden(partes, formato, pool.submit, pool.por_trabajo, agregar)
+    return buffer.getvalue() if destino is None else None
+
+
+# ---------------- Trabajo en segundo plano ----------------
+class TrabajoConversion:
+    """
+    convert_batch() en un hilo aparte para que la interfaz siga respondiendo: los archivos
+    se convierten en procesos del pool (no frenan a las otras sesiones del servidor),
+    progreso() informa el avance y cancelar() corta la conversión.
+    Con `pool` (compartido entre sesiones) la conversión espera su turno en la fila.
+    """
+    def __init__(self, archivos: list[tuple[str, bytes]], fuente: str, memoria: bool = False,
+                 pool: PoolConversiones | None = None, **opciones):
+        self.avance = Avance([nombre for nombre, _ in archivos])
+        self.perf = Rendimiento(memoria)
+        self.resultado: tuple[pd.DataFrame, Advertencias] | None = None
+        self.error: Exception | None = None
+        self._hilo = threading.Thread(target=self._correr, args=(archivos, fuente, pool, opciones), daemon=True)
+        self._hilo.start()
+
+    def _correr(self, archivos, fuente, pool, opciones):
+        try:
+            if pool is None:
+                self.resultado = convert_batch(archivos, fuente, perf=self.perf, avance=self.avance, **opciones)
+            else:
+                with pool.turno(self.avance):
+                    self.resultado = convert_batch(
+                        archivos, fuente, perf=self.perf, avance=self.avance, pool=pool, **opciones,
+                    )
+        except Exception as e:
+            self.error = e
+
+    @property
+    def terminado(self) -> bool:
+        return not self._hilo.is_alive()
+
+    @property
+    def cancelado(self) -> bool:
+        return self.avance.cancelado
+
+    @property
+    def en_fila(self) -> int:
+        return self.avance.en_fila
+
+    def cancelar(self):
+        self.avance.cancelar()
+
+    def progreso(self) -> tuple[float, str]:
+        return self.avance.progreso()
+
+    def esperar(self, timeout: float | None = None):
+        self._hilo.join(timeout)
+
+
+# ---------------- Entrada genérica ----------------
+class NamedBytesIO(BytesIO):
+    """
+    BytesIO con .name, para procesar bytes como si fueran el archivo subido.
+    """
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+
+def convert(uploaded, fuente: str = "auto", perf: Rendimiento | None = None,
+            registro: RegistroComprobantes | None = None, cuit_emisor: str | None = None,
+            snapshots: Snapshots | None = None, cotizaciones: str | None = str(COTIZACIONES_PATH),
+            padron: str | None = str(PADRON_PATH)) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    fuente: "arca", "pastor" o "auto" (se reconoce por los encabezados). Antes de leer
+    el archivo entero se verifican los encabezados: un archivo de otra fuente falla enseguida.
+    `uploaded` es cualquier archivo binario con .name.
+    El registro de comprobantes, las cotizaciones y el padrón sólo se usan con ARCA (ver process_arca).
+    """
+    perf = perf or Rendimiento()
+    with perf.etapa("detección"):
+        det = detectar_fuente(uploaded, None if fuente == "auto" else fuente)
+    if det.fuente == "arca":
+        return process_arca(
+            uploaded, perf=perf, registro=registro, cuit_emisor=cuit_emisor, snapshots=snapshots, cols=det.cols,
+            fila_header=det.fila_header, cotizaciones=cotizaciones, padron=padron,
+        )
+    return process_pastor(uploaded, perf=perf, snapshots=snapshots, cols=det.cols, fila_header=det.fila_header)
+
+
+def convert_bytes(nombre: str, data: bytes, fuente: str, registro: str | None = None,
+                  cuit_emisor: str | None = None, snapshots: Snapshots | None = None) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    convert() sobre bytes en memoria; es la unidad de trabajo de los pools de procesos.
+    `registro` es la ruta del registro de comprobantes (cada proceso abre el suyo).
+    """
+    salida, warns, _ = _convert_bytes_medido(nombre, data, fuente, False, registro, cuit_emisor, snapshots)
+    return salida, warns
+
+
+def _convert_bytes_medido(nombre: str, data: bytes, fuente: str, memoria: bool, registro: str | None,
+                          cuit_emisor: str | None, snapshots: Snapshots | None,
+                          aviso: _AvisoEtapa | None = None) -> tuple[pd.DataFrame, Advertencias, list[dict]]:
+    """
+    convert_bytes() que además devuelve los registros de rendimiento (para el pool).
+    """
+    perf = Rendimiento(memoria, aviso)
+    if aviso is not None:
+        aviso.empezar()
+    try:
+        if registro is None:
+            salida, warns = convert(NamedBytesIO(data, nombre), fuente, perf, snapshots=snapshots)
+        else:
+            with RegistroComprobantes(registro) as reg:
+                salida, warns = convert(NamedBytesIO(data, nombre), fuente, perf, reg, cuit_emisor, snapshots)
+    finally:
+        if aviso is not None:
+            aviso.soltar()
+    return salida, warns, perf.registros()
+
+
+def sort_holistor(salida: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ordena por fecha, punto de venta y número (estable: las líneas de un mismo
+    comprobante conservan su orden).
+    """
+    claves = pd.DataFrame({
+        "fecha": pd.to_datetime(salida["Fecha dd/mm/aaaa"], format="%d/%m/%Y", errors="coerce"),
+        "suc": pd.to_numeric(salida["Suc."], errors="coerce"),
+        "nro": pd.to_numeric(salida["Número"], errors="coerce"),
+    })
+    orden = claves.sort_values(["fecha", "suc", "nro"], kind="mergesort").index
+    return salida.loc[orden].reset_index(drop=True)
+
+
+def _fuente_de(nombre: str, data: bytes) -> str | None:
+    try:
+        return detectar_fuente(NamedBytesIO(data, nombre)).fuente
+    except Exception:
+        return None  # el error se informa al convertir el archivo
+
+
+def _quitar_repetidos_lote(partes: list[tuple[int, str, pd.DataFrame]], cuits: dict[int, str],
+                           warnings: Advertencias) -> list[pd.DataFrame]:
+    """
+    Descarga superpuesta en la misma carga: un comprobante que ya vino en un archivo
+    anterior (orden de carga) se saca con todas sus líneas.
+    `partes`: (posición en la carga, nombre, salida); `cuits`: CUIT emisor por posición.
+    """
+    vistas: set = set()
+    limpias = []
+    for i, nombre, parte in partes:
+        if i not in cuits:  # Pastor: no pasa por el registro
+            limpias.append(parte)
+            continue
+        claves = _claves(cuits[i], parte["Cpbte"], parte["Tipo"], parte["Suc."], parte["Número"], parte.index)
+        mi = pd.MultiIndex.from_frame(claves[CLAVE_COMPROBANTE])
+        repetida = claves["completa"].to_numpy(dtype=bool) & mi.isin(vistas) if vistas else np.zeros(len(parte), dtype=bool)
+        primera = repetida & ~mi.duplicated()
+        warnings.agregar(
+            "duplicado_lote", np.zeros(int(primera.sum())), archivo=nombre,
+            **{c: claves[c].to_numpy(dtype=object)[primera] for c in ("cpbte", "letra", "suc", "numero")},
+        )
+        vistas.update(mi[claves["completa"].to_numpy(dtype=bool) & ~repetida])
+        limpias.append(parte[~repetida])
+    return limpias
+
+
+def convert_batch(archivos: list[tuple[str, bytes]], fuente: str, workers: int | None = None,
+                  perf: Rendimiento | None = None, registro: str | None = None,
+                  cuit_emisor: str | None = None, snapshots: Snapshots | None = None,
+                  avance: Avance | None = None, pool: PoolConversiones | None = None) -> tuple[pd.DataFrame, Advertencias]:
+    """
+    Convierte varios archivos (nombre, bytes) en paralelo sobre un pool de procesos y
+    une todo en una sola salida ordenada (un solo archivo conserva su orden de origen).
+    Con fuente="auto" todos tienen que ser de la misma fuente (si no, FuenteIncorrecta).
+    Cada advertencia indica de qué archivo viene; un archivo que falla queda como
+    advertencia "ERROR" salvo que fallen todos.
+    Con `perf`, las etapas de cada archivo se suman (tiempo de CPU de todos los procesos).
+    Con `registro` (ruta, sólo ARCA) se omiten los comprobantes ya registrados y los que
+    se repiten entre archivos de la carga; no registra nada (ver registrar_salida).
+    `snapshots`: caché de lectura de XLSX compartida por todos los procesos (ver Snapshots).
+    Con `avance`, incluso un solo archivo va a un proceso del pool (la lectura de Excel
+    no frena al proceso que llama) y una cancelación levanta Cancelado.
+    Con `pool` (PoolConversiones) se usan sus procesos en vez de un pool propio, de a
+    pool.por_trabajo archivos a la vez; pasado pool.tiempo_max se corta con TiempoExcedido
+    y se terminan los procesos que seguían con sus archivos (PoolConversiones.cortar). Un
+    archivo que se queda sin proceso porque cortaron a otra conversión se reenvía una vez.
+    """
+    perf = perf or Rendimiento()
+    if registro is not None and fuente == "pastor":
+        registro = None
+    if pool is not None and avance is None:
+        # sin un Avance propio, al pasar tiempo_max los archivos en curso no se cortarían
+        avance = Avance([nombre for nombre, _ in archivos])
+    fuentes = [fuente] * len(archivos)
+    if fuente == "auto":
+        # sólo encabezados; ARCA y Pastor no se mezclan en una misma salida
+        fuentes = [_fuente_de(nombre, data) for nombre, data in archivos]
+        distintas = sorted({f for f in fuentes if f is not None})
+        if len(distintas) > 1:
+            raise FuenteIncorrecta(
+                f"Los archivos son de fuentes distintas ({' y '.join(FUENTES[f].nombre for f in distintas)}): "
+                f"no se pueden unir en una sola salida."
+            )
+    cuits = {}
+    if registro is not None:
+        # sólo los archivos ARCA usan el registro; por posición en la carga, como los
+        # resultados: puede haber dos archivos con el mismo nombre
+        cuits = {
+            i: cuit_emisor if cuit_emisor is not None else detectar_cuit_emisor(NamedBytesIO(data, nombre))
+            for i, (nombre, data) in enumerate(archivos)
+            if fuentes[i] == "arca"
+        }
+
+    if len(archivos) == 1 and avance is None:
+        nombre, data = archivos[0]
+        salida, warns, registros = _convert_bytes_medido(
+            nombre, data, fuente, perf.memoria, registro, cuits.get(0), snapshots,
+        )
+        perf.agregar(registros)
+        warnings = Advertencias()
+        warnings.extender(warns, nombre)
+        return salida, warnings
+
+    resultados: list = [None] * len(archivos)
+    if pool is None:
+        workers = max(1, min(workers or os.cpu_count() or 1, len(archivos)))
+        ejecutor = _Ejecutor(max_workers=workers)
+        enviar, limite = ejecutor.submit, None
+    else:
+        workers = pool.por_trabajo
+        enviar = pool.submit
+        limite = time.monotonic() + pool.tiempo_max if pool.tiempo_max else None
+    cancelado = False
+    futuros: dict = {}
+    reenviar: list = []  # archivos cuyo proceso murió al cortar otra conversión del pool
+    reenviados: set = set()
+    try:
+        por_enviar = iter(enumerate(archivos))
+        pendientes: set = set()
+        while True:
+            # como mucho `workers` archivos en el pool a la vez
+            libres = workers - len(pendientes)
+            envios, reenviar = reenviar[:libres], reenviar[libres:]
+            for i, (nombre, data) in envios + list(islice(por_enviar, libres - len(envios))):
+                fut = enviar(
+                    _convert_bytes_medido, nombre, data, fuente, perf.memoria, registro, cuits.get(i), snapshots,
+                    avance.aviso(i) if avance is not None else None,
+                )
+                futuros[fut] = i
+                pendientes.add(fut)
+            if not pendientes and not reenviar:
+                break
+            listos, pendientes = wait(pendientes, timeout=0.2, return_when=FIRST_COMPLETED)
+            for fut in listos:
+                i = futuros[fut]
+                try:
+                    resultados[i] = fut.result()
+                except MemoryError:
+                    resultados[i] = MemoryError(
+                        f"el archivo superó el límite de memoria por conversión ({pool.memoria_max / (1 << 30):.1f} GB "
+                        f"de espacio de direcciones; ver EMITIDOS_MEMORIA_MAX)."
+                        if pool is not None and pool.memoria_max else "memoria insuficiente."
+                    )
+                except BrokenProcessPool:
+                    if pool is not None and i not in reenviados and not avance.cancelado:
+                        reenviados.add(i)
+                        reenviar.append((i, archivos[i]))
+                        continue
+                    resultados[i] = RuntimeError(
+                        "el proceso que convertía el archivo terminó de golpe (posiblemente por falta de memoria)."
+                    )
+                except Exception as e:
+                    resultados[i] = e
+                if avance is not None:
+                    avance.terminar(i)
+            if avance is not None and avance.cancelado:
+                cancelado = True
+                raise Cancelado("Conversión cancelada.")
+            if limite is not None and time.monotonic() > limite:
+                cancelado = True
+                avance.cancelar()
+                # un proceso trabado en una lectura o parseo largo no llega a su próxima etapa
+                pool.cortar(avance.procesos(futuros[fut] for fut in pendientes))
+                raise TiempoExcedido(f"La conversión superó el tiempo máximo ({pool.tiempo_max / 60:g} min).")
+    finally:
+        if pool is None:
+            # al cancelar no se espera: los procesos en curso se cortan en su próxima etapa
+            ejecutor.shutdown(wait=not cancelado, cancel_futures=True)
+        else:
+            for fut in futuros:
+                fut.cancel()
+
+    partes: list[tuple[int, str, pd.DataFrame]] = []
+    warnings = Advertencias()
+    for i, ((nombre, _), res) in enumerate(zip(archivos, resultados)):  # orden de carga, no de finalización
+        if isinstance(res, Exception):
+            codigo = "sin_nuevos" if isinstance(res, SinComprobantesNuevos) else "error"
+            warnings.agregar(codigo, 0, archivo=nombre, detalle=str(res))
+            continue
+        salida, warns, registros = res
+        partes.append((i, nombre, salida))
+        warnings.extender(warns, nombre)
+        perf.agregar(registros)
+
+    if not partes:
+        if all(isinstance(res, SinComprobantesNuevos) for res in resultados):
+            raise SinComprobantesNuevos("No hay comprobantes nuevos en ningún archivo: todos ya estaban registrados.")
+        raise ValueError("Ningún archivo pudo convertirse:\n" + "\n".join(warnings))
+
+    if registro is not None:
+        with perf.etapa("repetidos entre archivos", sum(len(p) for _, _, p in partes)) as e:
+            limpias = _quitar_repetidos_lote(partes, cuits, warnings)
+            e.filas_out = sum(len(p) for p in limpias)
+    else:
+        limpias = [p for _, _, p in partes]
+
+    if len(limpias) == 1:
+        # un solo archivo queda en el orden de origen, igual que sin pool (app y CLI)
+        return limpias[0], warnings
+    with perf.etapa("unión y orden", sum(len(p) for p in limpias)):
+        salida = sort_holistor(pd.concat(limpias, ignore_index=True).infer_objects())
+    return salida, warnings
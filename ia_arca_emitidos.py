@@ -4,54 +4,18 @@
 
 import streamlit as st
 import pandas as pd
-from io import BytesIO
 from pathlib import Path
-import csv
-import re
-from datetime import date, datetime
-
-# ---------------- Matriz interna (ARCA CSV) ----------------
-TIPOS_COMP = {
-    "1": ("F", "A"),
-    "2": ("ND", "A"),
-    "3": ("NC", "A"),
-    "4": ("R", "A"),
-    "6": ("F", "B"),
-    "7": ("ND", "B"),
-    "8": ("NC", "B"),
-    "9": ("R", "B"),
-    "11": ("F", "C"),
-    "12": ("ND", "C"),
-    "13": ("NC", "C"),
-    "15": ("R", "C"),
-    "51": ("F", "M"),
-    "52": ("ND", "M"),
-    "53": ("NC", "M"),
-    "54": ("R", "M"),
-
-    # Tickets
-    "81": ("T", "A"),   # TIQUE FACTURA A
-    "82": ("T", "B"),   # TIQUE FACTURA B
-    "83": ("T", "C"),   # TIQUE
-    "112": ("TC", "A"), # TIQUE NOTA DE CREDITO A
-    "113": ("TC", "B"), # TIQUE NOTA DE CREDITO B
-    "114": ("TC", "C"), # TIQUE NOTA DE CREDITO C
-    "115": ("T", "A"),  # TIQUE NOTA DE DEBITO A
-    "116": ("T", "B"),  # TIQUE NOTA DE DEBITO B
-    "117": ("T", "C"),  # TIQUE NOTA DE DEBITO C
-
-    # FCE / MiPyME
-    "201": ("FP", "A"),
-    "202": ("NP", "A"),
-    "203": ("PC", "A"),
-    "206": ("FP", "B"),
-    "207": ("NP", "B"),
-    "208": ("PC", "B"),
-    "211": ("FP", "C"),
-    "212": ("NP", "C"),
-    "213": ("PC", "C"),
-}
-CREDITOS_ARCA = {"NC", "PC", "TC"}  # crédito => negativo
+import hashlib
+import os
+import threading
+from functools import partial
+
+from emitidos_core import (
+    ADVERTENCIAS_MUESTRA, COTIZACIONES_PATH, FUENTES, PADRON_PATH, PARTICIONES, VERSION_PROCESO, Advertencias, Cancelado, NamedBytesIO, RegistroComprobantes, Rendimiento,
+    PoolConversiones, SinComprobantesNuevos, Snapshots, TiempoExcedido, TrabajoConversion, resumen_iva, detectar_cuit_emisor, detectar_fuente, digits_only,
+    export_advertencias, export_txt,
+    export_xlsx, export_zip, marcar_uso, podar_por_uso,
+)
 
 # ---------------- Paths / assets ----------------
 HERE = Path(__file__).parent
@@ -66,6 +30,9 @@ def first_existing(paths):
 
 LOGO_PATH = first_existing([HERE / "logo_aie.png", HERE / "assets" / "logo_aie.png"])
 FAVICON_PATH = first_existing([HERE / "favicon-aie.ico", HERE / "assets" / "favicon-aie.ico"])
+REGISTRO_PATH = HERE / "registro_comprobantes.sqlite"
+SNAPSHOTS = Snapshots()  # tablas leídas de XLSX en disco (HERE/.cache/snapshots)
+EXPORTS_DIR = HERE / ".cache" / "exports"  # ZIP por partes ya generados
 
 # ---------------- UI ----------------
 st.set_page_config(
@@ -81,632 +48,357 @@ st.title("Emitidos → Formato Holistor")
 
 fuente = st.radio(
     "Fuente de datos",
-    ["ARCA Emitidos (XLSX/CSV)", "Ventas Pastor Chess (XLSX)"],
+    ["Detectar automáticamente", "ARCA Emitidos (XLSX/CSV)", "Ventas Pastor Chess (XLSX)"],
     horizontal=True,
 )
 
-# ---------------- Helpers comunes ----------------
-def sniff_delimiter(text: str) -> str:
-    try:
-        d = csv.Sniffer().sniff(text[:5000], delimiters=";,|\t")
-        return d.delimiter
-    except Exception:
-        return ";"
-
-
-def pick_col(df: pd.DataFrame, *cands: str) -> str:
-    cols = list(df.columns)
-    colset = set(cols)
-    for c in cands:
-        if c in colset:
-            return c
-    raise KeyError(f"No se encontró ninguna de estas columnas: {cands}")
-
-
-def parse_amount(v) -> float:
-    if v is None:
-        return 0.0
-    if isinstance(v, float) and pd.isna(v):
-        return 0.0
-    if isinstance(v, (int, float)) and not pd.isna(v):
-        return float(v)
-    s = str(v).strip()
-    if not s:
-        return 0.0
-    s = s.replace(" ", "")
-    if "," in s:
-        s = s.replace(".", "").replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return 0.0
-
+# ---------------- Caché entre reruns ----------------
+# Clave: hash del archivo + fuente + VERSION_PROCESO (ver emitidos_core).
+CACHE_MAX_ENTRIES = 8  # LRU: se descarta lo menos usado al superar este tope
+CACHE_MAX_BYTES = 2 << 30  # tope de las salidas convertidas que se guardan (ver CacheResultados)
+EXPORTS_MAX_ARCHIVOS = CACHE_MAX_ENTRIES
+AVANCE_INTERVALO = 0.5  # segundos entre refrescos de la barra de progreso
 
-def digits_only(v) -> str:
-    if v is None:
-        return ""
-    return re.sub(r"\D+", "", str(v))
 
-
-def tipo_doc(v) -> int:
-    if v is None:
-        return 0
-    if isinstance(v, float) and pd.isna(v):
-        return 0
-    s = str(v).strip().upper()
-    if not s:
-        return 0
-    try:
-        return int(float(s))
-    except Exception:
-        pass
-    if "CUIT" in s:
-        return 80
-    if "DNI" in s:
-        return 96
-    return 0
+@st.cache_resource
+def pool_conversiones() -> PoolConversiones:
+    """
+    Pool de procesos compartido por todas las sesiones: limita cuántas conversiones
+    corren a la vez (las demás esperan en fila) y el tiempo/memoria de cada una.
+    """
+    return PoolConversiones()
 
 
-def fecha_out(v) -> str:
+class CacheResultados:
+    """
+    Conversiones terminadas de todas las sesiones por clave_trabajo, con los registros de
+    rendimiento de sus exports: la misma carga en otra sesión usa la salida ya convertida.
+    LRU acotada por el peso aproximado de las salidas (memory_usage(deep=True)). Las
+    conversiones en curso no se comparten (ver trabajo()): cancelar sólo corta la propia.
     """
-    Devuelve SIEMPRE texto DD/MM/AAAA.
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._trabajos: dict[str, tuple[TrabajoConversion, int]] = {}
+        self._export_perf: dict[str, dict[str, list[dict]]] = {}
+
+    def obtener(self, clave_trabajo: str) -> TrabajoConversion | None:
+        with self._lock:
+            entrada = self._trabajos.pop(clave_trabajo, None)
+            if entrada is None:
+                return None
+            self._trabajos[clave_trabajo] = entrada
+            return entrada[0]
+
+    def guardar(self, clave_trabajo: str, job: TrabajoConversion):
+        # job terminado sin error; una salida más grande que el tope no se guarda
+        salida, _ = job.resultado
+        peso = int(salida.memory_usage(deep=True).sum())
+        if peso > self.max_bytes:
+            return
+        with self._lock:
+            self._trabajos[clave_trabajo] = (job, peso)
+            total = sum(t for _, t in self._trabajos.values())
+            for viejo in list(self._trabajos):
+                if total <= self.max_bytes:
+                    break
+                total -= self._trabajos.pop(viejo)[1]
+                self._export_perf.pop(viejo, None)
+
+    def guardar_export_perf(self, clave_trabajo: str, formato: str, registros: list[dict]):
+        # sólo de conversiones que siguen en la caché: se descartan junto con ellas
+        with self._lock:
+            if clave_trabajo in self._trabajos:
+                self._export_perf.setdefault(clave_trabajo, {})[formato] = registros
+
+    def export_perf(self, clave_trabajo: str) -> list[dict]:
+        """
+        Registros de rendimiento del export: el archivo se genera al descargar, así que
+        se muestran en el rerun siguiente.
+        """
+        with self._lock:
+            return sum(self._export_perf.get(clave_trabajo, {}).values(), [])
+
+
+@st.cache_resource
+def cache_resultados() -> CacheResultados:
+    return CacheResultados()
+
+
+def trabajo(clave_trabajo: str, archivos: list[tuple[str, bytes]], **opciones) -> TrabajoConversion:
     """
-    if v is None or (isinstance(v, float) and pd.isna(v)):
-        return ""
+    Conversión de `clave_trabajo`: la ya terminada de cualquier sesión (CacheResultados)
+    o la de esta sesión, que se crea la primera vez y al terminar bien pasa a la caché.
+    """
+    cache = cache_resultados()
+    job = cache.obtener(clave_trabajo)
+    if job is not None:
+        return job
+    clave_actual, job = st.session_state.get("trabajo", (None, None))
+    if clave_actual != clave_trabajo:
+        if job is not None and not job.terminado:
+            job.cancelar()  # cambió la carga: la conversión anterior es sólo de esta sesión
+        job = TrabajoConversion(archivos, pool=pool_conversiones(), **opciones)
+        st.session_state["trabajo"] = (clave_trabajo, job)
+    if job.terminado and job.error is None and not job.cancelado:
+        cache.guardar(clave_trabajo, job)
+    return job
 
-    if isinstance(v, (datetime, date)):
-        return v.strftime("%d/%m/%Y")
 
-    s = str(v).strip()
-    if not s:
-        return ""
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fuentes_detectadas(clave: str, _archivos: list[tuple[str, bytes]]) -> list[str]:
+    # sólo lee los encabezados de cada archivo
+    return [detectar_fuente(NamedBytesIO(data, nombre)).fuente for nombre, data in _archivos]
 
-    if re.fullmatch(r"\d{2}[/-]\d{2}[/-]\d{4}", s):
-        return s.replace("-", "/")
 
-    if re.match(r"^\d{4}-\d{2}-\d{2}(\s+\d{2}:\d{2}:\d{2})?$", s):
-        dt = pd.to_datetime(s, errors="coerce")
-        if not pd.isna(dt):
-            return dt.strftime("%d/%m/%Y")
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def cuit_detectado(clave: str, _nombre: str, _data: bytes) -> str:
+    return detectar_cuit_emisor(NamedBytesIO(_data, _nombre))
 
-    dt = pd.to_datetime(s, errors="coerce", dayfirst=True)
-    if not pd.isna(dt):
-        return dt.strftime("%d/%m/%Y")
 
-    return s
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def resumen_cached(clave: str, fuente: str, version: str, _salida: pd.DataFrame) -> pd.DataFrame:
+    # el cuerpo del expander corre en cada rerun aunque esté cerrado
+    return resumen_iva(_salida)
 
 
-# ---------------- ARCA: helpers ----------------
-def read_arca(file) -> tuple[pd.DataFrame, str]:
-    name = (file.name or "").lower()
-    if name.endswith(".csv"):
-        raw = file.getvalue().decode("utf-8", errors="replace")
-        sep = sniff_delimiter(raw)
-        df = pd.read_csv(BytesIO(file.getvalue()), sep=sep, dtype=str, encoding="utf-8")
-        return df, "csv"
-    try:
-        return pd.read_excel(file, sheet_name=0, header=1, dtype=object), "xlsx"
-    except Exception:
-        return pd.read_excel(file, sheet_name=0, header=0, dtype=object), "xlsx"
-
-
-def map_tipo_from_text(desc: str) -> tuple[str, str]:
-    s = str(desc or "").strip()
-    su = s.upper()
-
-    # --- MiPyME / FCE: evaluar ANTES que la lógica genérica ---
-    if (
-        "MIPYME" in su
-        or "FCE" in su
-        or "FACTURA DE CRÉDITO ELECTRÓNICA" in su
-        or "FACTURA DE CREDITO ELECTRONICA" in su
-    ):
-        if "NOTA DE CRÉDITO" in su or "NOTA DE CREDITO" in su:
-            t = "PC"
-        elif "NOTA DE DÉBITO" in su or "NOTA DE DEBITO" in su:
-            t = "NP"
-        elif "FACTURA DE CRÉDITO" in su or "FACTURA DE CREDITO" in su:
-            t = "FP"
-        else:
-            t = ""
-
-    # --- Tickets / Tiques ---
-    elif "TIQUE" in su or "TICKET" in su:
-        if "NOTA DE CRÉDITO" in su or "NOTA DE CREDITO" in su:
-            t = "TC"
-        else:
-            t = "T"
-
-    else:
-        if "NOTA DE CRÉDITO" in su or "NOTA DE CREDITO" in su:
-            t = "NC"
-        elif "NOTA DE DÉBITO" in su or "NOTA DE DEBITO" in su:
-            t = "ND"
-        elif "RECIBO" in su:
-            t = "R"
-        elif "FACTURA" in su:
-            t = "F"
-        else:
-            t = ""
-
-    letra = s[-1].upper() if s else ""
-    if letra not in ("A", "B", "C", "M"):
-        letra = ""
-
-    if s.startswith("8 ") and s.strip().upper().endswith("C"):
-        letra = "B"
-
-    # Caso específico: 083 TIQUE (*) => T / C
-    if ("TIQUE" in su or "TICKET" in su) and not letra:
-        letra = "C"
-
-    return t, letra
-
-
-def decode_csv_tipo(tipo_comp_raw: str) -> tuple[str, str]:
-    k = str(tipo_comp_raw).strip()
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner="Generando Excel...")
+def export_cached(clave: str, fuente: str, version: str, memoria: bool, _salida: pd.DataFrame) -> bytes:
+    perf = Rendimiento(memoria)
+    data = export_xlsx(_salida, perf=perf)
+    cache_resultados().guardar_export_perf(clave, "xlsx", perf.registros())
+    return data
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner="Generando CSV...")
+def export_csv_cached(clave: str, fuente: str, version: str, memoria: bool, _salida: pd.DataFrame) -> bytes:
+    perf = Rendimiento(memoria)
+    data = export_txt(_salida, perf=perf, formato="csv")
+    cache_resultados().guardar_export_perf(clave, "csv", perf.registros())
+    return data
+
+
+def export_zip_archivo(clave: str, fuente: str, version: str, memoria: bool, por: tuple[str, ...], formato: str,
+                       prefijo: str, _salida: pd.DataFrame) -> bytes:
+    """
+    ZIP por partes escrito en EXPORTS_DIR (las partes se generan en el pool compartido y
+    van directo al archivo, sin armar el ZIP en memoria); download_button lo pide recién
+    al descargar y lo lee entero, así que se devuelven sus bytes. Los ZIP ya generados se
+    reusan y se guardan los EXPORTS_MAX_ARCHIVOS más recientes.
+    """
+    nombre = hashlib.sha256(repr((clave, fuente, version, por, formato, prefijo)).encode()).hexdigest()
+    path = EXPORTS_DIR / f"{nombre}.zip"
     try:
-        k = str(int(float(k)))
-    except Exception:
+        marcar_uso(path)
+        return path.read_bytes()
+    except FileNotFoundError:  # no generado todavía (o ya podado)
         pass
-    return TIPOS_COMP.get(k, ("", ""))
-
-
-def process_arca(uploaded) -> tuple[pd.DataFrame, list[str]]:
-    df, kind = read_arca(uploaded)
-    warnings: list[str] = []
-
-    COL_FECHA = pick_col(df, "Fecha de Emisión", "Fecha", "Fecha de Emision")
-    COL_TIPO_COMP = pick_col(df, "Tipo de Comprobante", "Tipo")
-    COL_PV = pick_col(df, "Punto de Venta", "Pto. Vta.", "Pto Vta", "Punto Venta")
-    COL_NRO_DESDE = pick_col(df, "Número Desde", "Numero Desde")
-
-    COL_TIPO_DOC_REC = pick_col(df, "Tipo Doc. Receptor", "Tipo Doc Receptor")
-    COL_NRO_DOC_REC = pick_col(df, "Nro. Doc. Receptor", "Nro Doc Receptor", "Nro Doc.", "Nro. Doc.")
-    COL_NOM_REC = pick_col(df, "Denominación Receptor", "Denominacion Receptor")
-
-    # --- USD: Moneda (K) y Tipo de cambio (J) ---
-    COL_TC = None
-    COL_MON = None
-    for cand in ("Tipo de cambio", "Tipo Cambio", "Tipo de Cambio"):
-        if cand in df.columns:
-            COL_TC = cand
-            break
-    for cand in ("Moneda", "Currency"):
-        if cand in df.columns:
-            COL_MON = cand
-            break
-
-    COL_IVA_105 = pick_col(df, "IVA 10,5%")
-    COL_NETO_105 = pick_col(df, "Imp. Neto Gravado IVA 10,5%", "Neto Grav. IVA 10,5%")
-    COL_IVA_21 = pick_col(df, "IVA 21%")
-    COL_NETO_21 = pick_col(df, "Imp. Neto Gravado IVA 21%", "Neto Grav. IVA 21%")
-    COL_IVA_27 = pick_col(df, "IVA 27%")
-    COL_NETO_27 = pick_col(df, "Imp. Neto Gravado IVA 27%", "Neto Grav. IVA 27%")
-
-    COL_NETO_NG = pick_col(df, "Imp. Neto No Gravado", "Neto No Gravado")
-    COL_EXENTAS = pick_col(df, "Imp. Op. Exentas", "Op. Exentas")
-    COL_OTROS = pick_col(df, "Otros Tributos")
-    COL_TOTAL = pick_col(df, "Imp. Total")
-
-    registros = []
-
-    for _, row in df.iterrows():
-        tipo_comp_raw = row.get(COL_TIPO_COMP, "")
-        if tipo_comp_raw is None or (isinstance(tipo_comp_raw, str) and not tipo_comp_raw.strip()):
-            continue
-
-        if kind == "csv":
-            cpbte, letra = decode_csv_tipo(tipo_comp_raw)
-        else:
-            cpbte, letra = map_tipo_from_text(tipo_comp_raw)
-
-        es_credito = (cpbte in CREDITOS_ARCA)
-
-        def sg(x: float) -> float:
-            if x == 0:
-                return 0.0
-            return -abs(x) if es_credito else abs(x)
-
-        # --- conversión USD antes de seguir ---
-        moneda = str(row.get(COL_MON, "") or "").strip().upper() if COL_MON else ""
-        tc = parse_amount(row.get(COL_TC)) if COL_TC else 0.0
-
-        if moneda == "USD" and tc == 0:
-            warnings.append(
-                f"Fila con Moneda=USD sin Tipo de cambio (Cpbte={tipo_comp_raw}). Se deja sin conversión."
-            )
-
-        def amt(colname: str) -> float:
-            v = parse_amount(row.get(colname))
-            if moneda == "USD" and tc != 0:
-                return v * tc
-            return v
-        # -----------------------------------
-
-        tdoc = tipo_doc(row.get(COL_TIPO_DOC_REC))
-        nro_doc = digits_only(row.get(COL_NRO_DOC_REC))
-
-        cuit_out = nro_doc
-        cond_fisc = ""
-
-        if letra == "A" and tdoc == 80:
-            cond_fisc = "RI"
-        elif letra == "B" and tdoc == 80:
-            cond_fisc = "EX"
-        elif letra == "B" and tdoc == 96 and nro_doc:
-            dni8 = nro_doc.zfill(8)
-            cuit_out = f"00-{dni8}-0"
-            cond_fisc = "CF"
-        elif letra == "B" and tdoc == 86 and nro_doc:
-            dni8 = nro_doc.zfill(8)
-            cuit_out = f"00-{dni8}-0"
-            cond_fisc = "CF"
-
-        exng_val = sg(amt(COL_NETO_NG) + amt(COL_EXENTAS))
-        otros_val = sg(amt(COL_OTROS))
-        total_val = sg(amt(COL_TOTAL))
-
-        netos_ivas = [
-            sg(amt(COL_NETO_105)), sg(amt(COL_IVA_105)),
-            sg(amt(COL_NETO_21)),  sg(amt(COL_IVA_21)),
-            sg(amt(COL_NETO_27)),  sg(amt(COL_IVA_27)),
-        ]
-
-        if exng_val == 0 and otros_val == 0 and total_val == 0 and all(v == 0 for v in netos_ivas):
-            continue
-
-        base = {
-            "Fecha dd/mm/aaaa": fecha_out(row.get(COL_FECHA)),
-            "Cpbte": cpbte,
-            "Tipo": letra,
-            "Suc.": row.get(COL_PV),
-            "Número": row.get(COL_NRO_DESDE),
-            "Razón Social o Denominación Cliente": row.get(COL_NOM_REC),
-            "Tipo Doc.": tdoc,
-            "CUIT": cuit_out,
-            "Domicilio": "",
-            "C.P.": "",
-            "Pcia": "",
-            "Cond Fisc": cond_fisc,
-            # >>> antes de la columna M (Cód. Neto)
-            "Moneda": moneda,
-            "Tipo de cambio": tc,
-            # <<<
-            "Cód. Neto": "",
-            "Cód. NG/EX": "",
-            "Cód. P/R": "",
-            "Pcia P/R": "",
-        }
-
-        filas_comp = []
-        aliquotas = [
-            (10.5, COL_NETO_105, COL_IVA_105),
-            (21.0, COL_NETO_21, COL_IVA_21),
-            (27.0, COL_NETO_27, COL_IVA_27),
-        ]
-
-        for aliq_val, col_neto, col_iva in aliquotas:
-            neto = sg(amt(col_neto))
-            iva = sg(amt(col_iva))
-            if neto == 0 and iva == 0:
-                continue
-
-            rec = base.copy()
-            rec["Neto Gravado"] = neto
-            rec["Alíc."] = aliq_val
-            rec["IVA Liquidado"] = iva
-            rec["IVA Débito"] = iva
-            rec["Conceptos NG/EX"] = 0.0
-            rec["Perc./Ret."] = 0.0
-            filas_comp.append(rec)
-
-        if filas_comp:
-            if exng_val != 0 or otros_val != 0:
-                filas_comp[0]["Conceptos NG/EX"] = exng_val
-                filas_comp[0]["Perc./Ret."] = otros_val
-        else:
-            rec = base.copy()
-            rec["Neto Gravado"] = 0.0
-            rec["Alíc."] = 0.0
-            rec["IVA Liquidado"] = 0.0
-            rec["IVA Débito"] = 0.0
-            if exng_val != 0 or otros_val != 0:
-                rec["Conceptos NG/EX"] = exng_val
-                rec["Perc./Ret."] = otros_val
-            else:
-                rec["Conceptos NG/EX"] = total_val
-                rec["Perc./Ret."] = 0.0
-            filas_comp.append(rec)
-
-        for rec in filas_comp:
-            rec["Total"] = (
-                float(rec.get("Neto Gravado", 0) or 0)
-                + float(rec.get("IVA Liquidado", 0) or 0)
-                + float(rec.get("Conceptos NG/EX", 0) or 0)
-                + float(rec.get("Perc./Ret.", 0) or 0)
-            )
-            registros.append(rec)
-
-    if not registros:
-        raise ValueError("No se encontraron comprobantes con importes.")
-
-    cols_salida = [
-        "Fecha dd/mm/aaaa", "Cpbte", "Tipo", "Suc.", "Número",
-        "Razón Social o Denominación Cliente", "Tipo Doc.", "CUIT",
-        "Domicilio", "C.P.", "Pcia", "Cond Fisc",
-        # >>> antes de la columna M (Cód. Neto)
-        "Moneda", "Tipo de cambio",
-        # <<<
-        "Cód. Neto", "Neto Gravado", "Alíc.",
-        "IVA Liquidado", "IVA Débito",
-        "Cód. NG/EX", "Conceptos NG/EX",
-        "Cód. P/R", "Perc./Ret.", "Pcia P/R",
-        "Total",
-    ]
-
-    salida = pd.DataFrame(registros)[cols_salida]
-    return salida, warnings
-
-
-# ---------------- Pastor Chess ----------------
-PASTOR_SKIP = {"ANTICIPO", "COMODATO ACTIVOS FIJOS", "SOBRANTE DE LIQUIDACION", "RECIBO"}
-
-PASTOR_PERCEP_MAP = [
-    ("Percepción 3337", "PV07"),
-    ("Percepción 5329", "PV07"),
-    ("Percepción 212", "PV06"),
-    ("I.I.B.B(SANTA FE)", "PV06"),
-    ("I.I.B.B(FORMOSA)", "PV06"),
-]
-
-
-def process_pastor(uploaded) -> tuple[pd.DataFrame, list[str]]:
-    warnings: list[str] = []
-    df = pd.read_excel(uploaded, sheet_name=0, header=0, dtype=object)
-
-    COL_FECHA = pick_col(df, "Fecha Comprobante")
-    COL_DESC_COMP = pick_col(df, "Descripcion Comprobante", "Descripción Comprobante", "Comprobante")
-    COL_LETRA = pick_col(df, "Letra")
-    COL_SUC = pick_col(df, "Serie \\ Punto de venta", "Serie / Punto de venta", "Serie / Punto de Venta", "Punto de Venta", "Punto de venta")
-    COL_NUM = pick_col(df, "Numero", "Número")
-    COL_RS = pick_col(df, "Razon Social", "Razón Social")
-    COL_TDOC = pick_col(df, "Tipo Id", "Tipo ID", "Tipo Id.")
-    COL_NDOC = pick_col(df, "Identificador", "Código Identificación", "Codigo Identificacion")
-    COL_PCIA = pick_col(df, "Provincia", "Pcia", "Provincia (BN)") if ("Provincia" in df.columns or "Pcia" in df.columns) else pick_col(df, "BN")
-    COL_COND = pick_col(df, "Tipo IVA", "Condición fiscal", "Condicion fiscal", "Cond Fisc")
-
-    COL_NETO = pick_col(df, "Subtotal Neto", "Neto", "Neto Gravado")
-    COL_IVA = pick_col(df, "I.V.A", "IVA")
-    COL_TOTAL = pick_col(df, "Subtotal Final", "Total")
-
-    registros = []
-
-    for i, row in df.iterrows():
-        desc = str(row.get(COL_DESC_COMP, "") or "").strip().upper()
-        if not desc:
-            continue
-        if desc in PASTOR_SKIP:
-            continue
-
-        if desc == "FACTURA":
-            cpbte = "F"
-        elif desc == "NOTA DE CREDITO":
-            cpbte = "NC"
-        elif desc == "NOTA DE DEBITO":
-            cpbte = "ND"
-        else:
-            continue
-
-        es_credito = (cpbte == "NC")
-
-        def sg(x: float) -> float:
-            if x == 0:
-                return 0.0
-            return -abs(x) if es_credito else abs(x)
-
-        letra = str(row.get(COL_LETRA, "") or "").strip().upper()
-        suc = row.get(COL_SUC)
-        nro = row.get(COL_NUM)
-        rs = row.get(COL_RS)
-
-        tdoc = tipo_doc(row.get(COL_TDOC))
-        nro_doc = digits_only(row.get(COL_NDOC))
-
-        cuit_out = nro_doc
-        if tdoc == 96 and nro_doc:
-            dni8 = nro_doc.zfill(8)
-            cuit_out = f"00-{dni8}-0"
-
-        cond = str(row.get(COL_COND, "") or "").strip().upper()
-        if cond == "MT":
-            cond = "MTD"
-
-        pcia = str(row.get("BN", row.get(COL_PCIA, "")) or "").strip()
-
-        neto = sg(parse_amount(row.get(COL_NETO)))
-        iva = sg(parse_amount(row.get(COL_IVA)))
-        total_origen = sg(parse_amount(row.get(COL_TOTAL)))
-
-        if neto != 0:
-            esperado = round(abs(neto) * 0.21, 2)
-            if round(abs(iva), 2) not in (esperado, round(esperado + 0.01, 2), round(esperado - 0.01, 2)):
-                warnings.append(
-                    f"Fila {i+2}: IVA no cuadra con 21% (Neto={neto:,.2f} / IVA={iva:,.2f} / Esperado≈{sg(esperado):,.2f})."
-                )
-
-        percs = []
-        for col_name, cod_pr in PASTOR_PERCEP_MAP:
-            if col_name in df.columns:
-                val = sg(parse_amount(row.get(col_name)))
-                if val != 0:
-                    percs.append((cod_pr, val, col_name))
-
-        if neto == 0 and iva == 0 and not percs:
-            continue
-
-        base = {
-            "Fecha dd/mm/aaaa": fecha_out(row.get(COL_FECHA)),
-            "Cpbte": cpbte,
-            "Tipo": letra,
-            "Suc.": suc,
-            "Número": nro,
-            "Razón Social o Denominación Cliente": rs,
-            "Tipo Doc.": tdoc,
-            "CUIT": cuit_out,
-            "Domicilio": "",
-            "C.P.": "",
-            "Pcia": pcia,
-            "Cond Fisc": cond,
-            # >>> antes de la columna M (Cód. Neto)
-            "Moneda": "",
-            "Tipo de cambio": 0.0,
-            # <<<
-            "Cód. Neto": "135",
-            "Cód. NG/EX": "",
-            "Cód. P/R": "",
-            "Pcia P/R": "",
-        }
-
-        lineas = []
-
-        main = base.copy()
-        main["Neto Gravado"] = neto
-        main["Alíc."] = 21.0
-        main["IVA Liquidado"] = iva
-        main["IVA Débito"] = iva
-        main["Conceptos NG/EX"] = 0.0
-        main["Perc./Ret."] = 0.0
-
-        if percs:
-            cod_pr0, val0, _ = percs[0]
-            main["Cód. P/R"] = cod_pr0
-            main["Perc./Ret."] = val0
-
-        main["Total"] = (
-            float(main["Neto Gravado"] or 0)
-            + float(main["IVA Liquidado"] or 0)
-            + float(main["Conceptos NG/EX"] or 0)
-            + float(main["Perc./Ret."] or 0)
-        )
-        lineas.append(main)
-
-        if len(percs) > 1:
-            for cod_pr, val, _colname in percs[1:]:
-                extra = base.copy()
-                extra["Neto Gravado"] = 0.0
-                extra["Alíc."] = 0.0
-                extra["IVA Liquidado"] = 0.0
-                extra["IVA Débito"] = 0.0
-                extra["Conceptos NG/EX"] = 0.0
-                extra["Cód. P/R"] = cod_pr
-                extra["Perc./Ret."] = val
-                extra["Total"] = float(val or 0)
-                lineas.append(extra)
-
-        total_calc = sum(float(x.get("Total", 0) or 0) for x in lineas)
-        if total_origen != 0 and round(total_calc, 2) != round(total_origen, 2):
-            warnings.append(
-                f"Fila {i+2}: Total origen ({total_origen:,.2f}) != Total calculado ({total_calc:,.2f})."
-            )
-
-        registros.extend(lineas)
-
-    if not registros:
-        raise ValueError("No se encontraron comprobantes con importes (Pastor Chess).")
-
-    cols_salida = [
-        "Fecha dd/mm/aaaa", "Cpbte", "Tipo", "Suc.", "Número",
-        "Razón Social o Denominación Cliente", "Tipo Doc.", "CUIT",
-        "Domicilio", "C.P.", "Pcia", "Cond Fisc",
-        # >>> antes de la columna M (Cód. Neto)
-        "Moneda", "Tipo de cambio",
-        # <<<
-        "Cód. Neto", "Neto Gravado", "Alíc.",
-        "IVA Liquidado", "IVA Débito",
-        "Cód. NG/EX", "Conceptos NG/EX",
-        "Cód. P/R", "Perc./Ret.", "Pcia P/R",
-        "Total",
-    ]
-
-    salida = pd.DataFrame(registros)[cols_salida]
-    return salida, warnings
+    EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}-{threading.get_ident()}.tmp")
+    perf = Rendimiento(memoria)
+    try:
+        export_zip(_salida, por, str(tmp), perf=perf, formato=formato, prefijo=prefijo, pool=pool_conversiones())
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    cache_resultados().guardar_export_perf(clave, "zip", perf.registros())
+    data = path.read_bytes()
+    podar_por_uso(EXPORTS_DIR, "*.zip", max_archivos=EXPORTS_MAX_ARCHIVOS)
+    return data
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner="Generando Excel de advertencias...")
+def export_advertencias_cached(clave: str, fuente: str, version: str, _warns: Advertencias) -> bytes:
+    return export_advertencias(_warns)
 
 
 # ---------------- Ejecutar según fuente ----------------
+# Se aceptan varios archivos (p. ej. uno por punto de venta o por mes): se convierten
+# en paralelo y se unen en una sola salida ordenada.
+NOMBRES_SALIDA = {"arca": "Emitidos_salida.xlsx", "pastor": "PastorChess_salida.xlsx"}
+
 if fuente.startswith("ARCA"):
-    uploaded = st.file_uploader("Subí ARCA Emitidos (.xlsx o .csv)", type=["xlsx", "csv"], key="arca_upl")
-    if uploaded is None:
-        st.stop()
+    fuente_id = "arca"
+    uploads = st.file_uploader("Subí ARCA Emitidos (.xlsx o .csv)", type=["xlsx", "csv"], key="arca_upl", accept_multiple_files=True)
+elif fuente.startswith("Ventas"):
+    fuente_id = "pastor"
+    uploads = st.file_uploader("Subí Ventas Pastor Chess (.xlsx)", type=["xlsx"], key="pastor_upl", accept_multiple_files=True)
+else:
+    # la fuente se reconoce por los encabezados de los archivos subidos
+    fuente_id = None
+    uploads = st.file_uploader(
+        "Subí ARCA Emitidos (.xlsx o .csv) o Ventas Pastor Chess (.xlsx)", type=["xlsx", "csv"],
+        key="auto_upl", accept_multiple_files=True,
+    )
+
+medir_memoria = st.checkbox("Medir memoria por etapa (más lento)", key="medir_memoria")
+# Registro local de comprobantes ya pasados a Holistor: con descargas de ARCA que se
+# superponen, sólo se convierten (y se descargan) los comprobantes nuevos.
+usar_registro = fuente_id != "pastor" and st.checkbox(
+    "Omitir comprobantes ya convertidos (registro local)", key="usar_registro",
+)
+
+if not uploads:
+    st.stop()
+
+archivos = [(u.name, u.getvalue()) for u in uploads]
+clave = hashlib.sha256(
+    "|".join(f"{nombre}:{hashlib.sha256(data).hexdigest()}" for nombre, data in archivos).encode()
+).hexdigest()
+
+if fuente_id is None:
     try:
-        salida, warns = process_arca(uploaded)
-        nombre_salida = "Emitidos_salida.xlsx"
+        detectadas = set(fuentes_detectadas(clave, _archivos=archivos))
     except Exception as e:
         st.error(str(e))
         st.stop()
-else:
-    uploaded = st.file_uploader("Subí Ventas Pastor Chess (.xlsx)", type=["xlsx"], key="pastor_upl")
-    if uploaded is None:
+    if len(detectadas) > 1:
+        st.error("Los archivos son de fuentes distintas: subí sólo ARCA Emitidos o sólo Ventas Pastor Chess.")
         st.stop()
-    try:
-        salida, warns = process_pastor(uploaded)
-        nombre_salida = "PastorChess_salida.xlsx"
-    except Exception as e:
-        st.error(str(e))
+    fuente_id = detectadas.pop()
+    st.caption(f"Fuente detectada: {FUENTES[fuente_id].nombre}")
+    usar_registro = usar_registro and fuente_id == "arca"
+nombre_salida = NOMBRES_SALIDA[fuente_id]
+
+registro = cuit_emisor = None
+firma_registro = ""
+if usar_registro:
+    cuit_emisor = digits_only(st.text_input(
+        "CUIT emisor", value=cuit_detectado(clave, archivos[0][0], archivos[0][1]), key=f"cuit_{clave}",
+    ))
+    if not cuit_emisor:
+        # sin CUIT los comprobantes de distintos clientes se pisarían en el registro
+        st.warning("Ingresá el CUIT emisor para usar el registro de comprobantes.")
         st.stop()
+    registro = str(REGISTRO_PATH)
+    with RegistroComprobantes(registro) as reg:
+        firma_registro = reg.firma()
+
+# firma_registro sólo cambia la clave cuando se registran comprobantes nuevos; la de las
+# tablas locales, cuando se actualizan (assets/cotizaciones_usd.csv, assets/padron.csv)
+firma_tablas = tuple(p.stat().st_mtime_ns if p.exists() else 0 for p in (COTIZACIONES_PATH, PADRON_PATH))
+clave_trabajo = hashlib.sha256(repr((
+    clave, fuente_id, VERSION_PROCESO, medir_memoria, registro, cuit_emisor, firma_registro, firma_tablas,
+)).encode()).hexdigest()
+job = trabajo(
+    clave_trabajo, archivos, fuente=fuente_id, memoria=medir_memoria,
+    registro=registro, cuit_emisor=cuit_emisor, snapshots=SNAPSHOTS,
+)
+
+
+@st.fragment(run_every=AVANCE_INTERVALO)
+def mostrar_avance(job: TrabajoConversion):
+    # Se refresca sola mientras convierte; al terminar vuelve a correr toda la página
+    if job.terminado:
+        st.rerun()
+    fraccion, texto = job.progreso()
+    st.progress(fraccion, text=texto or "Procesando archivos...")
+    if st.button("Cancelar", key="cancelar_conversion"):
+        job.cancelar()
+        st.rerun()
+
+
+# tras cancelar, el hilo termina en la próxima vuelta (no espera a los procesos)
+if not job.terminado:
+    mostrar_avance(job)
+    st.stop()
+
+if isinstance(job.error, TiempoExcedido):
+    st.error(f"{job.error} Probá con menos archivos por vez o con el CSV de ARCA.")
+    if st.button("Reintentar"):
+        st.session_state.pop("trabajo", None)
+        st.rerun()
+    st.stop()
+if job.cancelado or isinstance(job.error, Cancelado):
+    st.warning("Conversión cancelada.")
+    if st.button("Reintentar"):
+        st.session_state.pop("trabajo", None)
+        st.rerun()
+    st.stop()
+if isinstance(job.error, SinComprobantesNuevos):
+    st.info(str(job.error))
+    st.stop()
+if job.error is not None:
+    st.error(str(job.error))
+    st.stop()
+
+salida, warns = job.resultado
+rendimiento = job.perf.registros()
+
+if len(archivos) > 1:
+    st.caption(f"{len(archivos)} archivos unidos en una sola salida ({len(salida)} líneas).")
 
 # ---------------- Preview ----------------
 st.subheader("Vista previa de la salida")
 st.dataframe(salida.head(50))
 
+# Mismo resumen que la hoja "Resumen" del Excel
+with st.expander("Resumen IVA Ventas"):
+    st.dataframe(resumen_cached(clave_trabajo, fuente_id, VERSION_PROCESO, _salida=salida), hide_index=True)
+
 if warns:
     st.warning("Se detectaron advertencias (no bloquean la salida).")
-    st.write("\n".join(warns[:50]))
-    if len(warns) > 50:
-        st.write(f"... y {len(warns) - 50} más.")
-
-# ---------------- Export ----------------
-buffer = BytesIO()
-with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-    salida.to_excel(writer, sheet_name="Salida", index=False)
-
-    wb = writer.book
-    ws = writer.sheets["Salida"]
-
-    money_fmt = wb.add_format({"num_format": "#,##0.00"})
-    aliq_fmt = wb.add_format({"num_format": "00.000"})
-    text_fmt = wb.add_format({"num_format": "@"})  # texto
-
-    col_idx = {c: i for i, c in enumerate(salida.columns)}
-
-    ws.set_column(col_idx["Fecha dd/mm/aaaa"], col_idx["Fecha dd/mm/aaaa"], 12, text_fmt)
-
-    ws.set_column(col_idx["Cpbte"], col_idx["Cpbte"], 6)
-    ws.set_column(col_idx["Tipo"], col_idx["Tipo"], 6)
-    ws.set_column(col_idx["Suc."], col_idx["Suc."], 10)
-    ws.set_column(col_idx["Número"], col_idx["Número"], 12)
-    ws.set_column(col_idx["Razón Social o Denominación Cliente"], col_idx["Razón Social o Denominación Cliente"], 42)
-    ws.set_column(col_idx["CUIT"], col_idx["CUIT"], 16)
-
-    if "Moneda" in col_idx:
-        ws.set_column(col_idx["Moneda"], col_idx["Moneda"], 10)
-    if "Tipo de cambio" in col_idx:
-        ws.set_column(col_idx["Tipo de cambio"], col_idx["Tipo de cambio"], 12, money_fmt)
-
-    for nombre in ["Neto Gravado", "IVA Liquidado", "IVA Débito", "Conceptos NG/EX", "Perc./Ret.", "Total"]:
-        if nombre in col_idx:
-            ws.set_column(col_idx[nombre], col_idx[nombre], 16, money_fmt)
-
-    ws.set_column(col_idx["Alíc."], col_idx["Alíc."], 8, aliq_fmt)
-
-buffer.seek(0)
-
+    st.dataframe(
+        pd.DataFrame(list(warns.resumen().items()), columns=["Advertencia", "Filas"]),
+        hide_index=True,
+    )
+    st.write("\n".join(warns.muestra()))
+    if len(warns) > ADVERTENCIAS_MUESTRA:
+        st.write(f"... y {len(warns) - ADVERTENCIAS_MUESTRA} más (ver el Excel de advertencias).")
+    st.download_button(
+        "📥 Descargar advertencias (todas las filas)",
+        data=partial(export_advertencias_cached, clave_trabajo, fuente_id, VERSION_PROCESO, _warns=warns),
+        file_name=nombre_salida.replace("_salida.xlsx", "_advertencias.xlsx"),
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+# El Excel se genera recién al hacer clic en descargar (y queda cacheado)
 st.download_button(
     "📥 Descargar Excel procesado",
-    data=buffer,
+    data=partial(export_cached, clave_trabajo, fuente_id, VERSION_PROCESO, medir_memoria, _salida=salida),
     file_name=nombre_salida,
     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
 )
+# Texto delimitado (;) para importar en Holistor: mucho más rápido que el Excel en cargas grandes
+st.download_button(
+    "📥 Descargar CSV para Holistor",
+    data=partial(export_csv_cached, clave_trabajo, fuente_id, VERSION_PROCESO, medir_memoria, _salida=salida),
+    file_name=nombre_salida.replace(".xlsx", ".csv"),
+    mime="text/csv",
+)
+# Un archivo por período y/o punto de venta, todos en un ZIP (para importarlos por separado)
+separar = st.multiselect("Separar la descarga por", list(PARTICIONES), format_func=PARTICIONES.get, key="separar_por")
+if separar:
+    formato_zip = st.radio("Formato de cada parte", ["xlsx", "csv"], horizontal=True, key="formato_zip")
+    st.download_button(
+        "📥 Descargar ZIP por partes",
+        data=partial(
+            export_zip_archivo, clave_trabajo, fuente_id, VERSION_PROCESO, medir_memoria,
+            tuple(p for p in PARTICIONES if p in separar), formato_zip, nombre_salida.removesuffix(".xlsx"),
+            _salida=salida,
+        ),
+        file_name=nombre_salida.replace(".xlsx", ".zip"),
+        mime="application/zip",
+    )
+
+if usar_registro and st.button("✔ Registrar estos comprobantes como convertidos"):
+    with RegistroComprobantes(registro) as reg:
+        nuevos = reg.registrar_salida(salida, cuit_emisor, ", ".join(nombre for nombre, _ in archivos))
+    st.success(f"{nuevos} comprobantes registrados: la próxima conversión los va a omitir.")
+
+# ---------------- Rendimiento ----------------
+# Tiempo, filas y pico de memoria por etapa de la última conversión (el export aparece
+# después de la primera descarga). Con varios archivos los tiempos se suman entre procesos.
+with st.expander("Rendimiento"):
+    etapas = pd.DataFrame(rendimiento + cache_resultados().export_perf(clave_trabajo))
+    etapas = etapas.rename(columns={
+        "nombre": "Etapa", "segundos": "Segundos", "filas_in": "Filas entrada",
+        "filas_out": "Filas salida", "pico_mb": "Pico MB", "veces": "Veces",
+    })
+    if not medir_memoria:
+        etapas = etapas.drop(columns="Pico MB")
+    st.dataframe(etapas, hide_index=True)
+    st.caption(f"Total: {etapas['Segundos'].sum():.2f} s")
 
 st.markdown(
     "<br><hr style='opacity:0.3'><div style='text-align:center; font-size:12px; color:#6b7280;'>"
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(RAIZ), str(RAIZ / "benchmarks")]
@@ -0,0 +1,34 @@
+# CSV de ARCA leído por bloques: misma salida y mismas filas de origen que de una vez
+import pandas as pd
+import pytest
+
+import generadores as g
+from emitidos_core import NamedBytesIO, process_arca, read_arca, read_arca_chunks
+
+
+def _advertencias(warns) -> pd.DataFrame:
+    tabla = warns.tabla()
+    tabla = tabla[sorted(tabla.columns)]  # el orden de las columnas depende del primer bloque con cada control
+    return tabla.sort_values(["Fila", "Advertencia"], kind="mergesort").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("chunksize", [7, 64])
+def test_bloques_igual_que_todo_junto(chunksize):
+    df = g.arca_frame(300, seed=4)
+    usd_sin_tc = df.index[(df["Moneda"] == "USD") & (df["Tipo Cambio"] == 0)]
+    assert len(usd_sin_tc) and usd_sin_tc[0] % chunksize  # la fila a controlar no abre un bloque
+    data = g.arca_bytes(df)
+
+    # el índice sigue la posición en el archivo de un bloque al otro
+    bloques = list(read_arca_chunks(NamedBytesIO(data, "emitidos.csv"), chunksize))
+    assert len(bloques) == -(-len(df) // chunksize)
+    assert pd.concat(bloques).equals(read_arca(NamedBytesIO(data, "emitidos.csv"))[0])
+
+    entero, warns_entero = process_arca(NamedBytesIO(data, "emitidos.csv"), chunksize=len(df), cotizaciones=None, padron=None)
+    partido, warns_partido = process_arca(NamedBytesIO(data, "emitidos.csv"), chunksize=chunksize, cotizaciones=None, padron=None)
+    assert partido.equals(entero)
+    tabla = _advertencias(warns_partido)
+    assert tabla.equals(_advertencias(warns_entero))
+    # fila del CSV = encabezado (1) + posición entre los datos (desde 1)
+    fila_usd = tabla.loc[tabla["Advertencia"].str.startswith("Moneda=USD"), "Fila"].tolist()
+    assert fila_usd == [i + 2 for i in usd_sin_tc]
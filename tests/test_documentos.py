@@ -0,0 +1,60 @@
+# Receptor (Tipo Doc. / CUIT / Cond Fisc) y validación de documentos
+import pytest
+
+import generadores as g
+from emitidos_core import NamedBytesIO, process_arca
+
+COLS = ["Tipo Doc.", "CUIT", "Cond Fisc"]
+MOTORES = ["columnar", "rows"]
+
+
+def _arca(filas: list[tuple[str, str, str]], xlsx: bool) -> NamedBytesIO:
+    df = g.arca_frame(len(filas), texto=xlsx)
+    for i, fila in enumerate(filas):
+        df.loc[i, ["Tipo de Comprobante", "Tipo Doc. Receptor", "Nro. Doc. Receptor"]] = fila
+    return NamedBytesIO(g.arca_bytes(df, xlsx), "emitidos.xlsx" if xlsx else "emitidos.csv")
+
+
+def _receptor(archivo: NamedBytesIO, engine: str):
+    salida, warnings = process_arca(archivo, engine=engine, cotizaciones=None, padron=None)
+    primeras = salida.drop_duplicates("Número")
+    return primeras.set_index(primeras["Número"].astype(int))[COLS], list(warnings)
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_xlsx_cuil_como_antes(engine):
+    # XLSX: CUIL y CDI salen como siempre (Tipo Doc. 0, número como vino) pero se validan como en el CSV
+    archivo = _arca([
+        ("6 - Factura B", "CUIL", "20123456786"), ("6 - Factura B", "CDI", "20111222339"),
+        ("6 - Factura B", "CUIL", "5444333"),
+    ], xlsx=True)
+    receptor, warnings = _receptor(archivo, engine)
+    assert receptor.loc[1].tolist() == [0, "20123456786", ""]
+    assert receptor.loc[2].tolist() == [0, "20111222339", ""]
+    assert receptor.loc[3].tolist() == [0, "5444333", ""]
+    docs = [w for w in warnings if w.startswith(("Fila 3:", "Fila 4:", "Fila 5:"))]
+    assert docs == ["Fila 4: documento 20111222339 (Tipo Doc. 87) inválido: dígito verificador incorrecto."]
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_csv_cuil_factura_b(engine):
+    # CSV tipo 86 en factura B: sale como DNI (00-XXXXXXXX-0) como siempre; con 11 dígitos se valida como CUIL
+    archivo = _arca([("6", "86", "20123456786"), ("6", "86", "5444333"), ("6", "86", "20111222339")], xlsx=False)
+    receptor, warnings = _receptor(archivo, engine)
+    assert receptor.loc[1].tolist() == [86, "00-20123456786-0", "CF"]
+    assert receptor.loc[2].tolist() == [86, "00-05444333-0", "CF"]
+    assert receptor.loc[3].tolist() == [86, "00-20111222339-0", "CF"]
+    docs = [w for w in warnings if w.startswith(("Fila 2:", "Fila 3:", "Fila 4:"))]
+    assert docs == ["Fila 4: documento 20111222339 (Tipo Doc. 86) inválido: dígito verificador incorrecto."]
+
+
+@pytest.mark.parametrize("engine", MOTORES)
+def test_digitos_unicode(engine):
+    # dígitos de ancho completo: la fila queda marcada, la conversión sigue
+    archivo = _arca([("6", "80", "２０１２３４５６７８６"), ("6", "96", "１２３４５６７８")], xlsx=False)
+    _, warnings = _receptor(archivo, engine)
+    docs = [w for w in warnings if w.startswith(("Fila 2:", "Fila 3:"))]
+    assert docs == [
+        "Fila 2: documento ２０１２３４５６７８６ (Tipo Doc. 80) inválido: tiene dígitos que no son 0-9.",
+        "Fila 3: documento １２３４５６７８ (Tipo Doc. 96) inválido: tiene dígitos que no son 0-9.",
+    ]
@@ -0,0 +1,54 @@
+# Exportación Holistor (Excel y ZIP por partes)
+import zipfile
+from io import BytesIO
+
+import openpyxl
+import pandas as pd
+
+import emitidos_core as core
+import generadores as g
+from emitidos_core import NamedBytesIO, export_xlsx, export_zip, particionar, process_arca
+
+
+def _salida(n: int) -> pd.DataFrame:
+    salida, _ = process_arca(NamedBytesIO(g.arca_csv(n), "emitidos.csv"), cotizaciones=None, padron=None)
+    return salida
+
+
+def test_xlsx_sigue_en_otra_hoja(monkeypatch, tmp_path):
+    # pasado el máximo de filas de una hoja, la salida sigue en "Salida 2", ... sin perder filas
+    monkeypatch.setattr(core, "XLSX_MAX_FILAS", 3)
+    salida = _salida(6)
+    assert 6 < len(salida) <= 9
+    path = tmp_path / "salida.xlsx"
+    export_xlsx(salida, str(path))
+    wb = openpyxl.load_workbook(path, read_only=True)
+    assert wb.sheetnames == ["Salida", "Salida 2", "Salida 3", "Resumen"]
+    filas = []
+    for hoja in wb.sheetnames[:3]:
+        encabezado, *datos = wb[hoja].iter_rows(values_only=True)
+        assert list(encabezado) == list(salida.columns)
+        assert 0 < len(datos) <= 3
+        filas += [fila[salida.columns.get_loc("Número")] for fila in datos]
+    assert filas == salida["Número"].tolist()
+
+
+def test_zip_por_periodo_y_punto_de_venta():
+    # "3", 3 y "00003" son el mismo punto de venta; sin fecha va a su propia parte
+    salida = pd.DataFrame({
+        "Fecha dd/mm/aaaa": ["05/03/2024", "20/03/2024", "01/04/2024", "", "31/03/2024"],
+        "Suc.": ["3", "00003", 3, "4", "4"],
+        "Número": [1, 2, 3, 4, 5],
+    }).reindex(columns=core.COLS_SALIDA)
+    partes = particionar(salida, ("periodo", "suc"))
+    assert [(nombre, parte["Número"].tolist()) for nombre, parte in partes] == [
+        ("2024-03_Suc_00003", [1, 2]), ("2024-03_Suc_00004", [5]), ("2024-04_Suc_00003", [3]), ("sin_fecha_Suc_00004", [4]),
+    ]
+    assert [nombre for nombre, _ in particionar(salida, ("suc",))] == ["Suc_00003", "Suc_00004"]
+
+    esperado = [(f"Emitidos_{nombre}.csv", core.export_txt(parte)) for nombre, parte in partes]
+    # en un proceso o en paralelo: las mismas partes, en el mismo orden
+    for workers in (1, 2):
+        data = export_zip(salida, ("periodo", "suc"), formato="csv", prefijo="Emitidos", workers=workers)
+        with zipfile.ZipFile(BytesIO(data)) as zf:
+            assert [(nombre, zf.read(nombre)) for nombre in zf.namelist()] == esperado
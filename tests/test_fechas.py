@@ -0,0 +1,21 @@
+# Fechas de salida (fecha_out / fecha_out_col)
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from emitidos_core import fecha_out, fecha_out_col
+
+
+@pytest.mark.parametrize("valores, esperado", [
+    ([pd.Timestamp("2024-03-05"), pd.NaT, pd.Timestamp("2024-12-31 10:30")], ["05/03/2024", "", "31/12/2024"]),
+    ([datetime(2024, 3, 5), date(2024, 1, 2), None, np.nan], ["05/03/2024", "02/01/2024", "", ""]),
+    (["05-03-2024", "05/03/2024", " 2024-03-05 ", "", None], ["05/03/2024", "05/03/2024", "05/03/2024", "", ""]),
+    (["2024-03-05", "2024-03-05 10:30:00", "05-03-2024", "sin fecha"], ["05/03/2024", "05/03/2024", "05/03/2024", "sin fecha"]),
+])
+def test_columna_igual_que_escalar(valores, esperado):
+    # fechas con NaT, texto con "-" y formatos mezclados: igual que fecha_out celda por celda
+    columna = list(fecha_out_col(pd.Series(valores)))
+    assert columna == esperado
+    assert columna == [fecha_out(v) for v in valores]
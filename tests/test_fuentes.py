@@ -0,0 +1,53 @@
+# Reconocimiento de la fuente por encabezados (detectar_fuente) y lectura desde esa fila
+import openpyxl
+import pytest
+
+import emitidos_core as core
+import generadores as g
+from emitidos_core import NamedBytesIO
+
+
+def test_detecta_fuente_y_rechaza_desconocidos():
+    csv = core.detectar_fuente(NamedBytesIO(g.arca_csv(5), "emitidos.csv"))
+    xlsx = core.detectar_fuente(NamedBytesIO(g.arca_xlsx(5), "emitidos.xlsx"))
+    pastor = core.detectar_fuente(NamedBytesIO(g.pastor_xlsx(5), "ventas.xlsx"))
+    assert (csv.fuente, csv.formato, csv.fila_header) == ("arca", "csv", 1)
+    assert (xlsx.fuente, xlsx.formato, xlsx.fila_header) == ("arca", "xlsx", 2)
+    assert (pastor.fuente, pastor.formato, pastor.fila_header) == ("pastor", "xlsx", 1)
+    assert xlsx.cols == csv.cols
+
+    with pytest.raises(core.FuenteIncorrecta, match="parece de"):
+        core.detectar_fuente(NamedBytesIO(g.pastor_xlsx(5), "ventas.xlsx"), esperada="arca")
+    desconocido = NamedBytesIO("Fecha;Cliente;Total\n01/01/2024;ACME;100,00\n".encode(), "otro.csv")
+    with pytest.raises(core.FuenteIncorrecta, match="No se reconoce"):
+        core.detectar_fuente(desconocido)
+
+
+def test_lectura_usa_la_fila_detectada():
+    # una fila previa con dos nombres de encabezado engaña a la búsqueda propia de
+    # read_xlsx_table; convert lee desde la fila que reconoció detectar_fuente
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["Filtros:", "Fecha de Emisión", "Punto de Venta"])
+    df = g.arca_frame(20, seed=1, texto=True)
+    ws.append(list(df.columns))
+    for fila in df.itertuples(index=False):
+        ws.append([v.to_pydatetime() if hasattr(v, "to_pydatetime") else v for v in fila])
+    archivo = NamedBytesIO(b"", "emitidos.xlsx")
+    wb.save(archivo)
+
+    det = core.detectar_fuente(archivo)
+    assert (det.fuente, det.fila_header) == ("arca", 2)
+    tabla = core.read_xlsx_table(archivo, core.ARCA_HEADER_HINTS, fila_header=det.fila_header)
+    assert list(tabla.columns) == list(df.columns)
+    assert len(tabla) == 20 and tabla.attrs["fila_datos"] == 3
+
+    salida, _ = core.convert(archivo, cotizaciones=None, padron=None)
+    esperado, _ = core.convert(NamedBytesIO(g.arca_bytes(df, xlsx=True), "emitidos.xlsx"), cotizaciones=None, padron=None)
+    assert salida.equals(esperado)
+
+
+def test_lote_auto_no_mezcla_fuentes():
+    archivos = [("emitidos.csv", g.arca_csv(10)), ("ventas.xlsx", g.pastor_xlsx(10))]
+    with pytest.raises(core.FuenteIncorrecta, match="fuentes distintas"):
+        core.convert_batch(archivos, "auto")
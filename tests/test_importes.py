@@ -0,0 +1,62 @@
+# Importes en centavos (parse_fijo / parse_fijo_col / mul_tc / div_redondeo)
+import numpy as np
+import pandas as pd
+import pytest
+
+from emitidos_core import TC_DECIMALES, div_redondeo, mul_tc, parse_fijo, parse_fijo_col
+
+VALORES = [
+    "1.234,56", "1,234.56", "1234.56", "1234,5", " 12 345,6 ", "-1.234,56", "-1,234.56",
+    "0,005", "-0,005", "0,004", 2.675, -2.675, 1.005, 7, np.int64(-3),
+    None, np.nan, float("inf"), float("-inf"), "inf", "NaN", "1e30", "-1e30", "abc", "",
+]
+
+
+@pytest.mark.parametrize("texto, centavos", [
+    ("1.234,56", 123456),
+    ("1,234.56", 123456),
+    ("1.234.567,8", 123456780),
+    ("1,234,567.8", 123456780),
+    ("1234.56", 123456),
+    ("1234,5", 123450),
+    (" 12 345,6 ", 1234560),
+])
+def test_separadores(texto, centavos):
+    assert parse_fijo(texto) == centavos
+
+
+@pytest.mark.parametrize("valor, centavos", [
+    ("-1.234,56", -123456),
+    ("-1,234.56", -123456),
+    (-2.675, -268),
+    ("-0,005", -1),  # a la mitad, lejos del cero
+    ("-0,004", 0),
+])
+def test_negativos(valor, centavos):
+    assert parse_fijo(valor) == centavos
+
+
+@pytest.mark.parametrize("valor", [np.nan, float("inf"), float("-inf"), "inf", "-Infinity", "NaN", "1e30", None, "", "abc"])
+def test_no_finitos_o_invalidos_valen_cero(valor):
+    assert parse_fijo(valor) == 0
+    assert parse_fijo_col(pd.Series([valor], dtype=object)).tolist() == [0]
+
+
+def test_mul_tc_redondea_lejos_del_cero():
+    tc = parse_fijo("1052,755", TC_DECIMALES)
+    assert tc == 1_052_755_000
+    # 1,00 x 1052,755 = 1052,755 -> 1052,76 ; 0,01 x 1052,755 = 10,52755 -> 10,53
+    centavos = np.array([100, -100, 1, -1, 0], dtype=np.int64)
+    assert mul_tc(centavos, tc).tolist() == [105276, -105276, 1053, -1053, 0]
+    # un importe grande no desborda int64
+    assert mul_tc(np.array([10 ** 15], dtype=np.int64), tc).tolist() == [1_052_755 * 10 ** 12]
+
+
+def test_div_redondeo():
+    assert div_redondeo(np.array([5, -5, 4, -4, 15, -15]), 10).tolist() == [1, -1, 0, 0, 2, -2]
+
+
+def test_columna_igual_que_escalar():
+    s = pd.Series(VALORES, dtype=object)
+    for decimales in (2, TC_DECIMALES):
+        assert parse_fijo_col(s, decimales).tolist() == [parse_fijo(v, decimales) for v in VALORES]
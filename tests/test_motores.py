@@ -0,0 +1,31 @@
+# El motor columnar da lo mismo que el de filas (salida y advertencias)
+from functools import partial
+
+import pytest
+
+import generadores as g
+from emitidos_core import NamedBytesIO, process_arca, process_pastor
+
+SEMILLAS = [0, 1, 7]
+FILAS = 1_500
+
+
+def _iguales(convertir, data: bytes, nombre: str):
+    salida_filas, warns_filas = convertir(NamedBytesIO(data, nombre), engine="rows")
+    salida, warns = convertir(NamedBytesIO(data, nombre), engine="columnar")
+    assert salida_filas.equals(salida)
+    # el orden de las advertencias puede cambiar entre motores; la cantidad por control no
+    assert len(warns_filas) == len(warns)
+    assert warns_filas.resumen() == warns.resumen()
+    assert sorted(warns_filas) == sorted(warns)
+
+
+@pytest.mark.parametrize("seed", SEMILLAS)
+@pytest.mark.parametrize("generador, nombre", [(g.arca_csv, "emitidos.csv"), (g.arca_xlsx, "emitidos.xlsx")])
+def test_arca(generador, nombre, seed):
+    _iguales(partial(process_arca, cotizaciones=None, padron=None), generador(FILAS, seed), nombre)
+
+
+@pytest.mark.parametrize("seed", SEMILLAS)
+def test_pastor(seed):
+    _iguales(process_pastor, g.pastor_xlsx(FILAS, seed), "ventas.xlsx")
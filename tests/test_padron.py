@@ -0,0 +1,49 @@
+# Padrón de receptores (Padron: índice SQLite del CSV, Cond Fisc)
+import os
+
+import pandas as pd
+
+from emitidos_core import Padron, completar_padron
+
+
+def _csv(path, filas, mtime_ns):
+    pd.DataFrame(filas, columns=["CUIT", "Domicilio", "Provincia", "Condición IVA"]).to_csv(path, sep=";", index=False)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_reindexa_si_cambia_el_archivo(tmp_path, monkeypatch):
+    origen, base = tmp_path / "padron.csv", tmp_path / "padron.sqlite"
+    _csv(origen, [
+        ["20-12345678-6", "Mitre 1", "Santa Fe", "Monotributo"],
+        ["30712345671", "Belgrano 2", "Córdoba", "IVA Responsable Inscripto"],
+        ["27112223334", "", "", "mt"],
+    ], 1_700_000_000 * 10**9)
+    with Padron(origen, base) as padron:
+        datos = padron.buscar(["20123456786", "30712345671", "27112223334", "23111222339"])
+    assert datos["Cond Fisc"].to_dict() == {"20123456786": "MTD", "30712345671": "RI", "27112223334": "MTD"}
+
+    salida = pd.DataFrame({
+        "CUIT": ["20123456786", "23111222339", "5444333"], "Domicilio": ["", "", ""], "C.P.": ["", "", ""],
+        "Pcia": ["", "", ""], "Cond Fisc": ["CF", "CF", "CF"],
+    })
+    with Padron(origen, base) as padron:
+        assert completar_padron(salida, padron) == 1
+    assert salida.loc[0, ["Domicilio", "Pcia", "Cond Fisc"]].tolist() == ["Mitre 1", "Santa Fe", "MTD"]
+    assert salida.loc[1:, "Cond Fisc"].tolist() == ["CF", "CF"]
+
+    # misma firma (tamaño + fecha): no se vuelve a indexar
+    def no_indexar(self, firma):
+        raise AssertionError("reindexó sin cambios")
+    monkeypatch.setattr(Padron, "_indexar", no_indexar)
+    Padron(origen, base).close()
+    monkeypatch.undo()
+
+    # el CSV cambia (aunque tenga el mismo tamaño): se rehace el índice
+    _csv(origen, [
+        ["20-12345678-6", "Mitre 9", "Santa Fe", "Exento"],
+        ["30712345671", "Belgrano 2", "Córdoba", "IVA Responsable Inscripto"],
+        ["27112223334", "", "", "mt"],
+    ], 1_700_000_100 * 10**9)
+    with Padron(origen, base) as padron:
+        assert len(padron) == 3
+        assert padron.buscar(["20123456786"]).loc["20123456786"].tolist() == ["Mitre 9", "", "Santa Fe", "EX"]
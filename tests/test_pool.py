@@ -0,0 +1,50 @@
+# Pool de procesos compartido (PoolConversiones)
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import generadores as g
+from emitidos_core import Avance, PoolConversiones, TiempoExcedido, _sin_script_main, convert_batch
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="mira /proc")
+def test_tiempo_excedido_termina_el_proceso():
+    # un archivo que pasa tiempo_max no sigue ocupando su proceso del pool
+    pool = PoolConversiones(procesos=1, tiempo_max=0.5, memoria_max=0)
+    try:
+        pool.submit(os.getpid).result()  # procesos ya arrancados
+        avance = Avance(["grande.csv"])
+        with pytest.raises(TiempoExcedido):
+            convert_batch([("grande.csv", g.arca_csv(100_000))], "arca", avance=avance, pool=pool)
+        pids = avance.procesos([0])
+        assert pids
+        limite = time.monotonic() + 5
+        while any(os.path.exists(f"/proc/{pid}") for pid in pids) and time.monotonic() < limite:
+            time.sleep(0.1)
+        assert not any(os.path.exists(f"/proc/{pid}") for pid in pids)
+        # el pool sigue sirviendo con procesos nuevos
+        assert pool.submit(os.getpid).result() not in pids
+    finally:
+        pool.cerrar()
+
+
+def test_main_se_restaura_con_varios_hilos():
+    # arranques de procesos desde varios hilos a la vez no pierden el __main__ original
+    main = sys.modules["__main__"]
+    listos = threading.Barrier(8)
+
+    def arrancar():
+        listos.wait()
+        for _ in range(50):
+            with _sin_script_main():
+                time.sleep(0.0005)
+
+    hilos = [threading.Thread(target=arrancar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert sys.modules["__main__"] is main
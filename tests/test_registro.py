@@ -0,0 +1,73 @@
+# Registro local de comprobantes ya convertidos
+import pandas as pd
+import pytest
+
+import generadores as g
+from emitidos_core import (
+    NamedBytesIO, RegistroComprobantes, SinComprobantesNuevos, SinCuitEmisor, convert_batch, process_arca,
+)
+
+NOMBRE = "Emitidos CUIT 20123456786.csv"
+
+
+def _csv(df: pd.DataFrame, nombre: str = NOMBRE) -> NamedBytesIO:
+    return NamedBytesIO(g.arca_bytes(df), nombre)
+
+
+def _convertir(archivo: NamedBytesIO, registro: RegistroComprobantes):
+    return process_arca(archivo, registro=registro, cotizaciones=None, padron=None)
+
+
+def test_segunda_corrida_sin_nuevos(tmp_path):
+    df = g.arca_frame(200)
+    with RegistroComprobantes(tmp_path / "registro.sqlite") as reg:
+        salida, _ = _convertir(_csv(df), reg)
+        assert reg.registrar_salida(salida, "20123456786", NOMBRE) == salida["Número"].nunique()
+        with pytest.raises(SinComprobantesNuevos):
+            _convertir(_csv(df), reg)
+
+
+def test_archivo_que_incluye_el_anterior(tmp_path):
+    # una descarga que se superpone con la ya registrada sólo trae los comprobantes nuevos
+    df = g.arca_frame(300)
+    with RegistroComprobantes(tmp_path / "registro.sqlite") as reg:
+        primera, _ = _convertir(_csv(df.iloc[:200]), reg)
+        reg.registrar_salida(primera, "20123456786", NOMBRE)
+        salida, warnings = _convertir(_csv(df), reg)
+    solo_nuevos, _ = process_arca(_csv(df.iloc[200:].reset_index(drop=True)), cotizaciones=None, padron=None)
+    pd.testing.assert_frame_equal(salida.reset_index(drop=True), solo_nuevos)
+    assert warnings.conteo["duplicado_registro"] == primera["Número"].nunique()
+
+
+def test_csv_sin_cuit_emisor(tmp_path):
+    with RegistroComprobantes(tmp_path / "registro.sqlite") as reg:
+        with pytest.raises(SinCuitEmisor):
+            _convertir(_csv(g.arca_frame(20), "emitidos.csv"), reg)
+        assert len(reg) == 0
+
+
+def test_lote_con_nombres_repetidos(tmp_path):
+    # dos archivos con el mismo nombre (de carpetas distintas) conservan cada uno su CUIT emisor
+    df = g.arca_frame(50, texto=True)
+    archivos = [
+        ("emitidos.xlsx", g._xlsx(df, f"Mis Comprobantes Emitidos - CUIT {cuit}"))
+        for cuit in ("20123456786", "30712345671")
+    ]
+    salida, warnings = convert_batch(archivos, "arca", workers=2, registro=str(tmp_path / "registro.sqlite"))
+    unico, _ = process_arca(NamedBytesIO(archivos[0][1], "emitidos.xlsx"), cotizaciones=None, padron=None)
+    assert len(salida) == 2 * len(unico)
+    assert "duplicado_lote" not in warnings.conteo
+
+
+def test_suc_o_numero_no_entero(tmp_path):
+    # un Suc./Número que no es entero deja la clave incompleta: no se registra ni corta la conversión
+    df = g.arca_frame(20, texto=True)
+    df["Punto de Venta"] = df["Punto de Venta"].astype(float)
+    df.loc[0, "Punto de Venta"] = 2.5
+    xlsx = g.arca_bytes(df, xlsx=True)
+    with RegistroComprobantes(tmp_path / "registro.sqlite") as reg:
+        salida, _ = _convertir(NamedBytesIO(xlsx, "emitidos.xlsx"), reg)
+        reg.registrar_salida(salida, "20123456786", "emitidos.xlsx")
+        assert len(reg) == salida["Número"].nunique() - 1
+        otra, _ = _convertir(NamedBytesIO(xlsx, "emitidos.xlsx"), reg)
+    assert otra["Número"].unique().tolist() == [1]
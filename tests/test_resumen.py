@@ -0,0 +1,35 @@
+# Resumen IVA Ventas (resumen_iva) contra los totales del archivo de origen
+import numpy as np
+
+from emitidos_core import NamedBytesIO, process_arca, resumen_iva
+import generadores as g
+
+NOTAS_CREDITO = ["3", "8", "203", "112"]
+
+
+def test_totales_iguales_al_origen():
+    df = g.arca_frame(400, seed=2)
+    df["Moneda"], df["Tipo Cambio"] = "PES", 1.0
+    salida, _ = process_arca(NamedBytesIO(g.arca_bytes(df), "emitidos.csv"), cotizaciones=None, padron=None)
+    resumen = resumen_iva(salida)
+    grupos, total = resumen.iloc[:-1], resumen.iloc[-1]
+
+    signo = np.where(df["Tipo de Comprobante"].isin(NOTAS_CREDITO), -1, 1)
+
+    def origen(*columnas):  # suma con signo, en centavos
+        return sum(int((np.round(df[c].to_numpy() * 100).astype(np.int64) * signo).sum()) for c in columnas)
+
+    def resumido(columna):
+        return round(total[columna] * 100)
+
+    assert total["Cpbte"] == "Total" and total["Líneas"] == len(salida) == grupos["Líneas"].sum()
+    assert resumido("Total") == origen("Imp. Total")
+    assert resumido("Neto Gravado") == origen(
+        "Imp. Neto Gravado IVA 21%", "Imp. Neto Gravado IVA 10,5%", "Imp. Neto Gravado IVA 27%",
+    )
+    assert resumido("IVA Liquidado") == origen("IVA 21%", "IVA 10,5%", "IVA 27%")
+    assert resumido("Perc./Ret.") == origen("Otros Tributos")
+    # lo que no es neto, IVA ni percepción (también los comprobantes sólo con total) va a NG/EX
+    assert resumido("Conceptos NG/EX") == resumido("Total") - resumido("Neto Gravado") - resumido("IVA Liquidado") - resumido("Perc./Ret.")
+    for columna in ("Neto Gravado", "IVA Liquidado", "Conceptos NG/EX", "Perc./Ret.", "Total"):
+        assert round(grupos[columna].sum() * 100) == resumido(columna)
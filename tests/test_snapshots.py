@@ -0,0 +1,38 @@
+# Snapshots de lectura de XLSX (Arrow en disco)
+import pandas as pd
+
+import emitidos_core as core
+import generadores as g
+from emitidos_core import NamedBytesIO, Rendimiento, Snapshots
+
+
+def _leer(data: bytes, snapshots: Snapshots) -> tuple[pd.DataFrame, set]:
+    perf = Rendimiento()
+    df = core.read_xlsx_snapshot(
+        NamedBytesIO(data, "emitidos.xlsx"), "arca", lambda f: core.read_arca(f)[0], snapshots, perf,
+    )
+    return df, set(perf.etapas)
+
+
+def test_guardar_releer_e_invalidar(tmp_path, monkeypatch):
+    snapshots = Snapshots(tmp_path)
+    df = g.arca_frame(50, seed=3, texto=True)
+    df.loc[::7, "Denominación Receptor"] = None  # celdas vacías entre textos
+    data = g.arca_bytes(df, xlsx=True)
+
+    leida, etapas = _leer(data, snapshots)
+    assert "snapshot guardado" in etapas and len(list(tmp_path.glob("*.arrow"))) == 1
+
+    # segunda lectura: del snapshot, con los mismos valores, tipos de celda y attrs
+    releida, etapas = _leer(data, snapshots)
+    assert "lectura" not in etapas
+    assert releida.equals(leida) and releida.attrs == leida.attrs
+    for col in leida.columns:
+        assert list(map(type, releida[col])) == list(map(type, leida[col]))
+
+    # otro contenido u otra versión del proceso: no se reusa
+    otro = g.arca_bytes(df.iloc[1:], xlsx=True)
+    assert snapshots.leer(snapshots.clave(NamedBytesIO(otro, "emitidos.xlsx"), "arca")) is None
+    monkeypatch.setattr(core, "VERSION_PROCESO", core.VERSION_PROCESO + "-otra")
+    _, etapas = _leer(data, snapshots)
+    assert "lectura" in etapas and len(list(tmp_path.glob("*.arrow"))) == 2
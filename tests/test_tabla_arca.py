@@ -0,0 +1,27 @@
+# Códigos de comprobante ARCA (TABLAARCA.xlsx + correcciones)
+import pandas as pd
+
+import emitidos_core as core
+import generadores as g
+
+
+def test_tabla_corregida_coincide_con_holistor():
+    # con las correcciones, la tabla incluida da lo mismo que la matriz interna
+    assert core._xlsx_xml_rows(str(core.TABLA_ARCA_PATH))
+    assert core.load_tabla_arca() == core.TIPOS_COMP
+
+
+def test_tabla_manda(tmp_path):
+    # un código que la tabla cambia se toma de la tabla; el 208 y los recibos se corrigen igual
+    df = pd.DataFrame(
+        [["1", "FACTURAS A", "F", "X"], ["4", "RECIBOS A", "RC", "A"], ["208", "NC FCE B", "FP", "B"]],
+        columns=["Código", "Descripción", "Tipo", "Letra"],
+    )
+    path = tmp_path / "tabla.xlsx"
+    path.write_bytes(g._xlsx(df, "Tipos de Comprobantes"))
+    tabla = core.load_tabla_arca(str(path))
+    assert tabla["1"] == ("F", "X")
+    assert tabla["4"] == ("R", "A")
+    assert tabla["208"] == ("PC", "B")
+    assert tabla["81"] == core.TIPOS_COMP["81"]
+    assert core.load_tabla_arca(str(tmp_path / "no_existe.xlsx")) == core.TIPOS_COMP
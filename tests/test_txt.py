@@ -0,0 +1,31 @@
+# Salida Holistor como texto (holistor_txt / export_txt)
+import pandas as pd
+
+from emitidos_core import COLS_SALIDA, export_txt, holistor_txt
+
+
+def test_coma_decimal_cp1252_y_tipo_de_cambio():
+    salida = pd.DataFrame({
+        "Fecha dd/mm/aaaa": ["05/03/2024", "06/03/2024", "07/03/2024"],
+        "Cpbte": ["F", "NC", "F"],
+        "Razón Social o Denominación Cliente": ["Peñalba – Ñandú SA", "Müller SRL", "日本"],
+        "Moneda": ["USD", "PES", "PES"],
+        "Tipo de cambio": [1052.755, 1.0, 0.123456],
+        "Alíc.": [21.0, 10.5, None],
+        "Neto Gravado": [1234.5, -0.1, 0.0],
+        "Total": [1493.75, -0.11, None],
+    })
+    data = export_txt(salida)
+    lineas = data.decode("cp1252").split("\r\n")
+    assert lineas[0] == ";".join(COLS_SALIDA) and lineas[-1] == ""
+
+    filas = [dict(zip(COLS_SALIDA, linea.split(";"))) for linea in lineas[1:-1]]
+    assert [f["Razón Social o Denominación Cliente"] for f in filas] == ["Peñalba – Ñandú SA", "Müller SRL", "??"]
+    assert [f["Tipo de cambio"] for f in filas] == ["1052,755", "1,00", "0,123456"]
+    assert [f["Alíc."] for f in filas] == ["21,000", "10,500", ""]
+    assert [f["Neto Gravado"] for f in filas] == ["1234,50", "-0,10", "0,00"]
+    assert [f["Total"] for f in filas] == ["1493,75", "-0,11", ""]
+
+    # por bloques da el mismo texto; "txt" separa con tabulaciones
+    assert "".join(holistor_txt(salida, bloque=1)).encode("cp1252", errors="replace") == data
+    assert export_txt(salida, formato="txt") == data.replace(b";", b"\t")